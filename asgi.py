@@ -0,0 +1,11 @@
+from silver_app.asgi import create_asgi_app
+
+
+
+app = create_asgi_app()
+
+
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app)
\ No newline at end of file
@@ -0,0 +1 @@
+""" Benchmarks: python -m benchmarks runs the API load test, python -m benchmarks.bench_<name> the focused ones """
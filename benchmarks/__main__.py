@@ -0,0 +1,66 @@
+""" Load test register, login, /api/user and the task routes, in process and over HTTP
+
+Usage:
+    python -m benchmarks --requests 200 --concurrency 4 --output results.json
+    python -m benchmarks --output after.json --compare results.json --threshold 10
+
+Seeds --users users with --tasks tasks each into a temporary SQLite file (or --uri).
+"wsgi" sends --requests per route through the test client, one at a time. "http"
+serves the app with werkzeug's threaded server in another process and has
+--concurrency client processes send --requests per route each over keep-alive
+connections. With --compare, exits non-zero when a route's req/s fell, or its p95
+rose, by more than --threshold percent against the saved baseline. Only compare
+runs from the same machine and parameters.
+"""
+
+import argparse
+import sys
+
+from benchmarks.harness import (
+    ROUTES, compare, create_seeded_app, environment, load, print_results, run_http, run_wsgi, save,
+)
+
+
+def main():
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=["wsgi", "http", "both"], default="both")
+    parser.add_argument("--routes", nargs="+", choices=list(ROUTES), default=list(ROUTES))
+    parser.add_argument("--requests", type=int, default=200, help="per route, and per worker in http mode")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests before each route")
+    parser.add_argument("--concurrency", type=int, default=4, help="http client processes")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--tasks", type=int, default=200, help="per user")
+    parser.add_argument("--uri", help="database URI, defaults to a temporary SQLite file")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--compare", metavar="BASELINE", help="results JSON from an earlier run")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent")
+    args = parser.parse_args()
+
+    app = create_seeded_app(max(args.users, args.concurrency), args.tasks, args.uri)
+    routes = [ROUTES[name] for name in args.routes]
+
+    results = {}
+    if args.mode in ("wsgi", "both"):
+        results["wsgi"] = run_wsgi(app, routes, args.requests, args.warmup)
+    if args.mode in ("http", "both"):
+        results["http"] = run_http(app, routes, args.requests, args.concurrency, args.warmup)
+    print_results(results)
+
+    if args.output:
+        meta = environment(**{key: value for key, value in vars(args).items() if key not in ("output", "compare")})
+        save(args.output, meta, results)
+
+    if args.compare:
+        rows, regressions = compare(load(args.compare)["results"], results, args.threshold)
+        print(f"\n{'mode':<5} {'route':<15} {'metric':<7} {'baseline':>10} {'current':>10} {'change %':>9}")
+        for row in rows:
+            flag = "  REGRESSION" if row in regressions else ""
+            print(f"{row[0]:<5} {row[1]:<15} {row[2]:<7} {row[3]:>10} {row[4]:>10} {row[5]:>9}{flag}")
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold}%")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
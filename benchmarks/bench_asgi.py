@@ -0,0 +1,220 @@
+""" WSGI vs ASGI serving at high connection counts, /api/user and /api/user/login
+
+Usage:
+    python -m benchmarks.bench_asgi --connections 1000 --requests 5
+    python -m benchmarks.bench_asgi --modes asgi --connections 200 --uri mysql+pymysql://...
+
+Seeds --connections users into a temporary SQLite file (or --uri) and serves the
+same app twice, one at a time, in a forked process: "wsgi" with werkzeug's
+threaded server (a thread per connection), "asgi" with uvicorn and
+silver_app.asgi (coroutine views on one event loop). An asyncio client opens
+--connections connections at once, logs each in as its own user and has every
+connection send --requests requests per route back to back. uvicorn keeps
+connections alive, werkzeug closes each after its response and the client
+reconnects, inside the measured time. Both listen backlogs are raised to
+--connections. The asgi mode needs uvicorn,
+asgiref, greenlet and the database's async driver (aiosqlite, aiomysql).
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import socket
+import tempfile
+import time
+
+from werkzeug.serving import make_server
+
+from benchmarks.harness import PASSWORD, BenchConfig, create_seeded_app, print_results, summarize
+
+try:
+    import uvicorn
+    from silver_app.asgi import create_asgi_app
+except ImportError:  # optional
+    uvicorn = None
+
+
+ROUTES = {
+    "user": ("GET", "/api/user", None),
+    "login": ("POST", "/api/user/login", lambda user: {"user": {"username": f"bench_{user}", "password": PASSWORD}}),
+}
+
+
+def _serve_wsgi(app, sock, backlog):
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, app, threaded=True, fd=sock.fileno())
+    server.serve_forever()
+
+
+def _serve_asgi(app, sock, backlog):
+
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning", access_log=False, backlog=backlog))
+    server.run(sockets=[sock])
+
+
+def listening_socket(backlog):
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(backlog)
+    return sock
+
+
+class Client:
+    """ One HTTP/1.1 connection, carrying its user's login cookie, reopened when the server closes it """
+
+    def __init__(self, port, user):
+
+        self.port = port
+        self.user = user
+        self.reader = None
+        self.writer = None
+        self.cookie = None
+
+    async def connect(self):
+
+        self.reader, self.writer = await asyncio.open_connection("127.0.0.1", self.port)
+
+    async def request(self, method, path, body=None):
+
+        if self.writer is None:
+            await self.connect()
+
+        head = [f"{method} {path} HTTP/1.1", "Host: 127.0.0.1"]
+        payload = b""
+        if body is not None:
+            payload = json.dumps(body).encode()
+            head += ["Content-Type: application/json", f"Content-Length: {len(payload)}"]
+        if self.cookie:
+            head.append(f"Cookie: {self.cookie}")
+        self.writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + payload)
+
+        status_line = await self.reader.readline()
+        status = int(status_line.split(b" ", 2)[1])
+        length, cookies, closing = 0, [], False
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin1").partition(":")
+            name, value = name.strip().lower(), value.strip()
+            if name == "content-length":
+                length = int(value)
+            elif name == "set-cookie":
+                cookies.append(value.split(";", 1)[0])
+            elif name == "connection" and value.lower() == "close":
+                closing = True
+        await self.reader.readexactly(length)
+        if closing:
+            self.close()
+        if cookies:
+            self.cookie = "; ".join(cookies)
+        return status
+
+    def close(self):
+
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+async def _drive(port, connections, routes, requests, timeout):
+
+    clients = [Client(port, user) for user in range(connections)]
+    await asyncio.gather(*(client.connect() for client in clients))
+    login = ROUTES["login"]
+    await asyncio.gather(*(client.request(login[0], login[1], login[2](client.user)) for client in clients))
+
+    results = {}
+    for name in routes:
+        method, path, body = ROUTES[name]
+        latencies, errors = [], 0
+
+        async def run(client):
+
+            nonlocal errors
+            for _ in range(requests):
+                sent = time.perf_counter()
+                try:
+                    status = await asyncio.wait_for(
+                        client.request(method, path, body(client.user) if body else None), timeout,
+                    )
+                except (asyncio.TimeoutError, OSError, ValueError, asyncio.IncompleteReadError):
+                    errors += 1
+                    return
+                latencies.append(time.perf_counter() - sent)
+                errors += status != 200
+
+        started = time.perf_counter()
+        await asyncio.gather(*(run(client) for client in clients))
+        results[name] = summarize(latencies, errors, time.perf_counter() - started)
+
+    for client in clients:
+        client.close()
+    return results
+
+
+def run(serve, app, connections, routes, requests, timeout):
+    """ app served by serve in a forked process while this one drives it """
+
+    context = multiprocessing.get_context("fork")
+    sock = listening_socket(connections)
+    server = context.Process(target=serve, args=(app, sock, connections), daemon=True)
+    server.start()
+    port = sock.getsockname()[1]
+    sock.close()
+    try:
+        return asyncio.run(_drive(port, connections, routes, requests, timeout))
+    finally:
+        server.terminate()
+        server.join()
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modes", nargs="+", choices=["wsgi", "asgi"], default=["wsgi", "asgi"])
+    parser.add_argument("--routes", nargs="+", choices=list(ROUTES), default=list(ROUTES))
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=5, help="per connection and route")
+    parser.add_argument("--pool-size", type=int, default=20, help="database connections per engine")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds before a request counts as an error")
+    parser.add_argument("--uri", help="database to seed and serve from, default a temporary SQLite file")
+    args = parser.parse_args()
+
+    """ Each connection is a descriptor on both ends """
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    if hard < 2 * args.connections + 100:
+        parser.error(f"--connections {args.connections} needs a higher open files limit than {hard}")
+
+    uri = args.uri or "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="silver_bench_"), "bench.db")
+
+    class ServeConfig(BenchConfig):
+        SQLALCHEMY_DATABASE_URI = uri
+        SQLALCHEMY_ENGINE_OPTIONS = {"pool_size": args.pool_size, "max_overflow": 0, "pool_timeout": args.timeout}
+
+    app = create_seeded_app(args.connections, 0, uri=uri, config=ServeConfig)
+
+    results = {}
+    if "wsgi" in args.modes:
+        results["wsgi"] = run(_serve_wsgi, app, args.connections, args.routes, args.requests, args.timeout)
+    if "asgi" in args.modes:
+        if uvicorn is None:
+            print("asgi: skipped, needs uvicorn and asgiref installed")
+        else:
+            asgi = create_asgi_app(ServeConfig)
+            results["asgi"] = run(_serve_asgi, asgi, args.connections, args.routes, args.requests, args.timeout)
+
+    print(f"{args.connections} connections, {args.requests} requests per connection and route\n")
+    print_results(results)
+
+
+if __name__ == "__main__":
+    main()
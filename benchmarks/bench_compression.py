@@ -0,0 +1,77 @@
+""" Compression ratio and CPU cost per encoding for a task page and a streamed NDJSON export
+
+Usage:
+    python -m benchmarks.bench_compression --rows 20000
+"""
+
+import argparse
+import datetime as dt
+
+from flask import g, request_finished
+
+from silver_app.app import create_app
+from silver_app.extensions import db, response_compressor
+from silver_app.settings import TestConfig
+from silver_app.task.models import Task
+from silver_app.user.models import User
+from silver_app.utils.compression import CODECS
+
+
+class BenchConfig(TestConfig):
+    DEBUG = False
+
+
+def seed(rows):
+
+    user = User("bench", "bench@example.com", password="bench-pass").save()
+    due = dt.date(2026, 1, 1)
+    Task.bulk_create(
+        ({"title": f"task {i}", "user_id": user.id, "description": "x" * 100, "due_date": due} for i in range(rows)),
+        chunk_size=10000,
+    )
+    db.session.expunge_all()
+
+
+def fetch(client, path, encoding):
+
+    response = client.get(path, headers={"Accept-Encoding": encoding}, buffered=False)
+    size = sum(len(chunk) for chunk in response.response)
+    response.close()
+    return size
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000, help="tasks seeded for the export")
+    args = parser.parse_args()
+
+    app = create_app(BenchConfig)
+    captured = {}
+    request_finished.connect(lambda sender, **_: captured.update(stats=getattr(g, "compression", None)), app, weak=False)
+
+    with app.app_context():
+        db.create_all()
+        seed(args.rows)
+
+        client = app.test_client()
+        client.post("/api/user/login", json={"user": {"username": "bench", "password": "bench-pass"}})
+
+        encodings = [codec.name for codec in response_compressor.codecs]
+        skipped = [name for name, cls in CODECS.items() if not cls.available]
+        paths = (("page of 100", "/api/tasks?limit=100"), ("export ndjson", "/api/tasks/export?format=ndjson"))
+
+        print(f"{'response':<14} {'encoding':<9} {'bytes':>10} {'ratio':>7} {'cpu ms':>8}")
+        for label, path in paths:
+            print(f"{label:<14} {'identity':<9} {fetch(client, path, 'identity'):>10}")
+            for encoding in encodings:
+                size = fetch(client, path, encoding)
+                stats = captured["stats"]
+                print(f"{label:<14} {encoding:<9} {size:>10} {stats.ratio:>7.2f} {stats.cpu_seconds * 1000:>8.2f}")
+
+        if skipped:
+            print(f"not installed: {', '.join(skipped)}")
+
+
+if __name__ == "__main__":
+    main()
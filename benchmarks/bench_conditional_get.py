@@ -0,0 +1,67 @@
+""" GET /api/user polling cost with and without If-None-Match: latency, bytes on the wire, queries
+
+Usage:
+    python -m benchmarks.bench_conditional_get --requests 2000
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+from sqlalchemy import event
+
+from silver_app.app import create_app
+from silver_app.extensions import db
+from silver_app.settings import TestConfig
+
+
+class BenchConfig(TestConfig):
+    DEBUG = False
+
+
+def poll(client, count, headers, counter):
+
+    counter[0] = 0
+    size = 0
+    start = time.perf_counter()
+    for _ in range(count):
+        response = client.get("/api/user", headers=headers)
+        size += len(response.get_data())
+    elapsed = time.perf_counter() - start
+    return response.status_code, elapsed / count * 1e6, size / count, counter[0] / count
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000, help="polls per scenario")
+    args = parser.parse_args()
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        counter = [0]
+        event.listen(db.engine, "before_cursor_execute", lambda *_: counter.__setitem__(0, counter[0] + 1))
+
+        client = app.test_client()
+        with contextlib.redirect_stdout(io.StringIO()):
+            client.post(
+                "/api/user/register",
+                json={"user": {"username": "bench", "email": "bench@example.com", "password": "s3cret-pass"}},
+            )
+            etag = client.get("/api/user").headers["ETag"]
+
+            scenarios = (
+                ("unconditional", {}),
+                ("If-None-Match", {"If-None-Match": etag}),
+            )
+            results = [(label, *poll(client, args.requests, headers, counter)) for label, headers in scenarios]
+
+    print(f"{'scenario':<15} {'status':>6} {'us/request':>11} {'bytes':>7} {'queries':>8}")
+    for label, status, micros, size, queries in results:
+        print(f"{label:<15} {status:>6} {micros:>11.1f} {size:>7.0f} {queries:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+""" Throughput of the error paths bot traffic hits: unknown URLs (404), bad logins and missing tokens (401)
+
+Usage:
+    python -m benchmarks.bench_error_path --requests 5000
+
+End to end numbers go through the test client, whose own overhead dominates; the
+handler numbers time only exception construction plus the error handler.
+"""
+
+import argparse
+import contextlib
+import io
+import logging
+import time
+import timeit
+
+from werkzeug.exceptions import NotFound
+
+from silver_app.app import create_app
+from silver_app.extensions import db
+from silver_app.settings import TestConfig
+from silver_app.utils.errors import UnauthorizedException
+from silver_app.utils.responses import handle_http_exception, handle_silver_app_exception
+
+
+class BenchConfig(TestConfig):
+    DEBUG = False
+    ERROR_DEBUG_MESSAGES = False
+
+
+SCENARIOS = (
+    ("404 unknown URL", "GET", "/wp-login.php", None),
+    ("401 unknown user login", "POST", "/api/user/login", {"user": {"username": "admin", "password": "admin"}}),
+    ("401 missing token", "GET", "/api/user", None),
+)
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    logging.getLogger("silver_app").disabled = True
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+
+    print(f"{'scenario':<24} {'status':>6} {'req/s':>9} {'us/req':>8}")
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = []
+        for label, method, path, body in SCENARIOS:
+            status = client.open(path, method=method, json=body).status_code
+            started = time.perf_counter()
+            for _ in range(args.requests):
+                client.open(path, method=method, json=body)
+            elapsed = time.perf_counter() - started
+            results.append((label, status, args.requests / elapsed, elapsed / args.requests * 1e6))
+
+    for label, status, rate, micros in results:
+        print(f"{label:<24} {status:>6} {rate:>9.0f} {micros:>8.1f}")
+
+    handlers = (
+        ("404 handler", lambda: handle_http_exception(NotFound())),
+        ("401 handler", lambda: handle_silver_app_exception(UnauthorizedException("Invalid Credentials"))),
+    )
+    with app.test_request_context("/wp-login.php"), contextlib.redirect_stdout(io.StringIO()):
+        timings = [
+            (label, min(timeit.repeat(handler, number=args.requests, repeat=3)) / args.requests)
+            for label, handler in handlers
+        ]
+
+    print(f"\n{'handler only':<24} {'us/call':>8}")
+    for label, seconds in timings:
+        print(f"{label:<24} {seconds * 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
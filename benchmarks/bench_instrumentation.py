@@ -0,0 +1,78 @@
+""" Request profiling overhead: the same requests with INSTRUMENTATION_ENABLED off and on
+
+Usage:
+    python -m benchmarks.bench_instrumentation --requests 2000 --rows 20000
+"""
+
+import argparse
+import contextlib
+import datetime as dt
+import io
+import logging
+import time
+
+from silver_app.app import create_app
+from silver_app.extensions import db
+from silver_app.settings import TestConfig
+from silver_app.task.models import Task
+from silver_app.user.models import User
+
+
+def measure(enabled, requests, rows):
+
+    class BenchConfig(TestConfig):
+        DEBUG = False
+        INSTRUMENTATION_ENABLED = enabled
+        INSTRUMENTATION_SERVER_TIMING = enabled
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        user = User("bench", "bench@example.com", password="bench-pass").save()
+        due = dt.date(2026, 1, 1)
+        Task.bulk_create(
+            ({"title": f"task {i}", "user_id": user.id, "description": "x" * 100, "due_date": due} for i in range(rows)),
+            chunk_size=10000,
+        )
+        db.session.expunge_all()
+
+    client = app.test_client()
+    client.post("/api/user/login", json={"user": {"username": "bench", "password": "bench-pass"}})
+
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        for _ in range(requests):
+            client.get("/api/user")
+        results["GET /api/user"] = (time.perf_counter() - started) / requests * 1e6
+
+        started = time.perf_counter()
+        response = client.get("/api/tasks/export", query_string={"format": "ndjson"}, buffered=False)
+        for _ in response.response:
+            pass
+        response.close()
+        results[f"export {rows} rows"] = (time.perf_counter() - started) * 1e6
+
+    return results
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args()
+
+    # Measure the bookkeeping, not the log handler
+    logging.getLogger("silver_app.instrumentation").disabled = True
+
+    off = measure(False, args.requests, args.rows)
+    on = measure(True, args.requests, args.rows)
+
+    print(f"{'request':<20} {'off us':>12} {'on us':>12} {'overhead':>9}")
+    for label in off:
+        print(f"{label:<20} {off[label]:>12.1f} {on[label]:>12.1f} {(on[label] / off[label] - 1) * 100:>8.1f}%")
+
+
+if __name__ == "__main__":
+    main()
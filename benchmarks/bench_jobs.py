@@ -0,0 +1,196 @@
+""" Job queue dispatch on SQLite: enqueue rate, worker throughput, enqueue to start latency and the reminder scan
+
+Usage:
+    python -m benchmarks.bench_jobs --jobs 2000
+    python -m benchmarks.bench_jobs --workers 4 --batch-sizes 1 10 50 --tasks 50000
+
+Runs against a fresh SQLite file. Enqueues --jobs no-op jobs one commit each, then
+drains them with one worker per --batch-sizes value, then with --workers worker
+threads sharing the table, checking that no job ran twice. Latency is measured
+with a polling worker running while jobs are enqueued one by one, and for
+job_queue.defer, which skips the table. Last, the scheduler scans --tasks tasks
+due over the next --days days, twice: the second pass finds every reminder queued.
+"""
+
+import argparse
+import datetime as dt
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from sqlalchemy import delete
+
+from silver_app.app import create_app
+from silver_app.extensions import db, job_queue
+from silver_app.jobs.models import Job
+from silver_app.jobs.scheduler import schedule_task_reminders
+from silver_app.settings import TestConfig
+from silver_app.task.models import Task
+from silver_app.user.models import User
+from silver_app.utils.job_queue import Worker
+
+
+runs = Counter()
+started_at = []
+
+
+@job_queue.handler("bench_noop")
+def bench_noop(payload):
+
+    runs[payload["n"]] += 1
+
+
+@job_queue.handler("bench_latency")
+def bench_latency(payload):
+
+    started_at.append(time.time() - payload["sent"])
+
+
+def percentiles(samples):
+
+    samples = sorted(samples)
+    return " ".join(f"p{p} {samples[min(len(samples) - 1, len(samples) * p // 100)] * 1000:.1f} ms" for p in (50, 90, 99))
+
+
+def reset():
+
+    db.session.execute(delete(Job))
+    db.session.commit()
+    runs.clear()
+
+
+def enqueue_jobs(count):
+
+    started = time.perf_counter()
+    for n in range(count):
+        job_queue.enqueue("bench_noop", {"n": n})
+    return count / (time.perf_counter() - started)
+
+
+def drain(app, workers, batch_size):
+
+    def work(worker):
+        with app.app_context():
+            worker.run(once=True)
+
+    pool = [Worker(job_queue, batch_size=batch_size, worker_id=f"bench-{n}") for n in range(workers)]
+    threads = [threading.Thread(target=work, args=(worker,)) for worker in pool]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return sum(worker.succeeded for worker in pool), elapsed
+
+
+def time_dispatch(app, jobs, batch_sizes, workers):
+
+    ok = True
+    print(f"enqueue, one commit per job:  {enqueue_jobs(jobs):>10,.0f} jobs/s")
+    reset()
+
+    for batch_size in batch_sizes:
+        enqueue_jobs(jobs)
+        done, elapsed = drain(app, 1, batch_size)
+        print(f"1 worker, batch {batch_size:<3}:          {done / elapsed:>10,.0f} jobs/s")
+        ok &= done == jobs and set(runs.values()) == {1}
+        reset()
+
+    enqueue_jobs(jobs)
+    done, elapsed = drain(app, workers, max(batch_sizes))
+    twice = sum(1 for count in runs.values() if count > 1)
+    print(f"{workers} workers, batch {max(batch_sizes):<3}:         {done / elapsed:>10,.0f} jobs/s, {len(runs)} jobs run, {twice} more than once")
+    ok &= len(runs) == jobs and not twice
+    reset()
+    return ok
+
+
+def time_latency(app, samples, poll_interval):
+
+    worker = Worker(job_queue, batch_size=10, poll_interval=poll_interval, worker_id="bench-latency")
+
+    def work():
+        with app.app_context():
+            worker.run()
+
+    thread = threading.Thread(target=work)
+    thread.start()
+    started_at.clear()
+    for _ in range(samples):
+        job_queue.enqueue("bench_latency", {"sent": time.time()})
+        time.sleep(random.uniform(0, poll_interval * 2))
+    while len(started_at) < samples:
+        time.sleep(0.01)
+    worker.stop()
+    thread.join()
+    print(f"enqueue to start, poll {poll_interval * 1000:.0f} ms: {percentiles(started_at)}")
+
+    started_at.clear()
+    for _ in range(samples):
+        job_queue.defer("bench_latency", {"sent": time.time()})
+        time.sleep(0.001)
+    while len(started_at) < samples:
+        time.sleep(0.01)
+    print(f"defer to start:              {percentiles(started_at)}")
+    reset()
+
+
+def time_scheduler(task_count, days):
+
+    user = User("bench", "bench@example.com", password="bench-pass").save()
+    today = dt.date.today()
+    statuses = ("pending", "pending", "pending", "completed")
+    Task.bulk_create(
+        {
+            "title": f"task {n}", "user_id": user.id, "status": statuses[n % len(statuses)],
+            "due_date": today + dt.timedelta(days=n % (days * 2)),
+            "created_at": dt.datetime.now(dt.timezone.utc), "updated_at": dt.datetime.now(dt.timezone.utc),
+        }
+        for n in range(task_count)
+    )
+
+    for label in ("first pass", "second pass"):
+        started = time.perf_counter()
+        queued = schedule_task_reminders(today, lead_days=days)
+        print(f"scheduler, {task_count} tasks, {label}: {(time.perf_counter() - started) * 1000:>8.1f} ms, {queued} reminders queued")
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=2000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--poll-interval", type=float, default=0.05)
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--days", type=int, default=3)
+    args = parser.parse_args()
+
+    class BenchConfig(TestConfig):
+        DEBUG = False
+        LOG_LEVEL = "ERROR"
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="silver_jobs_"), "bench.db")
+        SQLALCHEMY_ENGINE_OPTIONS = {"connect_args": {"timeout": 30}}
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        ok = time_dispatch(app, args.jobs, args.batch_sizes, args.workers)
+        print()
+        time_latency(app, args.samples, args.poll_interval)
+        print()
+        time_scheduler(args.tasks, args.days)
+
+    if not ok:
+        print("\nFAIL: a job was lost or ran more than once")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+""" Envelope serialization time and size per JSON backend, for small and large data payloads
+
+Usage:
+    python -m benchmarks.bench_json_envelope --number 2000
+"""
+
+import argparse
+import datetime as dt
+import timeit
+
+from silver_app.app import create_app
+from silver_app.settings import TestConfig
+from silver_app.utils.json_provider import orjson, ujson
+
+
+def envelope(data):
+
+    return {
+        "success": True,
+        "api_version": "v1",
+        "blueprint": "task",
+        "timestamp": dt.datetime.now(dt.timezone.utc),
+        "request_id": "req_20250720_103045_abc123",
+        "message": "Tasks retrieved successfully",
+        "data": data,
+        "metadata": {"next_cursor": "WyJjcmVhdGVkX2F0IiwiMjAyNS0wNy0yMCIsNDJd", "has_more": True, "limit": 20},
+        "status_code": 200,
+    }
+
+
+def task(i):
+
+    return {
+        "id": i,
+        "title": f"Task number {i}",
+        "description": "Pick up groceries, ünïcode included",
+        "dueDate": "2025-07-21",
+        "status": "pending",
+        "createdAt": "2025-07-20T10:30:45.123456",
+        "updatedAt": "2025-07-20T10:30:45.123456",
+    }
+
+
+PAYLOADS = {
+    "small (1 user)": {"user": {"username": "jake", "email": "jake@jake.jake", "createdAt": "2025-07-20T10:30:45.123456", "updatedAt": "2025-07-20T10:30:45.123456"}},
+    "large (1000 tasks)": {"tasks": [task(i) for i in range(1000)]},
+}
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=2000, help="iterations for the small payload, large runs number / 100")
+    args = parser.parse_args()
+
+    backends = ["json"] + [name for name, module in (("ujson", ujson), ("orjson", orjson)) if module]
+    print(f"{'backend':<8} {'payload':<20} {'us/envelope':>12} {'bytes':>9}")
+
+    for backend in backends:
+
+        class BenchConfig(TestConfig):
+            DEBUG = False
+            JSON_BACKEND = backend
+
+        app = create_app(BenchConfig)
+        with app.app_context():
+            for label, data in PAYLOADS.items():
+                body = envelope(data)
+                number = args.number if "small" in label else max(1, args.number // 100)
+                seconds = timeit.timeit(lambda: app.json.response(body), number=number)
+                size = len(app.json.response(body).get_data())
+                print(f"{backend:<8} {label:<20} {seconds / number * 1e6:>12.1f} {size:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+""" Time a request thread spends in logger.info when the log destination is slow, direct handler vs queue
+
+Usage:
+    python -m benchmarks.bench_logging --records 2000 --write-delay 1
+
+The destination sleeps --write-delay milliseconds per record, like a blocked pipe or
+a saturated disk. Writing to it directly puts that delay on every call; through the
+silver_app queue the caller only pays for the filters and a put_nowait, and once the
+queue is full records are dropped instead of waiting. Run inside a request context,
+so request_id stamping is part of the measured cost.
+"""
+
+import argparse
+import logging
+import statistics
+import time
+
+from silver_app.app import create_app
+from silver_app.extensions import structured_logging
+from silver_app.settings import TestConfig
+from silver_app.utils.structured_logging import JSONFormatter, RequestIdFilter
+
+
+class BenchConfig(TestConfig):
+
+    DEBUG = False
+    LOG_LEVEL = "INFO"
+    LOG_RATE_LIMITS = {}
+
+
+class SlowStream:
+
+    def __init__(self, delay):
+
+        self.delay = delay
+        self.lines = 0
+
+    def write(self, text):
+
+        time.sleep(self.delay)
+        self.lines += text.count("\n")
+
+    def flush(self):
+        pass
+
+
+def measure(logger, records):
+
+    timings = []
+    for index in range(records):
+        started = time.perf_counter()
+        logger.info("bench record %d", index, extra={"kind": "bench"})
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return timings
+
+
+def report(label, timings, stream):
+
+    def percentile(p):
+        return timings[min(len(timings) - 1, int(len(timings) * p))] * 1e6
+
+    print(
+        f"{label:<8} {statistics.mean(timings) * 1e6:>10.1f} {percentile(0.5):>9.1f} "
+        f"{percentile(0.99):>9.1f} {timings[-1] * 1e6:>10.1f} {stream.lines:>8}"
+    )
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=2000)
+    parser.add_argument("--write-delay", type=float, default=1.0, help="milliseconds per written record")
+    parser.add_argument("--queue-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    BenchConfig.LOG_QUEUE_SIZE = args.queue_size
+    app = create_app(BenchConfig)
+    delay = args.write_delay / 1000
+
+    print(f"{'handler':<8} {'mean us':>10} {'p50 us':>9} {'p99 us':>9} {'max us':>10} {'written':>8}")
+    with app.test_request_context("/"):
+        app.preprocess_request()
+
+        direct_stream = SlowStream(delay)
+        direct = logging.StreamHandler(direct_stream)
+        direct.setFormatter(JSONFormatter())
+        direct.addFilter(RequestIdFilter())
+        logger = logging.getLogger("benchmarks.direct")
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        logger.addHandler(direct)
+        report("direct", measure(logger, args.records), direct_stream)
+
+        queued_stream = SlowStream(delay)
+        structured_logging.output_handlers[0].setStream(queued_stream)
+        timings = measure(logging.getLogger("silver_app.bench"), args.records)
+        structured_logging.stop()
+        report("queued", timings, queued_stream)
+
+    print(f"dropped: {structured_logging.stats()}")
+
+
+if __name__ == "__main__":
+    main()
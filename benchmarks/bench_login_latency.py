@@ -0,0 +1,75 @@
+""" p50/p99 /api/user/login latency per password hasher configuration
+
+Usage:
+    python -m benchmarks.bench_login_latency --logins 50
+"""
+
+import argparse
+import statistics
+import time
+
+from silver_app.app import create_app
+from silver_app.extensions import db
+from silver_app.utils.hashing import argon2
+from silver_app.settings import TestConfig
+
+
+CONFIGURATIONS = [
+    ("bcrypt rounds=10", "bcrypt", {"rounds": 10}),
+    ("bcrypt rounds=12", "bcrypt", {"rounds": 12}),
+    ("scrypt ln=14", "scrypt", {"ln": 14, "r": 8, "p": 1}),
+    ("scrypt ln=15", "scrypt", {"ln": 15, "r": 8, "p": 1}),
+    ("argon2 t=2 m=19MiB", "argon2", {"time_cost": 2, "memory_cost": 19456, "parallelism": 1}),
+    ("argon2 t=3 m=64MiB", "argon2", {"time_cost": 3, "memory_cost": 65536, "parallelism": 4}),
+]
+
+
+def percentile(samples, pct):
+
+    samples = sorted(samples)
+    index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+    return samples[index]
+
+
+def measure(scheme, options, logins):
+
+    class BenchConfig(TestConfig):
+        PASSWORD_HASHER = scheme
+        PASSWORD_HASHER_OPTIONS = {scheme: options}
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+
+    client = app.test_client()
+    credentials = {"user": {"username": "bench", "password": "s3cret-pass"}}
+    client.post("/api/user/register", json={"user": dict(credentials["user"], email="bench@example.com")})
+
+    samples = []
+    for _ in range(logins):
+        start = time.perf_counter()
+        response = client.post("/api/user/login", json=credentials)
+        samples.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.get_data(as_text=True)
+
+    return samples
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'configuration':<22} {'p50_ms':>8} {'p99_ms':>8} {'mean_ms':>8}")
+    for label, scheme, options in CONFIGURATIONS:
+        if scheme == "argon2" and argon2 is None:
+            print(f"{label:<22} skipped, argon2-cffi not installed")
+            continue
+
+        samples = measure(scheme, options, args.logins)
+        print(f"{label:<22} {percentile(samples, 50):>8.1f} {percentile(samples, 99):>8.1f} {statistics.mean(samples):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
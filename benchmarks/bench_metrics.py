@@ -0,0 +1,65 @@
+""" Per request cost of the metrics hooks, checked against a budget
+
+Usage:
+    python -m benchmarks.bench_metrics --number 200000 --budget-us 5
+
+Times the before_request + after_request pair inside a pushed request context, with and
+without a multi-process directory, and exits non-zero when either is over --budget-us.
+"""
+
+import argparse
+import sys
+import tempfile
+import timeit
+
+from silver_app.app import create_app
+from silver_app.extensions import metrics
+from silver_app.settings import TestConfig
+
+
+def measure(number, multiproc_dir=None):
+
+    class BenchConfig(TestConfig):
+        DEBUG = False
+        METRICS_MULTIPROC_DIR = multiproc_dir
+
+    app = create_app(BenchConfig)
+    response = app.response_class("ok")
+
+    with app.test_request_context("/api/user"):
+
+        def hooks():
+            metrics.before_request()
+            metrics.after_request(response)
+
+        hooks()
+        record_seconds = min(timeit.repeat(
+            lambda: (metrics.requests.inc(("user", "user.get_user", "200", "")),
+                     metrics.latency.observe(("user", "user.get_user", "200"), 0.0123)),
+            number=number, repeat=3,
+        ))
+        hook_seconds = min(timeit.repeat(hooks, number=number, repeat=3))
+
+    return record_seconds / number * 1e6, hook_seconds / number * 1e6
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=200000)
+    parser.add_argument("--budget-us", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"{'mode':<14} {'record us':>10} {'hooks us':>9}")
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, directory in (("single", None), ("multiprocess", tmp)):
+            record_us, hooks_us = measure(args.number, directory)
+            print(f"{label:<14} {record_us:>10.2f} {hooks_us:>9.2f}")
+            failed = failed or hooks_us > args.budget_us
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
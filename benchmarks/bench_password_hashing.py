@@ -0,0 +1,68 @@
+""" Logins/sec against password hashing pool size
+
+Usage:
+    python -m benchmarks.bench_password_hashing --rounds 10 --pool-sizes 0,1,2,4 --threads 16 --logins 200
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from silver_app.utils.errors import ServiceUnavailableException
+from silver_app.utils.hashing import PasswordHasher
+
+
+def run(hasher, pw_hash, threads, logins):
+
+    def login(_):
+        try:
+            return hasher.check_password_hash(pw_hash, "correct horse battery staple")
+        except ServiceUnavailableException:
+            return None
+
+    """ warm the pool so worker spawn time is not counted """
+    hasher.check_password_hash(pw_hash, "correct horse battery staple")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(login, range(logins)))
+    elapsed = time.perf_counter() - start
+
+    rejected = results.count(None)
+    return (logins - rejected) / elapsed, rejected, elapsed
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--pool-sizes", default="0,1,2,{}".format(os.cpu_count() or 4))
+    parser.add_argument("--threads", type=int, default=16, help="concurrent request threads")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--queue-size", type=int, default=32)
+    parser.add_argument("--queue-timeout", type=float, default=None)
+    args = parser.parse_args()
+
+    hasher = PasswordHasher()
+    hasher.configure(options={"rounds": args.rounds})
+    pw_hash = hasher.generate_password_hash("correct horse battery staple")
+
+    print(f"rounds={args.rounds} threads={args.threads} logins={args.logins}")
+    print(f"{'pool_size':>10} {'logins/sec':>12} {'rejected':>9} {'elapsed_s':>10}")
+
+    for pool_size in (int(size) for size in args.pool_sizes.split(",")):
+        hasher.configure(
+            options={"rounds": args.rounds},
+            pool_size=pool_size,
+            queue_size=args.queue_size,
+            queue_timeout=args.queue_timeout,
+        )
+        rate, rejected, elapsed = run(hasher, pw_hash, args.threads, args.logins)
+        print(f"{pool_size:>10} {rate:>12.1f} {rejected:>9} {elapsed:>10.2f}")
+
+    hasher.shutdown()
+
+
+if __name__ == "__main__":
+    main()
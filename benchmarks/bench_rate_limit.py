@@ -0,0 +1,146 @@
+""" Rate limiter cost per check, shard contention, and login attempts refused before hashing
+
+Usage:
+    python -m benchmarks.bench_rate_limit --checks 200000 --threads 8
+    python -m benchmarks.bench_rate_limit --attempts 50
+
+Times LocalRateLimitBackend.hit for one hot key, for --keys distinct keys and for
+refused hits, then RateLimiter.check with the login rules (ip and username) in a
+request context. --threads threads then hit distinct keys through 1 and 16 shards.
+Last, --attempts wrong-password logins for one username go through the app: only
+the attempts under the username limit may reach the password hasher, the rest
+must be 429s. Exits non-zero if any refused attempt was hashed.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import timeit
+
+from silver_app.app import create_app
+from silver_app.extensions import db, password_hasher, rate_limiter
+from silver_app.settings import TestConfig
+from silver_app.user.models import User
+from silver_app.utils.errors import TooManyRequestsException
+from silver_app.utils.rate_limit import LocalRateLimitBackend
+
+
+UNLIMITED = 10 ** 12
+
+
+def per_check(func, number):
+
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1e6
+
+
+def time_backend(checks, keys):
+
+    backend = LocalRateLimitBackend()
+    print(f"hit, one key:              {per_check(lambda: backend.hit('login:ip:10.0.0.1', UNLIMITED, 60), checks):.2f} us")
+
+    names = [f"login:username:user_{n}" for n in range(keys)]
+    iterator = iter(names * (checks // keys + 1) * 3)
+    print(f"hit, {keys} keys:{' ' * (15 - len(str(keys)))}{per_check(lambda: backend.hit(next(iterator), UNLIMITED, 60), checks):.2f} us")
+
+    backend.hit("login:ip:10.0.0.2", 1, 60)
+    print(f"hit, refused:              {per_check(lambda: backend.hit('login:ip:10.0.0.2', 1, 60), checks):.2f} us")
+
+
+def time_check(app, checks):
+
+    rate_limiter.rules["login"] = (("ip", "login:ip:", UNLIMITED, 60), ("username", "login:username:", UNLIMITED, 60))
+    arguments = {"username": "bench", "password": "bench-pass"}
+    with app.test_request_context("/api/user/login", method="POST", environ_base={"REMOTE_ADDR": "10.0.0.3"}):
+        print(f"RateLimiter.check, login:  {per_check(lambda: rate_limiter.check('login', arguments), checks):.2f} us")
+
+
+def time_threads(checks, threads):
+
+    for shards in (1, 16):
+        backend = LocalRateLimitBackend(shards=shards)
+
+        def work(worker):
+            key = f"login:username:worker_{worker}_"
+            for n in range(checks // threads):
+                backend.hit(key + str(n % 100), UNLIMITED, 60)
+
+        pool = [threading.Thread(target=work, args=(worker,)) for worker in range(threads)]
+        started = time.perf_counter()
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        print(f"{threads} threads, {shards:>2} shard(s): {checks / elapsed:>12,.0f} hits/s")
+
+
+def check_login(attempts):
+
+    class BenchConfig(TestConfig):
+        DEBUG = False
+        LOG_LEVEL = "ERROR"
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="silver_ratelimit_"), "bench.db")
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        User("victim", "victim@example.com", password="right-pass").save()
+
+    hashed = []
+    check_password_hash = password_hasher.check_password_hash
+
+    def counting_check(*args, **kwargs):
+        hashed.append(1)
+        return check_password_hash(*args, **kwargs)
+
+    password_hasher.check_password_hash = counting_check
+    limit = dict((name, limit) for name, _, limit, _ in rate_limiter.rules["login"])["username"]
+
+    client = app.test_client()
+    statuses, latencies = [], {}
+    for n in range(attempts):
+        """ A new address per attempt, as from a botnet, so only the username limit applies """
+        started = time.perf_counter()
+        response = client.post(
+            "/api/user/login", json={"user": {"username": "victim", "password": f"guess-{n}"}},
+            environ_base={"REMOTE_ADDR": f"10.1.{n // 250}.{n % 250}"},
+        )
+        latencies.setdefault(response.status_code, []).append(time.perf_counter() - started)
+        statuses.append(response.status_code)
+    password_hasher.check_password_hash = check_password_hash
+
+    refused = statuses.count(TooManyRequestsException.status_code)
+    print(f"\n{attempts} wrong passwords for one username, limit {limit}: {statuses.count(401)} x 401, {refused} x 429, {len(hashed)} hashes")
+    for status, samples in sorted(latencies.items()):
+        print(f"  {status}: {statistics.median(samples) * 1000:.2f} ms median")
+    return len(hashed) == attempts - refused and refused == attempts - limit
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--checks", type=int, default=200000)
+    parser.add_argument("--keys", type=int, default=10000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--attempts", type=int, default=50)
+    args = parser.parse_args()
+
+    ok = check_login(args.attempts)
+    print()
+
+    time_backend(args.checks, args.keys)
+    time_check(create_app(TestConfig), args.checks)
+    print()
+    time_threads(args.checks, args.threads)
+
+    if not ok:
+        print("\nFAIL: refused attempts reached the password hasher")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+""" Replica routing check and cost, two SQLite files standing in for the primary and a replica
+
+Usage:
+    python -m benchmarks.bench_replica_routing --reads 5000
+
+The replica is a copy of the seeded primary with one difference, the user's email,
+so every read shows which database answered. Checks that a reading request is
+served by the replica, that CRUDMixin.save pins the rest of the request to the
+primary, that use_primary() reads the primary and that the next request is back on
+the replica. Exits non-zero if any check fails. Then times User.get_by_id reads
+with routing on and off.
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import timeit
+
+from sqlalchemy import select
+
+from silver_app.app import create_app
+from silver_app.database import use_primary
+from silver_app.extensions import db
+from silver_app.settings import TestConfig
+from silver_app.user.models import User
+
+
+PRIMARY_EMAIL = "bench@primary.example.com"
+REPLICA_EMAIL = "bench@replica.example.com"
+
+
+def make_databases():
+
+    directory = tempfile.mkdtemp(prefix="silver_replica_")
+    primary = os.path.join(directory, "primary.db")
+    replica = os.path.join(directory, "replica.db")
+
+    class SeedConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{primary}"
+
+    app = create_app(SeedConfig)
+    with app.app_context():
+        db.create_all()
+        User("bench", PRIMARY_EMAIL, password="bench-pass").save()
+        db.engine.dispose()
+
+    shutil.copyfile(primary, replica)
+    with sqlite3.connect(replica) as connection:
+        connection.execute("UPDATE users SET email = ?", (REPLICA_EMAIL,))
+    return primary, replica
+
+
+def routed_app(primary, replica, reads):
+
+    class BenchConfig(TestConfig):
+        DEBUG = False
+        CACHE_TYPE = "null"
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{primary}"
+        SQLALCHEMY_REPLICA_URIS = [f"sqlite:///{replica}"]
+        SQLALCHEMY_REPLICA_READS = reads
+
+    return create_app(BenchConfig)
+
+
+def email():
+
+    return db.session.scalar(select(User.email).where(User.username == "bench"))
+
+
+def check(app):
+
+    results = []
+    with app.test_request_context("/"):
+        results.append(("read only request reads the replica", email() == REPLICA_EMAIL))
+        with use_primary():
+            results.append(("use_primary() reads the primary", email() == PRIMARY_EMAIL))
+        results.append(("reads after use_primary() go back to the replica", email() == REPLICA_EMAIL))
+
+        user = User.get_by_id(1)
+        user.update()  # Bumps users.version, an UPDATE on the primary
+        results.append(("save pins the request to the primary", email() == PRIMARY_EMAIL))
+        results.append(("get_by_id after save reads the primary", db.session.get(User, 1, populate_existing=True).email == PRIMARY_EMAIL))
+
+    with app.test_request_context("/"):
+        results.append(("the next request reads the replica again", email() == REPLICA_EMAIL))
+    return results
+
+
+def time_reads(app, reads):
+
+    def request():
+        with app.app_context():
+            for _ in range(10):
+                User.get_by_id(1)
+                db.session.expunge_all()
+
+    return timeit.timeit(request, number=reads // 10) / reads * 1e6
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reads", type=int, default=5000)
+    args = parser.parse_args()
+
+    primary, replica = make_databases()
+    routed = routed_app(primary, replica, reads=True)
+
+    failed = False
+    for label, ok in check(routed):
+        print(f"{'ok  ' if ok else 'FAIL'} {label}")
+        failed = failed or not ok
+
+    direct = routed_app(primary, replica, reads=False)
+    print(f"\nget_by_id, primary only: {time_reads(direct, args.reads):.1f} us/read")
+    print(f"get_by_id, routed:       {time_reads(routed, args.reads):.1f} us/read")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+""" Request ID generation cost per mode, plus a multi-process collision and ordering check
+
+Usage:
+    python -m benchmarks.bench_request_ids --processes 4 --rate 100000 --seconds 2
+
+Each of --processes forked workers generates --rate IDs per second for --seconds. Exits
+non-zero when the "ulid" or "uuid7" IDs collide across workers or are out of order
+within one. "legacy" is checked too, but only reported.
+"""
+
+import argparse
+import multiprocessing
+import sys
+import time
+import timeit
+
+from silver_app.utils.request_helper import REQUEST_ID_MODES, generate_request_id
+
+
+def worker(mode, rate, seconds, queue):
+
+    ids = []
+    started = time.perf_counter()
+    for second in range(seconds):
+        ids.extend(generate_request_id(mode) for _ in range(rate))
+        # Hold the pace to the requested rate rather than generating as fast as possible
+        delay = started + second + 1 - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    queue.put(ids)
+
+
+def collision_check(mode, processes, rate, seconds):
+
+    # Initialize the parent's generator first, so forked children must not continue its sequence
+    generate_request_id(mode)
+
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    workers = [context.Process(target=worker, args=(mode, rate, seconds, queue)) for _ in range(processes)]
+    for process in workers:
+        process.start()
+    batches = [queue.get() for _ in workers]
+    for process in workers:
+        process.join()
+
+    total = sum(len(batch) for batch in batches)
+    duplicates = total - len(set().union(*batches))
+    unordered = sum(any(a >= b for a, b in zip(batch, batch[1:])) for batch in batches)
+    return total, duplicates, unordered
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--rate", type=int, default=100000, help="IDs per second per process")
+    parser.add_argument("--seconds", type=int, default=2)
+    parser.add_argument("--number", type=int, default=200000, help="iterations for the timing")
+    args = parser.parse_args()
+
+    print(f"{'mode':<7} {'us/id':>7} {'ids':>9} {'duplicates':>11} {'unordered workers':>18}")
+    failed = False
+    for mode in REQUEST_ID_MODES:
+        seconds = timeit.timeit(lambda: generate_request_id(mode), number=args.number)
+        total, duplicates, unordered = collision_check(mode, args.processes, args.rate, args.seconds)
+        print(f"{mode:<7} {seconds / args.number * 1e6:>7.2f} {total:>9} {duplicates:>11} {unordered:>18}")
+        if mode != "legacy" and (duplicates or unordered):
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+""" marshmallow Schema.dump against the compiled dump functions for one user and a page of users
+
+Usage:
+    python -m benchmarks.bench_serializers --users 10000 --number 2000
+"""
+
+import argparse
+import datetime as dt
+import timeit
+
+from silver_app.app import create_app
+from silver_app.settings import TestConfig
+from silver_app.user.models import User
+from silver_app.user.serializers import user_schema, user_schema_dump, user_schemas, user_schemas_dump
+
+
+class BenchConfig(TestConfig):
+    DEBUG = False
+
+
+def build_users(count):
+
+    now = dt.datetime.now(dt.timezone.utc)
+    return [
+        User(id=i, username=f"user{i}", email=f"user{i}@example.com", created_at=now, updated_at=now)
+        for i in range(count)
+    ]
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10000, help="users in the many=True dump")
+    parser.add_argument("--number", type=int, default=2000, help="iterations for the single user dump")
+    args = parser.parse_args()
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        users = build_users(args.users)
+
+        assert user_schema_dump(users[0]) == user_schema.dump(users[0])
+        assert user_schemas_dump(users) == user_schemas.dump(users)
+
+        cases = (
+            ("1 user", lambda: user_schema.dump(users[0]), lambda: user_schema_dump(users[0]), args.number),
+            (f"{args.users} users", lambda: user_schemas.dump(users), lambda: user_schemas_dump(users), 5),
+        )
+
+        print(f"{'payload':<14} {'schema.dump ms':>15} {'compiled ms':>12} {'speedup':>8}")
+        for label, schema_dump, compiled_dump, number in cases:
+            schema_seconds = min(timeit.repeat(schema_dump, number=number, repeat=3)) / number
+            compiled_seconds = min(timeit.repeat(compiled_dump, number=number, repeat=3)) / number
+            print(
+                f"{label:<14} {schema_seconds * 1e3:>15.3f} {compiled_seconds * 1e3:>12.3f} "
+                f"{schema_seconds / compiled_seconds:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+""" Cold start, eager vs LAZY_LOADING: imports, create_app and the first request
+
+Usage:
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --path /api/tasks --config silver_app.settings.TestConfig
+
+Starts a fresh interpreter --runs times per mode (silver_app.utils.startup, the
+same probe as flask startup-profile) and prints the median of each phase. Under
+LAZY_LOADING the first request also pays for importing the views it routes to.
+"""
+
+import argparse
+import statistics
+
+from silver_app.utils.startup import profile_startup
+
+
+PHASES = ("import_ms", "create_app_ms", "first_request_ms", "total_ms")
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--config", default="silver_app.settings.TestConfig")
+    parser.add_argument("--path", default="/api/user")
+    parser.add_argument("--method", default="GET")
+    args = parser.parse_args()
+
+    print(f"{'mode':<6} " + " ".join(f"{phase:>16}" for phase in PHASES) + "  modules")
+    for mode, lazy in (("eager", False), ("lazy", True)):
+        runs = [profile_startup(args.config, args.path, args.method, lazy) for _ in range(args.runs)]
+        medians = [statistics.median(run[phase] for run in runs) for phase in PHASES]
+        print(f"{mode:<6} " + " ".join(f"{value:>16.1f}" for value in medians) + f"  {len(runs[0]['modules'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+""" Peak RSS while streaming GET /api/tasks/export, checks memory stays flat as the row count grows
+
+Usage:
+    python -m benchmarks.bench_task_export --rows 1000000 --max-growth-mb 64
+
+Exits non-zero when streaming grows peak RSS by more than --max-growth-mb.
+"""
+
+import argparse
+import datetime as dt
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from silver_app.app import create_app
+from silver_app.extensions import db
+from silver_app.settings import TestConfig
+from silver_app.task.models import Task
+from silver_app.user.models import User
+
+
+def peak_rss_mb():
+
+    """ ru_maxrss is KiB on Linux """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def seed(rows):
+
+    user = User("bench", "bench@example.com", password="bench-pass").save()
+    due = dt.date(2026, 1, 1)
+    Task.bulk_create(
+        ({"title": f"task {i}", "user_id": user.id, "description": "x" * 100, "due_date": due} for i in range(rows)),
+        chunk_size=10000,
+    )
+    db.session.expunge_all()
+
+
+def export(client, fmt):
+
+    response = client.get("/api/tasks/export", query_string={"format": fmt}, buffered=False)
+    size = 0
+    for chunk in response.response:
+        size += len(chunk)
+    response.close()
+    return size
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--max-growth-mb", type=float, default=64)
+    parser.add_argument("--uri", help="database URI, defaults to a temporary SQLite file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+
+        class BenchConfig(TestConfig):
+            SQLALCHEMY_DATABASE_URI = args.uri or "sqlite:///" + os.path.join(tmp, "bench.db")
+
+        app = create_app(BenchConfig)
+        with app.app_context():
+            db.create_all()
+            seed(args.rows)
+
+            client = app.test_client()
+            client.post("/api/user/login", json={"user": {"username": "bench", "password": "bench-pass"}})
+
+            failed = False
+            print(f"{'format':<8} {'rows':>9} {'MB sent':>9} {'seconds':>8} {'peak RSS MB':>12} {'growth MB':>10}")
+            for fmt in ("json", "ndjson"):
+                baseline = peak_rss_mb()
+                start = time.perf_counter()
+                size = export(client, fmt)
+                elapsed = time.perf_counter() - start
+                growth = peak_rss_mb() - baseline
+                failed |= growth > args.max_growth_mb
+                print(f"{fmt:<8} {args.rows:>9} {size / 2 ** 20:>9.1f} {elapsed:>8.1f} {peak_rss_mb():>12.1f} {growth:>10.1f}")
+
+            db.drop_all()
+
+    if failed:
+        print(f"FAIL: peak RSS grew by more than {args.max_growth_mb} MB while streaming")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
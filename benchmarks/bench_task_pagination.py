@@ -0,0 +1,96 @@
+""" GET /api/tasks latency on page 1 vs a deep page, keyset cursor vs OFFSET, over a large task table
+
+Usage:
+    python -m benchmarks.bench_task_pagination --rows 1000000 --page 10000 --limit 20
+"""
+
+import argparse
+import datetime as dt
+import os
+import statistics
+import tempfile
+import time
+
+from silver_app.app import create_app
+from silver_app.extensions import db
+from silver_app.settings import TestConfig
+from silver_app.task.models import Task
+from silver_app.task.views import encode_cursor
+from silver_app.user.models import User
+
+
+def seed(rows):
+
+    user = User("bench", "bench@example.com", password="bench-pass").save()
+    start = dt.datetime(2020, 1, 1)
+
+    def generate():
+        for i in range(rows):
+            yield {
+                "title": f"task {i}",
+                "user_id": user.id,
+                "created_at": start + dt.timedelta(seconds=i),
+                "updated_at": start + dt.timedelta(seconds=i),
+                "due_date": (start + dt.timedelta(days=i % 365)).date(),
+            }
+
+    Task.bulk_create(generate(), chunk_size=10000)
+    return user
+
+
+def sample(func, repeat):
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--page", type=int, default=10000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--uri", help="database URI, defaults to a temporary SQLite file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+
+        class BenchConfig(TestConfig):
+            SQLALCHEMY_DATABASE_URI = args.uri or "sqlite:///" + os.path.join(tmp, "bench.db")
+
+        app = create_app(BenchConfig)
+        with app.app_context():
+            db.create_all()
+            start = time.perf_counter()
+            user = seed(args.rows)
+            print(f"seeded {args.rows} tasks in {time.perf_counter() - start:.1f}s")
+
+            offset = (args.page - 1) * args.limit
+            boundary = Task.query.filter_by(user_id=user.id).order_by(Task.created_at, Task.id).offset(offset - 1).first()
+            cursor = encode_cursor("created_at", boundary.created_at, boundary.id)
+
+            client = app.test_client()
+            client.post("/api/user/login", json={"user": {"username": "bench", "password": "bench-pass"}})
+
+            def page(**query):
+                response = client.get("/api/tasks", query_string=dict(limit=args.limit, **query))
+                assert response.status_code == 200, response.get_data(as_text=True)
+
+            def offset_page():
+                Task.query.filter_by(user_id=user.id).order_by(Task.created_at, Task.id).offset(offset).limit(args.limit).all()
+
+            print(f"{'request':<32} {'median_ms':>10}")
+            print(f"{'page 1':<32} {sample(page, args.repeat):>10.2f}")
+            print(f"{f'page {args.page} keyset cursor':<32} {sample(lambda: page(cursor=cursor), args.repeat):>10.2f}")
+            print(f"{f'page {args.page} OFFSET (query only)':<32} {sample(offset_page, args.repeat):>10.2f}")
+
+            db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+""" Load test harness: seeded app, route scenarios, WSGI and real HTTP drivers, JSON results and comparison """
+
+import datetime as dt
+import http.client
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+
+from werkzeug.serving import make_server
+
+from silver_app.app import create_app
+from silver_app.extensions import db, password_hasher
+from silver_app.settings import TestConfig
+from silver_app.task.models import Task
+from silver_app.user.models import User
+
+
+PASSWORD = "bench-pass"
+
+
+class BenchConfig(TestConfig):
+
+    DEBUG = False
+    TESTING = False
+    LOG_LEVEL = "WARNING"
+    INSTRUMENTATION_ENABLED = False
+    RATELIMIT_ENABLED = False  # Every worker logs in as one user from one address
+
+
+class Route:
+    """ One scenario: body(worker, index) builds the JSON body, auth routes send the worker's login cookie """
+
+    def __init__(self, name, method, path, body=None, auth=True, expected=200):
+
+        self.name = name
+        self.method = method
+        self.path = path
+        self.body = body
+        self.auth = auth
+        self.expected = expected
+
+
+def _register_body(worker, index):
+
+    username = f"new_{os.getpid()}_{worker}_{index}"
+    return {"user": {"username": username, "email": f"{username}@example.com", "password": PASSWORD}}
+
+
+ROUTES = {
+    route.name: route for route in (
+        Route("register", "POST", "/api/user/register", body=_register_body, auth=False, expected=201),
+        Route("login", "POST", "/api/user/login", auth=False,
+              body=lambda worker, index: {"user": {"username": f"bench_{worker}", "password": PASSWORD}}),
+        Route("user", "GET", "/api/user"),
+        Route("tasks", "GET", "/api/tasks?limit=20"),
+        Route("tasks_filtered", "GET", "/api/tasks?status=pending&sort=due_date&limit=50"),
+        Route("export", "GET", "/api/tasks/export"),
+    )
+}
+
+
+def create_seeded_app(users, tasks_per_user, uri=None, config=BenchConfig):
+    """
+    App on uri (default: a temporary SQLite file, usable from other processes) with
+    users bench_0 .. bench_<users - 1>, all with PASSWORD, and tasks_per_user tasks each.
+    """
+    if uri is None:
+        uri = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="silver_bench_"), "bench.db")
+
+    class SeededConfig(config):
+        SQLALCHEMY_DATABASE_URI = uri
+
+    app = create_app(SeededConfig)
+    with app.app_context():
+        db.create_all()
+        """ One hash for every seeded user, bulk_create skips User.__init__ """
+        password = password_hasher.generate_password_hash(PASSWORD)
+        ids = User.bulk_create(
+            ({"username": f"bench_{i}", "email": f"bench_{i}@example.com", "password": password} for i in range(users)),
+            return_ids=True,
+        )
+        start = dt.date(2024, 1, 1)
+        Task.bulk_create(
+            {
+                "title": f"task {n}",
+                "user_id": user_id,
+                "description": "seeded by benchmarks.harness",
+                "status": ("pending", "in_progress", "completed")[n % 3],
+                "due_date": start + dt.timedelta(days=n % 365),
+            }
+            for user_id in ids for n in range(tasks_per_user)
+        )
+        """ Forked servers must open their own connections """
+        db.engine.dispose()
+    return app
+
+
+def percentile(samples, pct):
+
+    samples = sorted(samples)
+    index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+    return samples[index]
+
+
+def summarize(latencies, errors, elapsed):
+    """ latencies in seconds, elapsed is the wall time all of them took together """
+
+    if not latencies:
+        return {"requests": 0, "errors": errors}
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "mean_ms": round(statistics.mean(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def run_wsgi(app, routes, requests, warmup=0):
+    """ Sequential requests through the test client, no network or server in the way """
+
+    results = {}
+    client = app.test_client()
+    client.post("/api/user/login", json=ROUTES["login"].body(0, 0))
+    for route in routes:
+        latencies, errors = [], 0
+        for index in range(requests, requests + warmup):
+            client.open(route.path, method=route.method, json=route.body(0, index) if route.body else None).close()
+        started = time.perf_counter()
+        for index in range(requests):
+            sent = time.perf_counter()
+            response = client.open(route.path, method=route.method, json=route.body(0, index) if route.body else None)
+            response.get_data()
+            """ Streamed bodies keep their app context, and database connection, until closed """
+            response.close()
+            latencies.append(time.perf_counter() - sent)
+            errors += response.status_code != route.expected
+        results[route.name] = summarize(latencies, errors, time.perf_counter() - started)
+    return results
+
+
+def _serve(server):
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server.serve_forever()
+
+
+class _Connection:
+    """ Keep-alive connection of one HTTP worker, carrying its login cookie """
+
+    def __init__(self, port):
+
+        self.connection = http.client.HTTPConnection("127.0.0.1", port)
+        self.cookie = None
+
+    def request(self, method, path, body=None, auth=True):
+
+        headers = {}
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+            body = json.dumps(body)
+        if auth and self.cookie:
+            headers["Cookie"] = self.cookie
+        self.connection.request(method, path, body=body, headers=headers)
+        response = self.connection.getresponse()
+        response.read()
+        return response
+
+    def login(self, worker):
+
+        response = self.request("POST", "/api/user/login", ROUTES["login"].body(worker, 0), auth=False)
+        self.cookie = "; ".join(header.split(";", 1)[0] for header in response.headers.get_all("Set-Cookie") or [])
+
+
+def _http_worker(worker, port, routes, requests, warmup, barrier, results):
+
+    connection = _Connection(port)
+    connection.login(worker)
+    measured = {}
+    for route in routes:
+        latencies, errors = [], 0
+        for index in range(requests, requests + warmup):
+            connection.request(route.method, route.path, route.body(worker, index) if route.body else None, route.auth)
+        barrier.wait()
+        started = time.monotonic()
+        for index in range(requests):
+            sent = time.perf_counter()
+            response = connection.request(
+                route.method, route.path, route.body(worker, index) if route.body else None, route.auth,
+            )
+            latencies.append(time.perf_counter() - sent)
+            errors += response.status != route.expected
+        measured[route.name] = (latencies, errors, started, time.monotonic())
+    results.put(measured)
+
+
+def run_http(app, routes, requests, concurrency, warmup=0):
+    """
+    The app behind werkzeug's threaded server in a forked process, driven by
+    concurrency client processes over keep-alive connections. Every worker sends
+    warmup unmeasured and then requests measured requests per route. The workers
+    start measuring a route together, its req/s is the total over the time from the
+    first start to the last finish.
+    """
+    context = multiprocessing.get_context("fork")
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    server_process = context.Process(target=_serve, args=(server,), daemon=True)
+    server_process.start()
+    server.socket.close()
+
+    barrier = context.Barrier(concurrency)
+    queue = context.Queue()
+    workers = [
+        context.Process(target=_http_worker, args=(worker, server.port, routes, requests, warmup, barrier, queue))
+        for worker in range(concurrency)
+    ]
+    try:
+        for process in workers:
+            process.start()
+        measured = [queue.get() for _ in workers]
+        for process in workers:
+            process.join()
+    finally:
+        server_process.terminate()
+        server_process.join()
+
+    results = {}
+    for route in routes:
+        runs = [worker[route.name] for worker in measured]
+        latencies = list(itertools.chain.from_iterable(run[0] for run in runs))
+        elapsed = max(run[3] for run in runs) - min(run[2] for run in runs)
+        results[route.name] = summarize(latencies, sum(run[1] for run in runs), elapsed)
+    return results
+
+
+def git_commit():
+
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment(**parameters):
+
+    return {
+        "timestamp": dt.datetime.now(dt.timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "parameters": parameters,
+    }
+
+
+def save(path, meta, results):
+
+    with open(path, "w") as file:
+        json.dump({"meta": meta, "results": results}, file, indent=2, sort_keys=True)
+
+
+def load(path):
+
+    with open(path) as file:
+        return json.load(file)
+
+
+def compare(baseline, current, threshold):
+    """
+    (mode, route, metric, baseline value, current value, change %) for every route in
+    both runs, and the subset where req/s fell or p95 rose by more than threshold percent.
+    """
+    rows, regressions = [], []
+    for mode, routes in current.items():
+        for name, stats in routes.items():
+            base = baseline.get(mode, {}).get(name)
+            if not base:
+                continue
+            for metric, worse in (("rps", -1), ("p95_ms", 1)):
+                if not base.get(metric) or stats.get(metric) is None:
+                    continue
+                change = (stats[metric] - base[metric]) / base[metric] * 100
+                row = (mode, name, metric, base[metric], stats[metric], round(change, 1))
+                rows.append(row)
+                if change * worse > threshold:
+                    regressions.append(row)
+    return rows, regressions
+
+
+def print_results(results):
+
+    print(f"{'mode':<5} {'route':<15} {'requests':>8} {'errors':>6} {'req/s':>9} {'p50_ms':>8} {'p95_ms':>8} {'p99_ms':>8}")
+    for mode, routes in results.items():
+        for name, stats in routes.items():
+            print(
+                f"{mode:<5} {name:<15} {stats['requests']:>8} {stats['errors']:>6} {stats.get('rps') or 0:>9.1f} "
+                f"{stats.get('p50_ms', 0):>8.2f} {stats.get('p95_ms', 0):>8.2f} {stats.get('p99_ms', 0):>8.2f}"
+            )
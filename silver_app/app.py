@@ -2,15 +2,20 @@
 
 
 from flask import Flask
-from flask import g
+from flask import g, request
 from silver_app import default
+from silver_app import task
 from silver_app import user
-from silver_app.extensions import db, migrate, jwt
+from silver_app.commands import jobs, startup_profile
+from silver_app.extensions import db, jwt, password_hasher, login_cache, user_versions, row_cache, response_compressor, instrumentation, metrics, structured_logging, replica_router, async_db, rate_limiter, job_queue
 from silver_app.settings import DevConfig
-from silver_app.utils.request_helper import generate_request_id
+from silver_app.utils.json_provider import FastJSONProvider
+from silver_app.utils.lazy_loading import register_lazy_blueprint, running_flask_cli
+from silver_app.utils.request_helper import generate_request_id, incoming_request_id
 from werkzeug.exceptions import HTTPException
-from silver_app.utils.errors import SilverAppException
-from silver_app.utils.responses import handle_generic_exception, handle_http_exception, handle_silver_app_exception
+from werkzeug.middleware.proxy_fix import ProxyFix
+from silver_app.utils.errors import SilverAppException, UnauthorizedException
+from silver_app.utils.responses import error_response, handle_generic_exception, handle_http_exception, handle_silver_app_exception
 
 def create_app(config_object = DevConfig):
 
@@ -19,36 +24,100 @@ def create_app(config_object = DevConfig):
     """ Flask ignores trailing flashes """
     app.url_map.strict_slashes = False 
     app.config.from_object(config_object)
+    app.json = FastJSONProvider(app)
+    register_proxy_fix(app)
+    """ Before anything logs, so app.logger never gets Flask's default stderr handler """
+    structured_logging.init_app(app)
     register_request_handlers(app)
-    """ Should know the error line, easier to debug """
-#    register_error_handlers(app)
     register_extensions(app)
+    register_error_handlers(app)
     register_blueprints(app)
+    register_commands(app)
 
 
     return app
 
 
 
+def lazy_loading(app):
+    """ The flask command always loads everything, db migrate has to see every model """
+
+    return app.config.get("LAZY_LOADING", False) and not running_flask_cli()
+
+
 def register_extensions(app):
 
+    """ Adds the replica binds, so before db.init_app creates the engines """
+    replica_router.init_app(app)
     db.init_app(app)
-    migrate.init_app(app, db)
+    """ Every model in both modes, db.create_all() and migrate have to see every table before any view is imported """
+    from silver_app.jobs import models as job_models  # noqa: F401
+    from silver_app.task import models as task_models  # noqa: F401
+    from silver_app.user import models as user_models  # noqa: F401
+    async_db.init_app(app)
+    if not lazy_loading(app):
+        from silver_app.extensions import migrate
+        migrate.init_app(app, db)
     jwt.init_app(app)
+    password_hasher.init_app(app)
+    login_cache.init_app(app)
+    rate_limiter.init_app(app)
+    job_queue.init_app(app)
+    row_cache.init_app(app)
+    user_versions.configure(ttl=app.config.get("JWT_PROFILE_VERSION_TTL", 5))
+    response_compressor.init_app(app)
+    metrics.init_app(app)
 
 
 def register_blueprints(app):
 
-    from silver_app import task
-    app.register_blueprint(user.views.blueprint)
+    if lazy_loading(app):
+        """ flask_apispec, marshmallow, the serializers and models load with the first request to each blueprint """
+        register_lazy_blueprint(app, "user", user)
+        register_lazy_blueprint(app, "task", task)
+    else:
+        from silver_app.task import views as task_views
+        from silver_app.user import views as user_views
+        app.register_blueprint(user_views.blueprint)
+        app.register_blueprint(task_views.blueprint)
     app.register_blueprint(default.views.blueprint)
 
 
+def register_proxy_fix(app):
+    """ remote_addr, scheme and host from the trusted proxies' X-Forwarded-* headers, the "ip" rate limits key on remote_addr """
+
+    trusted = {name: app.config.get(f"PROXY_FIX_{name.upper()}", 0) for name in ("x_for", "x_proto", "x_host")}
+    if any(trusted.values()):
+        app.wsgi_app = ProxyFix(app.wsgi_app, **trusted)
+
+
+def register_commands(app):
+
+    app.cli.add_command(startup_profile)
+    app.cli.add_command(jobs)
+
+
 def register_request_handlers(app):
 
+    """ First, so the profile's wall time covers the other handlers too """
+    instrumentation.init_app(app)
+
+    mode = app.config.get("REQUEST_ID_MODE", "ulid")
+    header = app.config.get("REQUEST_ID_HEADER", "X-Request-ID")
+    trust_header = app.config.get("REQUEST_ID_TRUST_HEADER", True)
+
     @app.before_request
     def set_request_id():
-        g.request_id = generate_request_id()
+        """ Keep the ID a proxy or client already assigned so logs line up end to end """
+        request_id = incoming_request_id(request.headers.get(header)) if trust_header else None
+        g.request_id = request_id or generate_request_id(mode)
+
+    @app.after_request
+    def echo_request_id(response):
+        request_id = getattr(g, "request_id", None)
+        if request_id:
+            response.headers[header] = request_id
+        return response
 
 
 """Register error handlers for standardized error responses."""
@@ -64,3 +133,13 @@ def register_error_handlers(app):
     
     # Handle any other unhandled exceptions (catch-all)
     app.errorhandler(Exception)(handle_generic_exception)
+
+    # Missing, malformed or expired JWTs get the same envelope as every other 401
+    @jwt.unauthorized_loader
+    @jwt.invalid_token_loader
+    def jwt_unauthorized(reason):
+        return error_response(UnauthorizedException("Authentication required", reason))
+
+    @jwt.expired_token_loader
+    def jwt_expired(jwt_header, jwt_payload):
+        return error_response(UnauthorizedException("Token has expired"))
@@ -0,0 +1,185 @@
+""" ASGI entry point: coroutine views run on the event loop, every other request in WsgiToAsgi's threads """
+
+import inspect
+import io
+import sys
+
+from asgiref.wsgi import WsgiToAsgi
+from flask.signals import request_started
+from werkzeug.exceptions import HTTPException
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from silver_app.app import create_app
+from silver_app.extensions import async_db
+from silver_app.settings import DevConfig
+from silver_app.user.async_views import ASYNC_VIEWS
+
+
+def build_environ(scope, body):
+    """ PEP 3333 environ for an ASGI http scope and its complete request body """
+
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf8").decode("latin1"),
+        "PATH_INFO": scope["path"].encode("utf8").decode("latin1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "REMOTE_PORT": str(client[1]),
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers", ()):
+        name, value = name.decode("latin1"), value.decode("latin1")
+        if name == "content-length":
+            continue
+        if name == "content-type":
+            environ["CONTENT_TYPE"] = value
+            continue
+        key = "HTTP_" + name.upper().replace("-", "_")
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+class AsyncDispatcher:
+    """
+    ASGI app in front of the Flask app, so coroutine views do not hold a thread while they wait.
+
+    A request routed to a coroutine function view is dispatched in its own task on the
+    event loop, the way Flask.wsgi_app does it: contexts pushed (Flask keeps them in
+    contextvars, so tasks do not see each other's), before / after request hooks, error
+    handlers and teardown all run. Those views may only block on awaits, async_db and
+    password_hasher's *_async methods. Every other request goes through asgiref's
+    WsgiToAsgi, on its thread pool (ASGI_THREADS threads).
+    """
+
+    def __init__(self, app):
+
+        self.app = app
+        self.wsgi = WsgiToAsgi(app)
+
+    async def __call__(self, scope, receive, send):
+
+        if scope["type"] == "lifespan":
+            return await self.lifespan(receive, send)
+        if scope["type"] == "http" and self.is_async(scope):
+            return await self.dispatch(scope, receive, send)
+        return await self.wsgi(scope, receive, send)
+
+    def is_async(self, scope):
+
+        if scope["method"] == "OPTIONS":
+            return False
+
+        adapter = self.app.url_map.bind("", script_name=scope.get("root_path") or None, url_scheme=scope.get("scheme", "http"))
+        try:
+            endpoint, _ = adapter.match(scope["path"], scope["method"])
+        except HTTPException:  # 404, 405 and redirects are the WSGI side's to answer
+            return False
+        return inspect.iscoroutinefunction(self.app.view_functions.get(endpoint))
+
+    async def dispatch(self, scope, receive, send):
+
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        app = self.app
+        environ = self.proxy_fix(build_environ(scope, bytes(body)))
+        ctx = app.request_context(environ)
+        error = None
+        try:
+            try:
+                ctx.push()
+                response = await self.full_dispatch_request(ctx)
+            except Exception as e:
+                error = e
+                response = app.handle_exception(e)
+            except:  # noqa: E722, same as Flask.wsgi_app
+                error = sys.exc_info()[1]
+                raise
+            await self.send_response(response, environ, send)
+        finally:
+            if error is not None and app.should_ignore_error(error):
+                error = None
+            ctx.pop(error)
+
+    def proxy_fix(self, environ):
+        """ The environ app.wsgi_app's ProxyFix would pass on, async views are dispatched without app.wsgi_app """
+
+        wsgi_app = self.app.wsgi_app
+        if not isinstance(wsgi_app, ProxyFix):
+            return environ
+        return ProxyFix(
+            lambda environ, start_response: environ,
+            wsgi_app.x_for, wsgi_app.x_proto, wsgi_app.x_host, wsgi_app.x_port, wsgi_app.x_prefix,
+        )(environ, None)
+
+    async def full_dispatch_request(self, ctx):
+        """ Flask.full_dispatch_request with the view awaited """
+
+        app = self.app
+        try:
+            request_started.send(app, _async_wrapper=app.ensure_sync)
+            rv = app.preprocess_request()
+            if rv is None:
+                req = ctx.request
+                if req.routing_exception is not None:
+                    app.raise_routing_exception(req)
+                rv = await app.view_functions[req.url_rule.endpoint](**req.view_args)
+        except Exception as e:
+            rv = app.handle_user_exception(e)
+        return app.finalize_request(rv)
+
+    @staticmethod
+    async def send_response(response, environ, send):
+
+        app_iter, status, headers = response.get_wsgi_response(environ)
+        try:
+            await send({
+                "type": "http.response.start",
+                "status": int(status.split(" ", 1)[0]),
+                "headers": [(name.lower().encode("latin1"), value.encode("latin1")) for name, value in headers],
+            })
+            for chunk in app_iter:
+                if chunk:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            if hasattr(app_iter, "close"):
+                app_iter.close()
+
+    @staticmethod
+    async def lifespan(receive, send):
+
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await async_db.dispose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+def create_asgi_app(config_object=DevConfig):
+    """ The WSGI app with ASYNC_VIEWS swapped in for their sync views, same URLs, endpoints and hooks """
+
+    app = create_app(config_object)
+    app.view_functions.update(ASYNC_VIEWS)
+    return AsyncDispatcher(app)
@@ -0,0 +1,88 @@
+""" flask CLI commands, registered by create_app """
+
+import time
+
+import click
+from flask import current_app
+from flask.cli import AppGroup, with_appcontext
+
+from silver_app.utils.job_queue import Worker
+from silver_app.utils.startup import package_totals, profile_startup
+
+
+jobs = AppGroup("jobs", help="Background job worker and scheduler.")
+
+
+@click.command("startup-profile")
+@click.option("--config", default="silver_app.settings.DevConfig", show_default=True, help="Config object create_app gets.")
+@click.option("--path", default="/api/user", show_default=True, help="First request, its views load with it under LAZY_LOADING.")
+@click.option("--method", default="GET", show_default=True)
+@click.option("--lazy/--eager", default=None, help="Override LAZY_LOADING.")
+@click.option("--runs", default=3, show_default=True, help="Cold starts, the fastest is reported.")
+@click.option("--top", default=20, show_default=True, help="Slowest modules listed.")
+@click.option("--budget", type=float, help="Milliseconds, default STARTUP_BUDGET_MS. Exits 1 above it.")
+@with_appcontext
+def startup_profile(config, path, method, lazy, runs, top, budget):
+    """ Per module import times and the time to a first response, in a fresh interpreter """
+
+    if budget is None:
+        budget = current_app.config["STARTUP_BUDGET_MS"]
+
+    profile = min((profile_startup(config, path, method, lazy) for _ in range(runs)), key=lambda run: run["total_ms"])
+
+    click.echo(f"{'module':<50} {'self_ms':>8} {'cumulative_ms':>14}")
+    for name, self_us, cumulative_us in sorted(profile["modules"], key=lambda module: module[2], reverse=True)[:top]:
+        click.echo(f"{name:<50} {self_us / 1000:>8.1f} {cumulative_us / 1000:>14.1f}")
+
+    click.echo(f"\n{'package':<50} {'self_ms':>8}")
+    for package, self_us in package_totals(profile["modules"])[:top]:
+        click.echo(f"{package:<50} {self_us / 1000:>8.1f}")
+
+    click.echo(
+        f"\nimports {profile['import_ms']:.1f} ms, create_app {profile['create_app_ms']:.1f} ms, "
+        f"first request {profile['first_request_ms']:.1f} ms ({method} {path}: {profile['status']}), "
+        f"total {profile['total_ms']:.1f} ms, budget {budget:.0f} ms"
+    )
+    if profile["total_ms"] > budget:
+        raise click.ClickException(f"Startup took {profile['total_ms']:.0f} ms, over the {budget:.0f} ms budget")
+
+
+@jobs.command("worker")
+@click.option("--batch-size", type=int, help="Jobs claimed per query, default JOBS_BATCH_SIZE.")
+@click.option("--poll-interval", type=float, help="Seconds between claims while idle, default JOBS_POLL_INTERVAL.")
+@click.option("--once", is_flag=True, help="Exit once no job is due.")
+@click.option("--max-jobs", type=int, help="Exit after running this many jobs.")
+def jobs_worker(batch_size, poll_interval, once, max_jobs):
+    """ Runs due jobs until SIGTERM, start as many as the database takes """
+
+    from silver_app.extensions import job_queue
+
+    config = current_app.config
+    worker = Worker(
+        job_queue,
+        batch_size=batch_size or config["JOBS_BATCH_SIZE"],
+        poll_interval=config["JOBS_POLL_INTERVAL"] if poll_interval is None else poll_interval,
+    )
+    click.echo(f"Worker {worker.worker_id} started")
+    worker.run(once=once, max_jobs=max_jobs)
+    click.echo(f"Worker {worker.worker_id} stopped, {worker.succeeded} jobs done, {worker.failed} failed")
+
+
+@jobs.command("schedule")
+@click.option("--interval", type=float, help="Seconds between passes, default JOBS_SCHEDULE_INTERVAL.")
+@click.option("--once", is_flag=True, help="Run one pass and exit, e.g. from cron.")
+def jobs_schedule(interval, once):
+    """ Queues task reminders and requeues or prunes jobs, every --interval seconds """
+
+    from silver_app.extensions import db
+    from silver_app.jobs.scheduler import run_schedule
+
+    interval = current_app.config["JOBS_SCHEDULE_INTERVAL"] if interval is None else interval
+    while True:
+        started = time.perf_counter()
+        counts = run_schedule()
+        db.session.remove()
+        click.echo(", ".join(f"{count} {name}" for name, count in counts.items()) + f" in {(time.perf_counter() - started) * 1000:.0f} ms")
+        if once:
+            break
+        time.sleep(max(0.0, interval - (time.perf_counter() - started)))
@@ -1,5 +1,10 @@
+import contextlib
 
-from silver_app.extensions import db
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+
+from silver_app.extensions import db, row_cache
 
 
 
@@ -9,11 +14,23 @@ Model = db.Model
 
 
 
+def _is_record_id(record_id):
+
+    return any(
+            (isinstance(record_id, str) and record_id.isdigit(),
+            isinstance(record_id, (int, float)),
+            
+            )
+    )
+
+
 class SurrogatePK():
     """ Mixin that add surrogate integer primary key column named id to any delcarative mapped class 
     
     declarative class means the decalaration declares both the table and class structure
-    
+
+    get_by_id and get_many_by_ids read through the row cache configured by CACHE_TYPE,
+    loading misses from the primary, save / update / delete drop the cached row.
     """
 
     __table_args__ = {"extend_existing": True}
@@ -23,15 +40,128 @@ class SurrogatePK():
     @classmethod
     def get_by_id(cls, record_id):
 
-        if any(
-                (isinstance(record_id, str) and record_id.isdigit(),
-                isinstance(record_id, (int, float)),
-                
-                )
+        if _is_record_id(record_id):
+            record_id = int(record_id)
+
+            instance = cls._from_identity_map(record_id)
+            if instance is not None:
+                return instance
+
+            state = row_cache.get(cls, record_id)
+            if state is not None:
+                return cls._from_row_state(state)
+
+            with cls._cache_fill():
+                instance = db.session.get(cls, record_id)
+            if instance is not None:
+                row_cache.set(cls, record_id, instance._row_state())
+            return instance
+
+    @classmethod
+    def get_many_by_ids(cls, record_ids):
+        """ Rows for record_ids in the given order, missing ids are skipped. Cache misses are loaded with one IN query """
+
+        record_ids = [int(record_id) for record_id in record_ids if _is_record_id(record_id)]
+        found = {}
+
+        for record_id in record_ids:
+            instance = cls._from_identity_map(record_id)
+            if instance is not None:
+                found[record_id] = instance
+
+        cached = row_cache.get_many(cls, [record_id for record_id in record_ids if record_id not in found])
+        for record_id, state in cached.items():
+            found[record_id] = cls._from_row_state(state)
+
+        misses = [record_id for record_id in dict.fromkeys(record_ids) if record_id not in found]
+        if misses:
+            with cls._cache_fill():
+                instances = cls.query.filter(cls.id.in_(misses)).all()
+            for instance in instances:
+                found[instance.id] = instance
+                row_cache.set(cls, instance.id, instance._row_state())
+
+        return [found[record_id] for record_id in record_ids if record_id in found]
+
+    def invalidate_cache(self):
+
+        super().invalidate_cache()
+        if self.id is not None:
+            row_cache.invalidate(db.session, type(self), self.id)
 
+    @classmethod
+    def invalidate_cached_ids(cls, ids):
+
+        super().invalidate_cached_ids(ids)
+        for record_id in ids:
+            row_cache.invalidate(db.session, cls, record_id)
+
+    def _row_state(self):
+
+        return {attr.key: getattr(self, attr.key) for attr in self.__mapper__.column_attrs}
+
+    @staticmethod
+    def _cache_fill():
+        """ Rows headed for the row cache are read on the primary, a lagging replica would cache a row just invalidated """
+
+        return use_primary() if row_cache.enabled else contextlib.nullcontext()
+
+    @classmethod
+    def _from_identity_map(cls, record_id):
+
+        return db.session.identity_map.get(identity_key(cls, record_id))
 
-        ):
-            return cls.query.get(int(record_id))
+    @classmethod
+    def _from_row_state(cls, state):
+        """ Attach a cached row to the session as if it had just been loaded, without a query """
+
+        instance = cls.__mapper__.class_manager.new_instance()
+        for key, value in state.items():
+            set_committed_value(instance, key, value)
+        make_transient_to_detached(instance)
+        return db.session.merge(instance, load=False)
+
+@contextlib.contextmanager
+def unit_of_work():
+    """ Batch the commits of every CRUDMixin save / update / delete in the block into one.
+
+    Inside the block those calls flush instead of committing, so ids and constraint
+    errors still show up immediately. The outermost block commits on exit and rolls
+    back on any exception, nested blocks join it.
+
+    Usage: ::
+
+        with unit_of_work():
+            user.update(email=email)
+            Task.create(title=title, user_id=user.id)
+    """
+    session = db.session
+    depth = session.info.get("unit_of_work", 0)
+    session.info["unit_of_work"] = depth + 1
+    try:
+        yield session
+        if not depth:
+            session.commit()
+    except BaseException:
+        if not depth:
+            session.rollback()
+        raise
+    finally:
+        session.info["unit_of_work"] = depth
+
+@contextlib.contextmanager
+def use_primary():
+    """ Send the reads in the block to the primary, for the few that must not see replica lag
+
+    Writes already pin the rest of the request to the primary, see utils.replicas.RoutingSession.
+    """
+    session = db.session
+    depth = session.info.get("use_primary", 0)
+    session.info["use_primary"] = depth + 1
+    try:
+        yield session
+    finally:
+        session.info["use_primary"] = depth
 
 def reference_col(tablename, nullable=False, pk_name='id', **kwargs):
     """Column that adds primary key foreign key reference.
@@ -1,9 +1,20 @@
+import itertools
+
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_sqlalchemy.model import Model
-from flask_migrate import Migrate
-from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager
+from sqlalchemy import delete, insert, update
+from silver_app.utils.async_db import AsyncDatabase
+from silver_app.utils.cache import LoginCache, RowCache, TTLCache
+from silver_app.utils.compression import ResponseCompressor
+from silver_app.utils.instrumentation import Instrumentation
+from silver_app.utils.job_queue import JobQueue
+from silver_app.utils.metrics import MetricsRegistry
+from silver_app.utils.rate_limit import RateLimiter
+from silver_app.utils.replicas import ReplicaRouter, RoutingSession
+from silver_app.utils.hashing import PasswordHasher
+from silver_app.utils.structured_logging import StructuredLogging
 
 
 
@@ -21,26 +32,142 @@ class CRUDMixin(Model):
     def update(self, commit = True, **kwargs):
         for attr, value in kwargs.items():
             setattr(self, attr, value)
+        if "version" in self.__table__.columns:
+            self.version = (self.version or 0) + 1
         return commit and self.save() or self
     
 
     def save(self, commit= True):
 
         db.session.add(self)
+        self.invalidate_cache()
         if commit :
-            db.session.commit()
+            self._commit()
         return self
     
 
     def delete(self, commit = True):
         db.session.delete(self)
-        return commit and db.session.commit()
+        self.invalidate_cache()
+        return commit and self._commit()
+
+
+    def invalidate_cache(self):
+        """ Hook for models that cache their rows, called before every save / delete """
+
+
+    @staticmethod
+    def _commit():
+        """ Commit, or only flush inside database.unit_of_work() which commits once when it exits """
+        if db.session.info.get("unit_of_work"):
+            db.session.flush()
+        else:
+            db.session.commit()
+
+
+    @classmethod
+    def invalidate_cached_ids(cls, ids):
+        """ Hook for models that cache their rows, called by the bulk_* methods """
+
+
+    @classmethod
+    def bulk_create(cls, rows, chunk_size = 1000, return_ids = False, commit = True):
+        """
+        Insert rows (dicts of column values) with one executemany per chunk, all in one transaction.
+
+        Skips __init__, so model side effects such as password hashing do not run.
+        Column defaults still apply. With return_ids the generated primary keys
+        are returned in row order.
+        """
+        ids = []
+        for chunk in _chunks(rows, chunk_size):
+            if return_ids:
+                ids.extend(cls._insert_returning_ids(chunk))
+            else:
+                db.session.execute(insert(cls), chunk)
+
+        if commit:
+            cls._commit()
+        return ids if return_ids else None
+
+
+    @classmethod
+    def bulk_update(cls, ids, chunk_size = 1000, commit = True, **fields):
+        """ Set fields on every row in ids with one UPDATE ... WHERE pk IN (...) per chunk, returns the row count """
+        if "version" in cls.__table__.columns:
+            fields["version"] = cls.version + 1
+
+        pk = cls.__mapper__.primary_key[0]
+        count = 0
+        for chunk in _chunks(ids, chunk_size):
+            count += db.session.execute(update(cls).where(pk.in_(chunk)).values(**fields)).rowcount
+            cls.invalidate_cached_ids(chunk)
+
+        if commit:
+            cls._commit()
+        return count
+
+
+    @classmethod
+    def bulk_delete(cls, ids, chunk_size = 1000, commit = True):
+        """ Delete every row in ids with one DELETE ... WHERE pk IN (...) per chunk, returns the row count """
+        pk = cls.__mapper__.primary_key[0]
+        count = 0
+        for chunk in _chunks(ids, chunk_size):
+            count += db.session.execute(delete(cls).where(pk.in_(chunk))).rowcount
+            cls.invalidate_cached_ids(chunk)
+
+        if commit:
+            cls._commit()
+        return count
+
+
+    @classmethod
+    def _insert_returning_ids(cls, chunk):
+
+        pk = cls.__mapper__.primary_key[0]
+        dialect = db.session.get_bind(mapper=cls.__mapper__).dialect
+        if dialect.insert_executemany_returning_sort_by_parameter_order:
+            return db.session.scalars(insert(cls).returning(pk, sort_by_parameter_order=True), chunk).all()
+
+        """ No multi-row RETURNING (MySQL), the ORM falls back to one INSERT per row and fills in the keys """
+        chunk = [dict(row) for row in chunk]
+        db.session.bulk_insert_mappings(cls, chunk, return_defaults=True)
+        return [row[pk.key] for row in chunk]
     
 
 
 
-bcrypt = Bcrypt()
-db = SQLAlchemy(model_class=CRUDMixin)
-migrate = Migrate()
+def _chunks(iterable, size):
+
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+
+structured_logging = StructuredLogging()
+password_hasher = PasswordHasher()
+login_cache = LoginCache()
+rate_limiter = RateLimiter()
+job_queue = JobQueue()
+user_versions = TTLCache(maxsize=100000)
+row_cache = RowCache()
+response_compressor = ResponseCompressor()
+instrumentation = Instrumentation()
+metrics = MetricsRegistry()
+replica_router = ReplicaRouter()
+db = SQLAlchemy(model_class=CRUDMixin, session_options={"class_": RoutingSession})
+async_db = AsyncDatabase()
 jwt = JWTManager()
 
+
+def __getattr__(name):
+    """ migrate is created on first access, Flask-Migrate imports alembic and only the db commands need it """
+
+    if name == "migrate":
+        from flask_migrate import Migrate
+        globals()["migrate"] = Migrate()
+        return globals()["migrate"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
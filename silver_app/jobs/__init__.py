@@ -0,0 +1 @@
+""" Deferred work: the jobs table, its handlers and the due task scheduler. The queue itself is utils.job_queue """
@@ -0,0 +1,25 @@
+""" Job handlers, imported by the job queue the first time it looks a name up (JOBS_HANDLER_MODULES) """
+
+import logging
+
+from flask import current_app
+
+from silver_app.extensions import job_queue
+from silver_app.task.models import Task
+
+
+logger = logging.getLogger(__name__)
+
+
+@job_queue.handler("task_reminder")
+def task_reminder(payload):
+
+    task = Task.get_by_id(payload["task_id"])
+    """ Finished, deleted or moved to another date since the scheduler queued it """
+    if task is None or task.status in current_app.config["JOBS_REMINDER_SKIP_STATUSES"]:
+        return
+    if task.due_date is None or task.due_date.isoformat() != payload["due_date"]:
+        return
+
+    """ There is no mail backend yet, the reminder is a structured log line for whatever ships the logs """
+    logger.info("Task reminder", extra={"task_id": task.id, "user_id": task.user_id, "due_date": payload["due_date"]})
@@ -0,0 +1,44 @@
+import datetime as dt
+
+
+from silver_app.database import Model, Column, SurrogatePK
+from silver_app.extensions import db
+
+
+def utcnow():
+    """ Naive UTC, the DateTime columns store no offset """
+
+    return dt.datetime.now(dt.timezone.utc).replace(tzinfo=None)
+
+
+class Job(SurrogatePK, Model):
+    """ One persistent unit of deferred work, run by `flask jobs worker`, see utils.job_queue """
+
+    __tablename__ = "jobs"
+    """ Claims read (status, run_at, id) in order, the trailing id keeps equal run_at values in insert order """
+    __table_args__ = (
+        db.Index("ix_jobs_status_run_at_id", "status", "run_at", "id"),
+        {"extend_existing": True},
+    )
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    name = Column(db.String(80), nullable = False)
+    payload = Column(db.JSON, nullable = False, default = dict)
+    status = Column(db.String(20), nullable = False, default = QUEUED)
+    """ Set for work that must be queued once, e.g. one reminder per task and due date """
+    dedupe_key = Column(db.String(191), unique = True, nullable = True)
+    attempts = Column(db.Integer, nullable = False, default = 0)
+    max_attempts = Column(db.Integer, nullable = False, default = 5)
+    run_at = Column(db.DateTime, nullable = False, default = utcnow)
+    locked_by = Column(db.String(64), nullable = True)
+    locked_at = Column(db.DateTime, nullable = True)
+    last_error = Column(db.Text, nullable = True)
+    created_at = Column(db.DateTime, nullable = False, default = utcnow)
+    finished_at = Column(db.DateTime, nullable = True)
+
+    def __repr__(self):
+        return '<Job({id!r}, {name!r}, {status!r})>'.format(id=self.id, name=self.name, status=self.status)
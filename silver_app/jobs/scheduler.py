@@ -0,0 +1,92 @@
+""" Queues the jobs that follow from the data, run by `flask jobs schedule` """
+
+import datetime as dt
+import logging
+
+from flask import current_app
+from sqlalchemy import select, tuple_
+from sqlalchemy.exc import IntegrityError
+
+from silver_app.extensions import db, job_queue
+from silver_app.jobs.models import Job
+from silver_app.task.models import Task
+
+
+logger = logging.getLogger(__name__)
+
+
+def reminder_key(task_id, due_date):
+
+    return f"task_reminder:{task_id}:{due_date.isoformat()}"
+
+
+def schedule_task_reminders(today=None, lead_days=None, batch_size=None, skip_statuses=None):
+    """
+    Queues one task_reminder per open task due from today to today + lead_days, returns how many.
+
+    Tasks are read in (due_date, id) order, batch_size at a time, each batch starting
+    after the last (due_date, id) of the previous one, so no batch rereads the rows
+    before it. The due date window is found through ix_tasks_due_date, which holds
+    due_date only, so ties on a due date are sorted by id within each batch.
+    A batch costs one IN query for the reminders already queued
+    (dedupe_key is unique, a task and due date get one reminder however often this
+    runs) and one multi-row INSERT.
+    """
+
+    config = current_app.config
+    today = today or dt.date.today()
+    lead_days = config["JOBS_REMINDER_LEAD_DAYS"] if lead_days is None else lead_days
+    batch_size = batch_size or config["JOBS_SCHEDULE_BATCH_SIZE"]
+    skip_statuses = config["JOBS_REMINDER_SKIP_STATUSES"] if skip_statuses is None else skip_statuses
+
+    query = (
+        select(Task.due_date, Task.id)
+        .where(Task.due_date >= today, Task.due_date <= today + dt.timedelta(days=lead_days))
+        .order_by(Task.due_date, Task.id)
+        .limit(batch_size)
+    )
+    if skip_statuses:
+        query = query.where(Task.status.not_in(skip_statuses))
+
+    queued = 0
+    last = None
+    while True:
+        rows = db.session.execute(query if last is None else query.where(tuple_(Task.due_date, Task.id) > last)).all()
+        if not rows:
+            break
+        last = tuple(rows[-1])
+
+        keys = {reminder_key(task_id, due_date): (task_id, due_date) for due_date, task_id in rows}
+        existing = set(db.session.scalars(select(Job.dedupe_key).where(Job.dedupe_key.in_(list(keys)))))
+        new = [
+            {
+                "name": "task_reminder",
+                "payload": {"task_id": task_id, "due_date": due_date.isoformat()},
+                "dedupe_key": key,
+                "max_attempts": job_queue.max_attempts,
+            }
+            for key, (task_id, due_date) in keys.items() if key not in existing
+        ]
+        if new:
+            try:
+                Job.bulk_create(new)
+                queued += len(new)
+            except IntegrityError:
+                """ Another scheduler queued some of them first, its run covers this batch """
+                db.session.rollback()
+                logger.info("Task reminders for %d tasks already queued by another scheduler", len(new))
+
+        if len(rows) < batch_size:
+            break
+
+    return queued
+
+
+def run_schedule(today=None):
+    """ One scheduler pass: reminders, then jobs whose worker went away, then old finished jobs """
+
+    return {
+        "reminders": schedule_task_reminders(today),
+        "requeued": job_queue.requeue_stale(),
+        "pruned": job_queue.prune(),
+    }
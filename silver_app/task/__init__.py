@@ -1 +1,6 @@
-from . import models
\ No newline at end of file
+""" (rule, endpoint, methods) of views.blueprint, LAZY_LOADING routes to them before views is imported """
+ROUTES = (
+    ("/api/tasks", "list_tasks", ("GET",)),
+    ("/api/tasks/export", "export_tasks", ("GET",)),
+    ("/api/tasks/bulk", "import_tasks", ("POST",)),
+)
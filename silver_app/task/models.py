@@ -9,6 +9,13 @@ from silver_app.extensions import db
 class Task(SurrogatePK, Model):
 
     __tablename__ = "tasks"
+    """ Keyset pagination indexes for GET /api/tasks, the trailing id keeps page boundaries stable """
+    __table_args__ = (
+        db.Index("ix_tasks_user_id_created_at_id", "user_id", "created_at", "id"),
+        db.Index("ix_tasks_user_id_due_date_id", "user_id", "due_date", "id"),
+        db.Index("ix_tasks_user_id_status_due_date_id", "user_id", "status", "due_date", "id"),
+        {"extend_existing": True},
+    )
     title = Column(db.String(80), nullable =False)
     user_id = reference_col("users", nullable=False)
     description = Column(db.String(500), nullable=True)
@@ -0,0 +1,42 @@
+from marshmallow import Schema, fields, validate
+from silver_app.utils.serializer_compiler import compile_dump
+
+
+
+
+class TaskSchema(Schema):
+    id = fields.Int(dump_only=True)
+    title = fields.Str(required=True, validate=validate.Length(min=1, max=80))
+    description = fields.Str(allow_none=True, validate=validate.Length(max=500))
+    dueDate = fields.Date(attribute='due_date', allow_none=True)
+    status = fields.Str(dump_only=True)
+    createdAt = fields.DateTime(attribute='created_at', dump_only=True)
+    updatedAt = fields.DateTime(attribute='updated_at', dump_only=True)
+
+
+class TaskListArgsSchema(Schema):
+    """ Query string of GET /api/tasks """
+    status = fields.Str(validate=validate.Length(max=20))
+    due_after = fields.Date()
+    due_before = fields.Date()
+    sort = fields.Str(load_default='created_at', validate=validate.OneOf(['created_at', 'due_date']))
+    limit = fields.Int(load_default=20, validate=validate.Range(min=1, max=100))
+    cursor = fields.Str()
+
+
+class TaskExportArgsSchema(Schema):
+    """ Query string of GET /api/tasks/export """
+    status = fields.Str(validate=validate.Length(max=20))
+    due_after = fields.Date()
+    due_before = fields.Date()
+    fmt = fields.Str(data_key='format', load_default='json', validate=validate.OneOf(['json', 'ndjson']))
+
+
+task_schema = TaskSchema()
+task_schemas = TaskSchema(many=True)
+task_list_args = TaskListArgsSchema()
+task_export_args = TaskExportArgsSchema()
+
+""" Compiled at import time, same output as task_schema.dump / task_schemas.dump """
+task_schema_dump = compile_dump(task_schema)
+task_schemas_dump = compile_dump(task_schemas)
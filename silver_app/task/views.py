@@ -0,0 +1,200 @@
+""" Task related views """
+import base64
+import datetime as dt
+import json
+import time
+
+from flask import Blueprint, current_app, request
+from flask_apispec import use_kwargs
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from marshmallow import ValidationError
+from sqlalchemy import tuple_
+from silver_app.utils.errors import PayloadTooLargeException, ValidationException
+from silver_app.utils.responses import success_response_decorator, streaming_response
+
+from .models import Task
+from .serializers import task_export_args, task_list_args, task_schema_dump, task_schemas, task_schemas_dump
+
+
+blueprint = Blueprint("task", __name__)
+
+
+""" Keyset sort orders: column, and how to turn a cursor value back into a column value """
+SORT_KEYS = {
+    "created_at": (Task.created_at, dt.datetime.fromisoformat),
+    "due_date": (Task.due_date, dt.date.fromisoformat),
+}
+
+
+""" Rows fetched from the server side cursor per round trip during export """
+EXPORT_BATCH_SIZE = 1000
+
+
+def encode_cursor(sort, value, record_id):
+
+    if isinstance(value, dt.datetime) and value.tzinfo:
+        """ Columns are stored as naive UTC """
+        value = value.astimezone(dt.timezone.utc).replace(tzinfo=None)
+    payload = json.dumps([sort, value.isoformat(), record_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, sort):
+
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, value, record_id = json.loads(payload)
+        if cursor_sort != sort:
+            raise ValueError(f"cursor was issued for sort={cursor_sort}")
+        return SORT_KEYS[sort][1](value), int(record_id)
+    except (ValueError, TypeError, KeyError) as error:
+        raise ValidationException("Invalid cursor", str(error))
+
+
+def filter_tasks(status=None, due_after=None, due_before=None):
+    """ The caller's tasks narrowed by the shared list / export filters """
+    query = Task.query.filter(Task.user_id == int(get_jwt_identity()))
+    if status:
+        query = query.filter(Task.status == status)
+    if due_after:
+        query = query.filter(Task.due_date >= due_after)
+    if due_before:
+        query = query.filter(Task.due_date <= due_before)
+    return query
+
+
+@blueprint.route("/api/tasks", methods=["GET"])
+@jwt_required()
+@use_kwargs(task_list_args, location="query")
+@success_response_decorator("Tasks retrieved successfully", status_code=200)
+def list_tasks(sort, limit, status=None, due_after=None, due_before=None, cursor=None):
+    """
+    The caller's tasks ordered by (sort column, id), paginated by keyset so every
+    page costs the same index range scan. sort=due_date leaves out tasks without a due date.
+    """
+    column = SORT_KEYS[sort][0]
+
+    query = filter_tasks(status, due_after, due_before)
+    if sort == "due_date":
+        query = query.filter(Task.due_date.isnot(None))
+
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort)
+        """ Row value comparison, unlike the expanded OR form it stays a single index range scan """
+        query = query.filter(tuple_(column, Task.id) > tuple_(value, last_id))
+
+    tasks = query.order_by(column, Task.id).limit(limit + 1).all()
+    has_more = len(tasks) > limit
+    tasks = tasks[:limit]
+
+    next_cursor = None
+    if has_more:
+        last = tasks[-1]
+        next_cursor = encode_cursor(sort, getattr(last, column.key), last.id)
+
+    metadata = {"next_cursor": next_cursor, "has_more": has_more, "limit": limit}
+    return ({"tasks": task_schemas_dump(tasks)}, metadata)
+
+
+
+@blueprint.route("/api/tasks/export", methods=["GET"])
+@jwt_required()
+@use_kwargs(task_export_args, location="query")
+def export_tasks(fmt, status=None, due_after=None, due_before=None):
+    """ Every matching task, streamed from a server side cursor as chunked JSON or NDJSON """
+    def rows():
+        """
+        Queried once the body is generated. The view's session is closed by then, a query
+        built in the view would reopen it outside the scoped registry and hold a connection until GC
+        """
+        query = filter_tasks(status, due_after, due_before).order_by(Task.id).yield_per(EXPORT_BATCH_SIZE)
+        for task in query:
+            yield task_schema_dump(task)
+
+    return streaming_response(rows(), "Tasks exported successfully", data_key="tasks", fmt=fmt)
+
+
+
+def read_import_rows(max_rows):
+    """ Rows of a JSON array or, with an NDJSON content type, one object per line. Unparseable lines become errors """
+    too_many = PayloadTooLargeException(
+        f"At most {max_rows} tasks can be imported per request",
+        f"Received more than {max_rows} rows"
+    )
+    rows, errors = [], {}
+
+    if request.mimetype in ("application/x-ndjson", "application/ndjson"):
+        for line in request.stream:
+            if not line.strip():
+                continue
+            if len(rows) == max_rows:
+                raise too_many
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                errors[len(rows)] = {"_schema": ["Invalid JSON"]}
+                rows.append(None)
+    else:
+        rows = request.get_json(silent=True)
+        if not isinstance(rows, list):
+            raise ValidationException("Request body must be a JSON array of tasks or NDJSON")
+        if len(rows) > max_rows:
+            raise too_many
+
+    return rows, errors
+
+
+@blueprint.route("/api/tasks/bulk", methods=["POST"])
+@jwt_required()
+@success_response_decorator("Tasks imported successfully", status_code=201, unit_of_work=True)
+def import_tasks():
+    """
+    Create many tasks for the caller at once. Rows are validated in batches and
+    inserted with multi-row INSERTs; any invalid row rejects the whole import with
+    its index in error_detail["errors"].
+    """
+    config = current_app.config
+    max_bytes = config["TASK_IMPORT_MAX_BYTES"]
+    if request.content_length is not None and request.content_length > max_bytes:
+        raise PayloadTooLargeException(
+            f"Import bodies are limited to {max_bytes} bytes",
+            f"Content-Length {request.content_length} exceeds TASK_IMPORT_MAX_BYTES"
+        )
+    """ Chunked bodies have no Content-Length, werkzeug enforces this while reading them """
+    request.max_content_length = max_bytes
+
+    start = time.perf_counter()
+    rows, errors = read_import_rows(config["TASK_IMPORT_MAX_ROWS"])
+
+    batch_size = config["TASK_IMPORT_BATCH_SIZE"]
+    user_id = int(get_jwt_identity())
+    tasks = []
+    for offset in range(0, len(rows), batch_size):
+        batch = rows[offset:offset + batch_size]
+        try:
+            loaded = task_schemas.load([row for row in batch if row is not None])
+        except ValidationError as error:
+            """ Messages are keyed by position among the parsed rows of this batch """
+            positions = [offset + index for index, row in enumerate(batch) if row is not None]
+            errors.update({positions[index]: messages for index, messages in error.messages.items()})
+            continue
+        tasks.extend(dict(task, user_id=user_id) for task in loaded)
+
+    if errors:
+        raise ValidationException(
+            "Invalid tasks in import",
+            f"{len(errors)} of {len(rows)} rows failed validation",
+            errors=dict(sorted(errors.items())),
+        )
+
+    validated = time.perf_counter()
+    Task.bulk_create(tasks, chunk_size=config["TASK_IMPORT_CHUNK_SIZE"])
+    elapsed = time.perf_counter() - start
+
+    metadata = {
+        "count": len(tasks),
+        "validation_ms": round((validated - start) * 1000, 2),
+        "insert_ms": round((time.perf_counter() - validated) * 1000, 2),
+        "rows_per_sec": round(len(tasks) / elapsed) if elapsed else None,
+    }
+    return ({"imported": len(tasks)}, metadata)
@@ -1 +1,6 @@
-from . import views
\ No newline at end of file
+""" (rule, endpoint, methods) of views.blueprint, LAZY_LOADING routes to them before views is imported """
+ROUTES = (
+    ("/api/user/register", "user_register", ("POST",)),
+    ("/api/user/login", "login_user", ("POST",)),
+    ("/api/user", "get_user", ("GET",)),
+)
@@ -0,0 +1,74 @@
+""" Coroutine versions of the hot user views, swapped in for the sync ones by the ASGI entry point """
+import functools
+
+from flask import g
+from flask_jwt_extended import get_jwt, get_jwt_identity, verify_jwt_in_request
+from webargs.flaskparser import use_kwargs
+
+from silver_app.extensions import async_db, rate_limiter
+from silver_app.utils.auth import AuthService, PROFILE_CLAIM
+from silver_app.utils.responses import success_response_decorator
+from .models import User
+from .serializers import user_schema, user_schema_dump
+
+
+def jwt_required_async(func):
+    """ jwt_required() for coroutines, flask_jwt_extended's would run the view through async_to_sync """
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        verify_jwt_in_request()
+        return await func(*args, **kwargs)
+
+    return wrapper
+
+
+@use_kwargs(user_schema, location="json")
+@rate_limiter.limit("login")
+@success_response_decorator("Login successful", status_code=200)
+async def login_user(username, password, **kwargs):
+
+    user, access_token = await AuthService.login_user_async(username, password)
+
+    user_data = user_schema_dump(user)
+
+    cookies = AuthService.create_auth_cookies(access_token)
+
+    return (user_data, {}, cookies)
+
+
+async def current_user_version():
+    """ Same key as views.current_user_version, a row it has to load is left on g for the view """
+
+    claims = get_jwt()
+    if await AuthService.profile_from_claims_async(claims) is not None:
+        return (claims["sub"], claims[PROFILE_CLAIM]["v"])
+
+    async with async_db.session() as session:
+        user = await session.get(User, int(get_jwt_identity()))
+    g.async_user = user
+    return (str(user.id), user.version) if user else None
+
+
+@jwt_required_async
+@success_response_decorator("User retrieval success", status_code=200, etag=current_user_version)
+async def get_user():
+
+    # Serve from the token's profile snapshot while it is current
+    user_data = await AuthService.profile_from_claims_async(get_jwt())
+    if user_data is not None:
+        return (user_data, {})
+
+    user = g.pop("async_user", None)
+    if user is None:
+        async with async_db.session() as session:
+            user = await session.get(User, int(get_jwt_identity()))
+
+    return (user_schema_dump(user), {})
+
+
+""" Endpoint -> coroutine view, the URL rules stay the ones views.blueprint registered """
+ASYNC_VIEWS = {
+    "user.login_user": login_user,
+    "user.get_user": get_user,
+}
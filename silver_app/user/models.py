@@ -1,9 +1,11 @@
 import datetime as dt
 
+from sqlalchemy import inspect
+
 
 from silver_app.database import Model, Column, SurrogatePK
 from silver_app.extensions import db
-from silver_app.extensions import bcrypt
+from silver_app.extensions import password_hasher, login_cache, user_versions
 
 
 class User(SurrogatePK, Model):
@@ -15,6 +17,7 @@ class User(SurrogatePK, Model):
     password = Column(db.LargeBinary(128), nullable = True)
     created_at = Column(db.DateTime, nullable = False, default=lambda: dt.datetime.now(dt.timezone.utc))
     updated_at = Column(db.DateTime, nullable = False, default=lambda: dt.datetime.now(dt.timezone.utc))
+    version = Column(db.Integer, nullable = False, default = 1, server_default = "1")
     
 
 
@@ -30,11 +33,33 @@ class User(SurrogatePK, Model):
 
     def set_password(self, password):
         """ Set password """
-        self.password = bcrypt.generate_password_hash(password)
+        self.password = password_hasher.generate_password_hash(password)
 
     def check_password(self, value):
 
-        return bcrypt.check_password_hash(self.password, value)
+        return password_hasher.check_password_hash(self.password, value)
+
+    def password_needs_rehash(self):
+        """ Stored hash uses an outdated algorithm or cost """
+        return password_hasher.needs_rehash(self.password)
+
+    def invalidate_cache(self):
+        """ Drop login cache entries for the current and, after a rename, the previous username """
+        super().invalidate_cache()
+        for username in {self.username, *inspect(self).attrs.username.history.deleted}:
+            login_cache.invalidate(username)
+
+        """ Profile snapshots in issued JWTs go stale once the version moves, 0 never matches one """
+        if self.id is not None:
+            user_versions.set(str(self.id), 0 if self in db.session.deleted else self.version)
+
+    @classmethod
+    def invalidate_cached_ids(cls, ids):
+        """ Bulk writes do not know the usernames or new versions, so drop all logins and distrust the snapshots """
+        super().invalidate_cached_ids(ids)
+        login_cache.clear()
+        for record_id in ids:
+            user_versions.set(str(record_id), 0)
 
     def __repr__(self):
         return '<User({username!r})>'.format(username=self.username)
@@ -1,4 +1,5 @@
 from marshmallow import Schema, fields, pre_load, post_dump
+from silver_app.utils.serializer_compiler import compile_dump
 
 
 
@@ -37,4 +38,8 @@ class UserSchema(Schema):
 
 
 user_schema = UserSchema()
-user_schemas = UserSchema(many=True)
\ No newline at end of file
+user_schemas = UserSchema(many=True)
+
+""" Compiled at import time, same output as user_schema.dump / user_schemas.dump """
+user_schema_dump = compile_dump(user_schema)
+user_schemas_dump = compile_dump(user_schemas)
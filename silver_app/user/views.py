@@ -1,16 +1,17 @@
 """ User related views """
 from flask import Blueprint, request, jsonify
 from flask_apispec import use_kwargs, marshal_with
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 from sqlalchemy.exc import IntegrityError
 from silver_app.utils.errors import ConflictException
 from silver_app.utils.responses import success_response_decorator
-from silver_app.utils.auth import AuthService
+from silver_app.utils.auth import AuthService, PROFILE_CLAIM
 from silver_app.database import db
+from silver_app.extensions import rate_limiter
 """ from silver_app.utils.errors import 
  """
 from .models import User
-from .serializers import user_schema
+from .serializers import user_schema, user_schema_dump
 
 
 blueprint = Blueprint("user", __name__)
@@ -19,11 +20,11 @@ blueprint = Blueprint("user", __name__)
 
 @blueprint.route("/api/user/register", methods=["POST"])
 @use_kwargs(user_schema)
-@success_response_decorator("User registered successfully", status_code=201)
+@success_response_decorator("User registered successfully", status_code=201, unit_of_work=True)
 def user_register(username, password, email, **kwargs):
     user, access_token = AuthService.register_user(username, email, password, **kwargs)
 
-    user_data = user_schema.dump(user)
+    user_data = user_schema_dump(user)
 
     cookies = AuthService.create_auth_cookies(access_token)
 
@@ -33,31 +34,49 @@ def user_register(username, password, email, **kwargs):
 
 @blueprint.route('/api/user/login', methods=['POST'])
 @use_kwargs(user_schema)
-@success_response_decorator("Login successful", status_code=200)
+@rate_limiter.limit("login")
+@success_response_decorator("Login successful", status_code=200, unit_of_work=True)
 def login_user(username, password, **kwargs):
 
     user, access_token = AuthService.login_user(username, password, **kwargs)
 
-    user_data = user_schema.dump(user)
+    user_data = user_schema_dump(user)
 
     cookies = AuthService.create_auth_cookies(access_token)
 
     return (user_data, {}, cookies)
 
 
+def current_user_version():
+    """ ETag key for GET /api/user, users.version moves with every profile change """
+
+    # A current profile snapshot already names the version, no row needed
+    claims = get_jwt()
+    if AuthService.profile_from_claims(claims) is not None:
+        return (claims["sub"], claims[PROFILE_CLAIM]["v"])
+
+    # Loaded through the identity map, so the view below reuses this row
+    user = User.get_by_id(get_jwt_identity())
+    return (str(user.id), user.version) if user else None
+
+
+
 @blueprint.route('/api/user', methods=['GET'])
 @jwt_required()
-@success_response_decorator("User retrieval success", status_code=200)
+@success_response_decorator("User retrieval success", status_code=200, etag=current_user_version)
 def get_user():
 
+    # Serve from the token's profile snapshot while it is current
+    user_data = AuthService.profile_from_claims(get_jwt())
+    if user_data is not None:
+        return (user_data, {})
 
     user_id = get_jwt_identity()
 
     user = User.get_by_id(user_id)
     
-    user_data = user_schema.dump(user)
+    user_data = user_schema_dump(user)
 
-    print(user_data, {})
     return (user_data, {})
 
 """     user = current_user
@@ -0,0 +1,92 @@
+""" Async engine and session factory next to db, for the coroutine views the ASGI entry point serves """
+
+import os
+
+from sqlalchemy.engine import make_url
+
+try:
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+except ImportError:  # optional, needs greenlet
+    create_async_engine = None
+
+
+""" Sync driver -> the async driver for the same database """
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "mysql+mysqldb": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+
+def async_database_uri(uri):
+
+    url = make_url(uri)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.drivername, url.drivername)).render_as_string(hide_password=False)
+
+
+class AsyncDatabase:
+    """
+    AsyncSession factory over SQLALCHEMY_ASYNC_DATABASE_URI, by default the
+    SQLALCHEMY_DATABASE_URI database through its async driver (aiomysql, aiosqlite),
+    with the same SQLALCHEMY_ENGINE_OPTIONS. In-memory SQLite is a different database
+    per engine, so async views need a file or a server.
+
+    The engine is created on first use, in the worker process and event loop that use
+    it. Sessions keep loaded rows usable after commit (expire_on_commit=False), async
+    code cannot lazy load them. Reads are not sent to replicas.
+
+    Usage: ::
+
+        async with async_db.session() as session:
+            user = await session.get(User, user_id)
+    """
+
+    def __init__(self, app=None):
+
+        self.uri = None
+        self.engine_options = {}
+        self._engine = None
+        self._sessionmaker = None
+
+        os.register_at_fork(after_in_child=self._reset)
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+
+        self.uri = app.config.get("SQLALCHEMY_ASYNC_DATABASE_URI") or async_database_uri(app.config["SQLALCHEMY_DATABASE_URI"])
+        self.engine_options = dict(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+        self._reset()
+        app.extensions["async_db"] = self
+
+    @property
+    def engine(self):
+
+        if self._engine is None:
+            if create_async_engine is None:
+                raise RuntimeError("Async database access needs SQLAlchemy's asyncio extra (greenlet) and an async driver")
+            self._engine = create_async_engine(self.uri, **self.engine_options)
+        return self._engine
+
+    def session(self):
+
+        if self._sessionmaker is None:
+            self._sessionmaker = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        return self._sessionmaker()
+
+    async def dispose(self):
+
+        if self._engine is not None:
+            await self._engine.dispose()
+        self._reset()
+
+    def _reset(self):
+        """ A forked child must not share the parent's connections """
+
+        self._engine = None
+        self._sessionmaker = None
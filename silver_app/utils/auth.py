@@ -1,9 +1,38 @@
+import asyncio
+import logging
+
+from flask import current_app
 from flask_jwt_extended import create_access_token
+from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
-from silver_app.database import db
+from silver_app.database import db, use_primary
+from silver_app.extensions import async_db, login_cache, password_hasher, row_cache, user_versions
+from silver_app.utils.cache import LoginEntry
 from silver_app.utils.errors import ConflictException, UnauthorizedException
 
 
+logger = logging.getLogger(__name__)
+
+""" Custom JWT claim holding the versioned profile snapshot """
+PROFILE_CLAIM = "prf"
+
+
+def _remember_version(user_id, version):
+    """ A deleted user is remembered as version 0, which no snapshot carries """
+
+    version = version or 0
+    user_versions.set(user_id, version)
+    return version
+
+
+def _forget_committed_user(user):
+    """ User.invalidate_cache for a row committed through async_db, without db.session. Blocks on a redis row cache """
+
+    row_cache.discard(type(user), user.id)
+    login_cache.invalidate(user.username)
+    _remember_version(str(user.id), user.version)
+
+
 class AuthService:
 
     
@@ -17,9 +46,8 @@ class AuthService:
             user = User(username, email, password=password, **kwargs).save()
             
             # Generate JWT token
-            print("generating access token")
-            access_token = create_access_token(identity=user.id)
-            print(access_token)
+            access_token = AuthService.issue_access_token(user)
+            logger.debug("Registered user %s", user.id)
             return user, access_token
             
         except IntegrityError:
@@ -31,21 +59,162 @@ class AuthService:
     
     @staticmethod
     def login_user(username, password):
+        """
+        Unknown usernames cached by login_cache are refused without a query. A cached
+        user still has its row read by id on the primary, right or wrong password, so
+        a change made on another worker is never missed: the positive entries only
+        swap the username lookup for a primary key one.
+        """
 
         from silver_app.user.models import User
-        
-        # Find user by email
-        user = User.query.filter_by(username=username).first()
-        
-        if not user or not user.check_password(password):
+
+        # Consult the login cache before the database, unknown usernames are cached too
+        entry = login_cache.get(username)
+        if entry is login_cache.USER_NOT_FOUND:
             raise UnauthorizedException(
                 "Invalid Credentials"
             )
+
+        user = None
+        if entry is None:
+            # Cached either way, so read the primary: a replica may not have a user who just registered
+            with use_primary():
+                user = User.query.filter_by(username=username).first()
+            if not user:
+                login_cache.set_missing(username)
+                raise UnauthorizedException(
+                    "Invalid Credentials"
+                )
+            login_cache.set_user(user)
+            entry = LoginEntry(user.id, user.password, user.version)
+
+        matched = password_hasher.check_password_hash(entry.password, password)
+
+        if user is None:
+            # Changed on another worker since it was cached, verify against the row on the primary, never the row cache
+            with use_primary():
+                user = db.session.get(User, entry.id, populate_existing=True)
+            if not user or (user.version, user.password) != (entry.version, entry.password):
+                login_cache.invalidate(username)
+                return AuthService.login_user(username, password)
+
+        if not matched:
+            raise UnauthorizedException(
+                "Invalid Credentials"
+            )
+
+        # Transparently upgrade hashes made with an old algorithm or cost, update() moves the version with it
+        if user.password_needs_rehash():
+            user.update(password=password_hasher.generate_password_hash(password))
         
         # Generate JWT token
-        access_token = create_access_token(identity=user.id)
+        access_token = AuthService.issue_access_token(user)
         
         return user, access_token
+
+    @staticmethod
+    async def login_user_async(username, password):
+        """ login_user for async views: the user is read through async_db, hashes run off the event loop """
+
+        from silver_app.user.models import User
+
+        entry = login_cache.get(username)
+        if entry is login_cache.USER_NOT_FOUND:
+            raise UnauthorizedException(
+                "Invalid Credentials"
+            )
+
+        async with async_db.session() as session:
+            user = None
+            if entry is None:
+                user = await session.scalar(select(User).filter_by(username=username))
+                if not user:
+                    login_cache.set_missing(username)
+                    raise UnauthorizedException(
+                        "Invalid Credentials"
+                    )
+                login_cache.set_user(user)
+                entry = LoginEntry(user.id, user.password, user.version)
+
+            matched = await password_hasher.check_password_hash_async(entry.password, password)
+
+            if user is None:
+                # Changed on another worker since it was cached, verify against the fresh row
+                user = await session.get(User, entry.id, populate_existing=True)
+                if not user or (user.version, user.password) != (entry.version, entry.password):
+                    login_cache.invalidate(username)
+                    return await AuthService.login_user_async(username, password)
+
+            if not matched:
+                raise UnauthorizedException(
+                    "Invalid Credentials"
+                )
+
+            # Transparently upgrade hashes made with an old algorithm or cost, same as CRUDMixin.update
+            if user.password_needs_rehash():
+                user.password = await password_hasher.generate_password_hash_async(password)
+                user.version += 1
+                await session.commit()
+                await asyncio.to_thread(_forget_committed_user, user)
+
+        access_token = AuthService.issue_access_token(user)
+
+        return user, access_token
+
+    @staticmethod
+    def issue_access_token(user):
+        """ With JWT_PROFILE_CLAIMS on, the token also carries the user's profile at its current version """
+
+        additional_claims = None
+        if current_app.config.get("JWT_PROFILE_CLAIMS"):
+            from silver_app.user.serializers import user_schema_dump
+            additional_claims = {
+                PROFILE_CLAIM: {"v": user.version, "user": user_schema_dump(user)["user"]}
+            }
+
+        return create_access_token(identity=str(user.id), additional_claims=additional_claims)
+
+    @staticmethod
+    def profile_from_claims(claims):
+        """
+        user_schema.dump output rebuilt from the token's profile snapshot.
+
+        Returns None when profile claims are off, the token has none, or the user's
+        version has moved past the snapshot. The version comes from this process'
+        user_versions, or from the primary when it has no entry. Writes made here
+        update user_versions at once, entries expire after JWT_PROFILE_VERSION_TTL
+        seconds, so a change made on another worker is seen within that bound.
+        """
+
+        profile = claims.get(PROFILE_CLAIM)
+        if not profile or not current_app.config.get("JWT_PROFILE_CLAIMS"):
+            return None
+
+        current_version = user_versions.get(claims["sub"])
+        if current_version is None:
+            from silver_app.user.models import User
+            with use_primary():
+                stored = db.session.scalar(select(User.version).where(User.id == int(claims["sub"])))
+            current_version = _remember_version(claims["sub"], stored)
+
+        return {"user": profile["user"]} if current_version == profile["v"] else None
+
+    @staticmethod
+    async def profile_from_claims_async(claims):
+        """ profile_from_claims for async views, a version missing from user_versions is read through async_db """
+
+        profile = claims.get(PROFILE_CLAIM)
+        if not profile or not current_app.config.get("JWT_PROFILE_CLAIMS"):
+            return None
+
+        current_version = user_versions.get(claims["sub"])
+        if current_version is None:
+            from silver_app.user.models import User
+            async with async_db.session() as session:
+                stored = await session.scalar(select(User.version).where(User.id == int(claims["sub"])))
+            current_version = _remember_version(claims["sub"], stored)
+
+        return {"user": profile["user"]} if current_version == profile["v"] else None
     
     @staticmethod
     def create_auth_cookies(access_token):
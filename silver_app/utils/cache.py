@@ -0,0 +1,374 @@
+""" In-process TTL / LRU caches and the pluggable row cache behind SurrogatePK.get_by_id """
+
+import pickle
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread safe LRU cache where every entry also expires after a TTL.
+
+    Keeps hit / miss / eviction counters so they can be scraped with stats().
+    """
+
+    def __init__(self, maxsize=1024, ttl=60, clock=time.monotonic):
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def configure(self, maxsize=None, ttl=None):
+
+        with self._lock:
+            if maxsize is not None:
+                self.maxsize = maxsize
+            if ttl is not None:
+                self.ttl = ttl
+            self._data.clear()
+
+    def get(self, key, default=None):
+
+        now = self.clock()
+        with self._lock:
+            item = self._data.get(key, MISSING)
+            if item is not MISSING:
+                expires_at, value = item
+                if expires_at > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+
+        expires_at = self.clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+
+        return len(self._data)
+
+    def stats(self):
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+        }
+
+
+LoginEntry = namedtuple("LoginEntry", ["id", "password", "version"])
+
+
+class LoginCache:
+    """
+    username -> LoginEntry(id, password hash, version) for AuthService.login_user.
+
+    A known user's row is still read by id on every login, to catch changes made
+    on other workers, so only the negative entries save a database round trip.
+    Unknown usernames are cached separately with a short TTL and their own size
+    bound, so a credential stuffing burst cannot evict real users.
+    """
+
+    USER_NOT_FOUND = object()
+
+    def __init__(self, app=None):
+
+        self.enabled = True
+        self.users = TTLCache()
+        self.missing = TTLCache()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+
+        self.enabled = app.config.get("LOGIN_CACHE_ENABLED", True)
+        self.users.configure(
+            maxsize=app.config.get("LOGIN_CACHE_SIZE", 10000),
+            ttl=app.config.get("LOGIN_CACHE_TTL", 60),
+        )
+        self.missing.configure(
+            maxsize=app.config.get("LOGIN_CACHE_NEGATIVE_SIZE", 10000),
+            ttl=app.config.get("LOGIN_CACHE_NEGATIVE_TTL", 5),
+        )
+        app.extensions["login_cache"] = self
+
+    def get(self, username):
+        """ Returns a LoginEntry, USER_NOT_FOUND, or None on a cache miss """
+
+        if not self.enabled:
+            return None
+
+        entry = self.users.get(username)
+        if entry is not None:
+            return entry
+
+        if self.missing.get(username) is not None:
+            return self.USER_NOT_FOUND
+
+        return None
+
+    def set_user(self, user):
+
+        if self.enabled:
+            self.missing.delete(user.username)
+            self.users.set(user.username, LoginEntry(user.id, user.password, user.version))
+
+    def set_missing(self, username):
+
+        if self.enabled:
+            self.missing.set(username, True)
+
+    def invalidate(self, username):
+
+        self.users.delete(username)
+        self.missing.delete(username)
+
+    def clear(self):
+
+        self.users.clear()
+        self.missing.clear()
+
+    def stats(self):
+
+        return {"users": self.users.stats(), "missing": self.missing.stats()}
+
+
+class NullCacheBackend:
+    """ Caches nothing, CACHE_TYPE = "null" """
+
+    def get(self, key):
+
+        return None
+
+    def get_many(self, keys):
+
+        return {}
+
+    def set(self, key, value):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+    def stats(self):
+
+        return {}
+
+
+class LocalCacheBackend:
+    """ Per process LRU, CACHE_TYPE = "simple" """
+
+    def __init__(self, maxsize=10000, ttl=300):
+
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key):
+
+        return self.cache.get(key)
+
+    def get_many(self, keys):
+
+        found = {}
+        for key in keys:
+            value = self.cache.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def set(self, key, value):
+
+        self.cache.set(key, value)
+
+    def delete(self, key):
+
+        self.cache.delete(key)
+
+    def clear(self):
+
+        self.cache.clear()
+
+    def stats(self):
+
+        return self.cache.stats()
+
+
+class RedisCacheBackend:
+    """ Shared between processes and hosts, CACHE_TYPE = "redis". Requires the redis package """
+
+    def __init__(self, url, ttl=300, key_prefix="silver_app:"):
+
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.key_prefix = key_prefix
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys):
+
+        keys = list(keys)
+        if not keys:
+            return {}
+
+        values = self.client.mget([self.key_prefix + key for key in keys])
+        found = {key: pickle.loads(value) for key, value in zip(keys, values) if value is not None}
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def set(self, key, value):
+
+        self.client.set(self.key_prefix + key, pickle.dumps(value), ex=self.ttl)
+
+    def delete(self, key):
+
+        self.client.delete(self.key_prefix + key)
+
+    def clear(self):
+
+        for key in self.client.scan_iter(self.key_prefix + "*"):
+            self.client.delete(key)
+
+    def stats(self):
+
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def create_cache_backend(config):
+    """ Backend for the CACHE_* settings, names follow Flask-Caching """
+
+    cache_type = config.get("CACHE_TYPE", "simple").lower().replace("cache", "")
+    ttl = config.get("CACHE_DEFAULT_TIMEOUT", 300)
+
+    if cache_type in ("null", ""):
+        return NullCacheBackend()
+    if cache_type == "simple":
+        return LocalCacheBackend(maxsize=config.get("CACHE_THRESHOLD", 10000), ttl=ttl)
+    if cache_type == "redis":
+        return RedisCacheBackend(
+            config["CACHE_REDIS_URL"], ttl=ttl, key_prefix=config.get("CACHE_KEY_PREFIX", "silver_app:")
+        )
+
+    raise ValueError(f"Unsupported CACHE_TYPE: {config.get('CACHE_TYPE')}")
+
+
+class RowCache:
+    """
+    Read-through cache of column values keyed by (table, primary key), used by SurrogatePK.get_by_id.
+
+    Keys are dropped when a row is saved or deleted, and once more after the
+    transaction commits so a concurrent read cannot put back the old row.
+    """
+
+    def __init__(self, app=None):
+
+        self.backend = NullCacheBackend()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+
+        self.backend = create_cache_backend(app.config)
+        app.extensions["row_cache"] = self
+
+        if not event.contains(Session, "after_commit", self._after_commit):
+            event.listen(Session, "after_commit", self._after_commit)
+            event.listen(Session, "after_rollback", self._after_rollback)
+
+    @property
+    def enabled(self):
+        """ False with CACHE_TYPE = "null", nothing read is kept """
+
+        return not isinstance(self.backend, NullCacheBackend)
+
+    @staticmethod
+    def key(model, record_id):
+
+        return f"{model.__tablename__}:{record_id}"
+
+    def get(self, model, record_id):
+
+        return self.backend.get(self.key(model, record_id))
+
+    def get_many(self, model, record_ids):
+
+        keys = {self.key(model, record_id): record_id for record_id in record_ids}
+        found = self.backend.get_many(keys)
+        return {keys[key]: state for key, state in found.items()}
+
+    def set(self, model, record_id, state):
+
+        self.backend.set(self.key(model, record_id), state)
+
+    def invalidate(self, session, model, record_id):
+
+        key = self.key(model, record_id)
+        self.backend.delete(key)
+        session.info.setdefault("row_cache_keys", set()).add(key)
+
+    def discard(self, model, record_id):
+        """ Drop a row committed outside db.session, through async_db, so there is no commit to wait for """
+
+        self.backend.delete(self.key(model, record_id))
+
+    def clear(self):
+
+        self.backend.clear()
+
+    def stats(self):
+
+        return self.backend.stats()
+
+    def _after_commit(self, session):
+
+        for key in session.info.pop("row_cache_keys", ()):
+            self.backend.delete(key)
+
+    def _after_rollback(self, session):
+
+        session.info.pop("row_cache_keys", None)
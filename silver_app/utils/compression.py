@@ -0,0 +1,240 @@
+""" Response compression negotiated from Accept-Encoding, streamed responses are compressed chunk by chunk """
+
+import time
+import zlib
+
+from flask import g, request
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+
+""" Content-Encoding token -> codec class, only codecs whose module is installed are negotiated """
+CODECS = {}
+
+
+def register_codec(cls):
+
+    CODECS[cls.name] = cls
+    return cls
+
+
+@register_codec
+class GzipCodec:
+
+    name = "gzip"
+    available = True
+
+    def __init__(self, level=6):
+
+        self.level = level
+
+    def stream(self):
+        """ (compress, flush, finish) callables for one response body """
+
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+
+@register_codec
+class BrotliCodec:
+
+    name = "br"
+    available = brotli is not None
+
+    def __init__(self, level=4):
+
+        self.level = level
+
+    def stream(self):
+
+        compressor = brotli.Compressor(quality=self.level)
+        return compressor.process, compressor.flush, compressor.finish
+
+
+@register_codec
+class ZstdCodec:
+
+    name = "zstd"
+    available = zstandard is not None
+
+    def __init__(self, level=3):
+
+        self.level = level
+
+    def stream(self):
+
+        compressor = zstandard.ZstdCompressor(level=self.level).compressobj()
+        return compressor.compress, lambda: compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK), compressor.flush
+
+
+class CompressionStats:
+    """ Per request numbers kept on g.compression, CPU time is the compressing thread's """
+
+    __slots__ = ("encoding", "original_bytes", "compressed_bytes", "cpu_seconds", "streamed")
+
+    def __init__(self, encoding, streamed=False):
+
+        self.encoding = encoding
+        self.original_bytes = 0
+        self.compressed_bytes = 0
+        self.cpu_seconds = 0.0
+        self.streamed = streamed
+
+    @property
+    def ratio(self):
+
+        return self.original_bytes / self.compressed_bytes if self.compressed_bytes else None
+
+    def to_dict(self):
+
+        return {
+            "encoding": self.encoding,
+            "original_bytes": self.original_bytes,
+            "compressed_bytes": self.compressed_bytes,
+            "ratio": round(self.ratio, 2) if self.ratio else None,
+            "cpu_ms": round(self.cpu_seconds * 1000, 3),
+            "streamed": self.streamed,
+        }
+
+
+class ResponseCompressor:
+    """
+    after_request hook compressing JSON / NDJSON bodies with the best encoding the client accepts.
+
+    COMPRESS_ALGORITHMS is the server preference among codecs the client gives the same
+    q-value. Buffered bodies under COMPRESS_MIN_SIZE go out as they are. Streamed bodies
+    are compressed as they are generated and flushed every COMPRESS_STREAM_FLUSH_SIZE
+    input bytes, so clients of chunked exports keep receiving data.
+    """
+
+    def __init__(self, app=None):
+
+        self.enabled = False
+        self.codecs = []
+        self.min_size = 500
+        self.mimetypes = set()
+        self.flush_size = 16384
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+
+        self.enabled = app.config.get("COMPRESS_ENABLED", True)
+        levels = app.config.get("COMPRESS_LEVELS", {})
+        self.codecs = [
+            CODECS[name](**({"level": levels[name]} if name in levels else {}))
+            for name in app.config.get("COMPRESS_ALGORITHMS", ["zstd", "br", "gzip"])
+            if CODECS[name].available
+        ]
+        self.min_size = app.config.get("COMPRESS_MIN_SIZE", 500)
+        self.mimetypes = set(app.config.get("COMPRESS_MIMETYPES", ["application/json", "application/x-ndjson"]))
+        self.flush_size = app.config.get("COMPRESS_STREAM_FLUSH_SIZE", 16384)
+
+        app.extensions["response_compressor"] = self
+        app.after_request(self.after_request)
+
+    def negotiate(self, accept_encodings):
+        """ Codec with the highest q-value, ties broken by COMPRESS_ALGORITHMS order, None for identity """
+
+        best, best_quality = None, 0
+        for codec in self.codecs:
+            quality = accept_encodings[codec.name]
+            if quality > best_quality:
+                best, best_quality = codec, quality
+        return best
+
+    def after_request(self, response):
+
+        if not self.enabled or "Content-Encoding" in response.headers:
+            return response
+
+        if response.status_code == 304:
+            """ Same validator the compressed 200 would carry """
+            if self.negotiate(request.accept_encodings):
+                self._weaken_etag(response)
+            return response
+
+        if (
+            response.status_code < 200
+            or response.status_code == 204
+            or response.direct_passthrough
+            or response.mimetype not in self.mimetypes
+        ):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        codec = self.negotiate(request.accept_encodings)
+        if codec is None:
+            return response
+
+        if response.is_streamed:
+            stats = CompressionStats(codec.name, streamed=True)
+            response.response = self._compress_stream(response.response, codec, stats)
+            response.headers.pop("Content-Length", None)
+        else:
+            if response.content_length is not None and response.content_length < self.min_size:
+                return response
+            body = response.get_data()
+            if len(body) < self.min_size:
+                return response
+
+            stats = CompressionStats(codec.name)
+            started = time.thread_time()
+            compress, _, finish = codec.stream()
+            compressed = compress(body) + finish()
+            stats.cpu_seconds = time.thread_time() - started
+            stats.original_bytes = len(body)
+            stats.compressed_bytes = len(compressed)
+            response.set_data(compressed)
+
+        response.headers["Content-Encoding"] = codec.name
+        self._weaken_etag(response)
+        g.compression = stats
+        return response
+
+    def _compress_stream(self, chunks, codec, stats):
+        """ Only time spent inside the codec counts, generating the chunks is the view's cost """
+
+        compress, flush, finish = codec.stream()
+        pending = 0
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode()
+                started = time.thread_time()
+                out = compress(chunk)
+                pending += len(chunk)
+                if pending >= self.flush_size:
+                    out += flush()
+                    pending = 0
+                stats.cpu_seconds += time.thread_time() - started
+                stats.original_bytes += len(chunk)
+                if out:
+                    stats.compressed_bytes += len(out)
+                    yield out
+
+            started = time.thread_time()
+            out = finish()
+            stats.cpu_seconds += time.thread_time() - started
+            stats.compressed_bytes += len(out)
+            yield out
+        finally:
+            if hasattr(chunks, "close"):
+                chunks.close()
+
+    @staticmethod
+    def _weaken_etag(response):
+        """ The encoded bytes differ from the identity ones, so a strong ETag no longer holds """
+
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
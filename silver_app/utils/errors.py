@@ -6,21 +6,31 @@ BAD_REQUEST = 400
 UNAUTHORIZED = 401
 FORBIDDEN = 403
 NOT_FOUND = 404
+METHOD_NOT_ALLOWED = 405
 CONFLICT = 409
+PAYLOAD_TOO_LARGE = 413
+UNPROCESSABLE_ENTITY = 422
+TOO_MANY_REQUESTS = 429
 INTERNAL_SERVER_ERROR = 500
+SERVICE_UNAVAILABLE = 503
 
 # Error Code Constants
 VALIDATION_ERROR = "VALIDATION_ERROR"
 NOT_FOUND_ERROR = "NOT_FOUND_ERROR"
+METHOD_NOT_ALLOWED_ERROR = "METHOD_NOT_ALLOWED_ERROR"
 UNAUTHORIZED_ERROR = "UNAUTHORIZED_ERROR"
 FORBIDDEN_ERROR = "FORBIDDEN_ERROR"
 CONFLICT_ERROR = "CONFLICT_ERROR"
+PAYLOAD_TOO_LARGE_ERROR = "PAYLOAD_TOO_LARGE_ERROR"
+TOO_MANY_REQUESTS_ERROR = "TOO_MANY_REQUESTS_ERROR"
 SERVER_ERROR = "SERVER_ERROR"
+SERVICE_UNAVAILABLE_ERROR = "SERVICE_UNAVAILABLE_ERROR"
 
 # Error Type Categories
 VALIDATION = "validation"
 AUTHENTICATION = "authentication"
 AUTHORIZATION = "authorization"
+RATE_LIMIT = "rate_limit"
 SERVER = "server"
 
 # Map error codes to HTTP status codes and error types
@@ -33,6 +43,10 @@ ERROR_CODE_MAP = {
         "status_code": NOT_FOUND,
         "error_type": SERVER
     },
+    METHOD_NOT_ALLOWED_ERROR: {
+        "status_code": METHOD_NOT_ALLOWED,
+        "error_type": VALIDATION
+    },
     UNAUTHORIZED_ERROR: {
         "status_code": UNAUTHORIZED,
         "error_type": AUTHENTICATION
@@ -45,9 +59,21 @@ ERROR_CODE_MAP = {
         "status_code": CONFLICT,
         "error_type": VALIDATION
     },
+    PAYLOAD_TOO_LARGE_ERROR: {
+        "status_code": PAYLOAD_TOO_LARGE,
+        "error_type": VALIDATION
+    },
+    TOO_MANY_REQUESTS_ERROR: {
+        "status_code": TOO_MANY_REQUESTS,
+        "error_type": RATE_LIMIT
+    },
     SERVER_ERROR: {
         "status_code": INTERNAL_SERVER_ERROR,
         "error_type": SERVER
+    },
+    SERVICE_UNAVAILABLE_ERROR: {
+        "status_code": SERVICE_UNAVAILABLE,
+        "error_type": SERVER
     }
 }
 
@@ -70,16 +96,47 @@ HTTP_ERROR_MAP = {
         "error_code": NOT_FOUND_ERROR,
         "error_message": "Resource not found"
     },
+    METHOD_NOT_ALLOWED: {
+        "error_code": METHOD_NOT_ALLOWED_ERROR,
+        "error_message": "Method not allowed"
+    },
     CONFLICT: {
         "error_code": CONFLICT_ERROR,
         "error_message": "Resource conflict"
     },
+    PAYLOAD_TOO_LARGE: {
+        "error_code": PAYLOAD_TOO_LARGE_ERROR,
+        "error_message": "Request body too large"
+    },
+    UNPROCESSABLE_ENTITY: {
+        "error_code": VALIDATION_ERROR,
+        "error_message": "Invalid request data"
+    },
+    TOO_MANY_REQUESTS: {
+        "error_code": TOO_MANY_REQUESTS_ERROR,
+        "error_message": "Too many requests"
+    },
     INTERNAL_SERVER_ERROR: {
         "error_code": SERVER_ERROR,
         "error_message": "Internal server error"
+    },
+    SERVICE_UNAVAILABLE: {
+        "error_code": SERVICE_UNAVAILABLE_ERROR,
+        "error_message": "Service temporarily unavailable"
     }
 }
 
+""" Preallocated error_detail per HTTP status, copied only when a debug_message is added """
+HTTP_ERROR_DETAILS = {
+    status: {
+        "error_code": mapping["error_code"],
+        "error_type": ERROR_CODE_MAP[mapping["error_code"]]["error_type"],
+        "error_message": mapping["error_message"],
+    }
+    for status, mapping in HTTP_ERROR_MAP.items()
+}
+
+
 """ use for rasising proper exceptions """
 class SilverAppException(Exception):
     """
@@ -87,7 +144,27 @@ class SilverAppException(Exception):
     
     All custom exceptions should inherit from this class to ensure
     consistent error handling and formatting.
+
+    Subclasses declare error_code as a class attribute; its status_code and
+    error_type are looked up in ERROR_CODE_MAP once, when the class is created,
+    so raising one costs no lookups. debug_message may be a callable, it is
+    only called when the response includes debug output. headers, when set,
+    are added to the error response.
     """
+
+    error_code = SERVER_ERROR
+    status_code = INTERNAL_SERVER_ERROR
+    error_type = SERVER
+    headers = None
+
+    def __init_subclass__(cls, **kwargs):
+
+        super().__init_subclass__(**kwargs)
+        if "error_code" in cls.__dict__:
+            if cls.error_code not in ERROR_CODE_MAP:
+                raise ValueError(f"Unknown error code: {cls.error_code}")
+            cls.status_code = ERROR_CODE_MAP[cls.error_code]["status_code"]
+            cls.error_type = ERROR_CODE_MAP[cls.error_code]["error_type"]
     
     def __init__(self, error_code, error_message, debug_message=None):
         """
@@ -96,26 +173,36 @@ class SilverAppException(Exception):
         Args:
             error_code: Error code constant (e.g., VALIDATION_ERROR)
             error_message: User-friendly error message
-            debug_message: Technical details for debugging (optional)
+            debug_message: Technical details for debugging, or a callable
+                returning them (optional)
         """
         super().__init__(error_message)
-        
-        # Validate error code exists in our mapping
-        if error_code not in ERROR_CODE_MAP:
-            raise ValueError(f"Unknown error code: {error_code}")
-        
-        self.error_code = error_code
+
+        # Only codes other than the class' own need the mapping
+        if error_code is not self.error_code:
+            if error_code not in ERROR_CODE_MAP:
+                raise ValueError(f"Unknown error code: {error_code}")
+            error_info = ERROR_CODE_MAP[error_code]
+            self.error_code = error_code
+            self.status_code = error_info["status_code"]
+            self.error_type = error_info["error_type"]
+
         self.error_message = error_message
-        self.debug_message = debug_message
-        
-        # Get status code and error type from mapping
-        error_info = ERROR_CODE_MAP[error_code]
-        self.status_code = error_info["status_code"]
-        self.error_type = error_info["error_type"]
+        self._debug_message = debug_message
+
+    @property
+    def debug_message(self):
+
+        if callable(self._debug_message):
+            self._debug_message = self._debug_message()
+        return self._debug_message
     
-    def to_dict(self):
+    def to_dict(self, debug=True):
         """
         Convert exception to dictionary format for JSON responses.
+
+        Args:
+            debug: Include debug_message, building it if it was deferred (default: True)
         
         Returns:
             dict: Exception data in standardized format
@@ -127,21 +214,36 @@ class SilverAppException(Exception):
         }
         
         # Add debug message if provided
-        if self.debug_message:
+        if debug and self._debug_message:
             error_detail["debug_message"] = self.debug_message
             
         return error_detail
 
 # Convenience exception classes for common scenarios
 class ValidationException(SilverAppException):
-    """Exception for validation errors."""
+    """Exception for validation errors.
+
+    errors optionally maps field names or row indexes to their messages,
+    and is returned as error_detail["errors"].
+    """
+
+    error_code = VALIDATION_ERROR
     
-    def __init__(self, error_message, debug_message=None):
+    def __init__(self, error_message, debug_message=None, errors=None):
         super().__init__(VALIDATION_ERROR, error_message, debug_message)
+        self.errors = errors
+
+    def to_dict(self, debug=True):
+        error_detail = super().to_dict(debug)
+        if self.errors:
+            error_detail["errors"] = self.errors
+        return error_detail
 
 
 class NotFoundException(SilverAppException):
     """Exception for not found errors."""
+
+    error_code = NOT_FOUND_ERROR
     
     def __init__(self, error_message, debug_message=None):
         super().__init__(NOT_FOUND_ERROR, error_message, debug_message)
@@ -149,6 +251,8 @@ class NotFoundException(SilverAppException):
 
 class UnauthorizedException(SilverAppException):
     """Exception for unauthorized access errors."""
+
+    error_code = UNAUTHORIZED_ERROR
     
     def __init__(self, error_message, debug_message=None):
         super().__init__(UNAUTHORIZED_ERROR, error_message, debug_message)
@@ -156,6 +260,8 @@ class UnauthorizedException(SilverAppException):
 
 class ForbiddenException(SilverAppException):
     """Exception for forbidden access errors."""
+
+    error_code = FORBIDDEN_ERROR
     
     def __init__(self, error_message, debug_message=None):
         super().__init__(FORBIDDEN_ERROR, error_message, debug_message)
@@ -163,13 +269,51 @@ class ForbiddenException(SilverAppException):
 
 class ConflictException(SilverAppException):
     """Exception for conflict errors (e.g., duplicate resources)."""
+
+    error_code = CONFLICT_ERROR
     
     def __init__(self, error_message, debug_message=None):
         super().__init__(CONFLICT_ERROR, error_message, debug_message)
 
 
+class PayloadTooLargeException(SilverAppException):
+    """Exception for request bodies over the allowed size or row count."""
+
+    error_code = PAYLOAD_TOO_LARGE_ERROR
+    
+    def __init__(self, error_message, debug_message=None):
+        super().__init__(PAYLOAD_TOO_LARGE_ERROR, error_message, debug_message)
+
+
+class TooManyRequestsException(SilverAppException):
+    """Exception for clients over a rate limit, retry_after seconds go in error_detail and Retry-After."""
+
+    error_code = TOO_MANY_REQUESTS_ERROR
+
+    def __init__(self, error_message, retry_after, debug_message=None):
+        super().__init__(TOO_MANY_REQUESTS_ERROR, error_message, debug_message)
+        self.retry_after = retry_after
+        self.headers = {"Retry-After": str(retry_after)}
+
+    def to_dict(self, debug=True):
+        error_detail = super().to_dict(debug)
+        error_detail["retry_after"] = self.retry_after
+        return error_detail
+
+
 class ServerException(SilverAppException):
     """Exception for internal server errors."""
+
+    error_code = SERVER_ERROR
+    
+    def __init__(self, error_message, debug_message=None):
+        super().__init__(SERVER_ERROR, error_message, debug_message)
+
+
+class ServiceUnavailableException(SilverAppException):
+    """Exception for overloaded or temporarily unavailable services."""
+
+    error_code = SERVICE_UNAVAILABLE_ERROR
     
     def __init__(self, error_message, debug_message=None):
-        super().__init__(SERVER_ERROR, error_message, debug_message)
\ No newline at end of file
+        super().__init__(SERVICE_UNAVAILABLE_ERROR, error_message, debug_message)
@@ -0,0 +1,374 @@
+""" Password hashing service, pluggable hashers run off the request thread on a bounded process pool """
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt as _bcrypt
+
+from silver_app.utils.errors import ServiceUnavailableException
+from silver_app.utils.instrumentation import timed
+
+try:
+    import argon2
+except ImportError:  # argon2-cffi is optional
+    argon2 = None
+
+
+def _to_bytes(value):
+
+    if isinstance(value, str):
+        return value.encode("utf-8")
+    return value
+
+
+def _b64encode(value):
+
+    return base64.b64encode(value).rstrip(b"=")
+
+
+def _b64decode(value):
+
+    return base64.b64decode(value + b"=" * (-len(value) % 4))
+
+
+""" name -> hasher class. Every stored hash starts with a prefix that identifies its hasher and carries its own cost """
+HASHERS = {}
+
+
+def register_hasher(cls):
+
+    HASHERS[cls.name] = cls
+    return cls
+
+
+def identify_hasher(pw_hash):
+
+    pw_hash = _to_bytes(pw_hash)
+    for cls in HASHERS.values():
+        if pw_hash.startswith(cls.prefixes):
+            return cls
+    return None
+
+
+@register_hasher
+class BcryptHasher:
+    """ $2b$<rounds>$<salt+hash>, the format flask_bcrypt wrote """
+
+    name = "bcrypt"
+    prefixes = (b"$2a$", b"$2b$", b"$2y$")
+
+    def __init__(self, rounds=12, prefix="2b"):
+
+        self.rounds = rounds
+        self.prefix = _to_bytes(prefix)
+
+    def hash(self, password):
+
+        return _bcrypt.hashpw(password, _bcrypt.gensalt(rounds=self.rounds, prefix=self.prefix))
+
+    def verify(self, password, pw_hash):
+
+        return hmac.compare_digest(_bcrypt.hashpw(password, pw_hash), pw_hash)
+
+    def needs_rehash(self, pw_hash):
+
+        return int(pw_hash[4:6]) != self.rounds
+
+
+@register_hasher
+class ScryptHasher:
+    """ $scrypt$ln=<log2 n>,r=<r>,p=<p>$<salt>$<hash>, stdlib only """
+
+    name = "scrypt"
+    prefixes = (b"$scrypt$",)
+
+    def __init__(self, ln=14, r=8, p=1, salt_size=16, key_size=32):
+
+        self.ln = ln
+        self.r = r
+        self.p = p
+        self.salt_size = salt_size
+        self.key_size = key_size
+
+    def hash(self, password):
+
+        salt = os.urandom(self.salt_size)
+        key = self._derive(password, salt, self.ln, self.r, self.p, self.key_size)
+        params = f"ln={self.ln},r={self.r},p={self.p}".encode()
+        return b"$".join((b"", b"scrypt", params, _b64encode(salt), _b64encode(key)))
+
+    def verify(self, password, pw_hash):
+
+        ln, r, p, salt, key = self._parse(pw_hash)
+        return hmac.compare_digest(self._derive(password, salt, ln, r, p, len(key)), key)
+
+    def needs_rehash(self, pw_hash):
+
+        ln, r, p, _, _ = self._parse(pw_hash)
+        return (ln, r, p) != (self.ln, self.r, self.p)
+
+    @staticmethod
+    def _derive(password, salt, ln, r, p, key_size):
+
+        n = 2 ** ln
+        return hashlib.scrypt(
+            password, salt=salt, n=n, r=r, p=p, dklen=key_size, maxmem=256 * n * r * p
+        )
+
+    @staticmethod
+    def _parse(pw_hash):
+
+        _, _, params, salt, key = pw_hash.split(b"$")
+        params = dict(item.split(b"=") for item in params.split(b","))
+        return int(params[b"ln"]), int(params[b"r"]), int(params[b"p"]), _b64decode(salt), _b64decode(key)
+
+
+@register_hasher
+class Argon2Hasher:
+    """ $argon2id$v=19$m=<kib>,t=<iterations>,p=<lanes>$<salt>$<hash>, requires argon2-cffi """
+
+    name = "argon2"
+    prefixes = (b"$argon2",)
+
+    def __init__(self, time_cost=3, memory_cost=65536, parallelism=4):
+
+        if argon2 is None:
+            raise RuntimeError("The argon2 password hasher requires the argon2-cffi package")
+
+        self.time_cost = time_cost
+        self.memory_cost = memory_cost
+        self.parallelism = parallelism
+
+    def hash(self, password):
+
+        return self._hasher().hash(password).encode()
+
+    def verify(self, password, pw_hash):
+
+        try:
+            return self._hasher().verify(pw_hash, password)
+        except argon2.exceptions.VerificationError:
+            return False
+
+    def needs_rehash(self, pw_hash):
+
+        return self._hasher().check_needs_rehash(pw_hash.decode())
+
+    def _hasher(self):
+
+        """ Built per call rather than stored, so the hasher stays picklable for the process pool """
+        return argon2.PasswordHasher(
+            time_cost=self.time_cost, memory_cost=self.memory_cost, parallelism=self.parallelism
+        )
+
+
+""" Worker functions live at module level so the process pool can pickle them """
+def _hash_password(hasher, password):
+
+    return hasher.hash(password)
+
+
+def _check_password(hasher, password, pw_hash):
+
+    return hasher.verify(password, pw_hash)
+
+
+class PasswordHasher:
+    """
+    Hashes new passwords with the configured hasher and verifies stored hashes
+    with whichever registered hasher their prefix names.
+
+    With PASSWORD_HASH_POOL_SIZE = 0 hashing runs inline on the calling thread,
+    which is the old flask_bcrypt behaviour. Otherwise at most
+    pool_size + queue_size hashes are in flight; callers wait up to
+    queue_timeout seconds for a slot and then get a ServiceUnavailableException (503),
+    so a login storm cannot pin every request thread.
+    """
+
+    def __init__(self, app=None):
+
+        self.hasher = BcryptHasher()
+        self.pool_size = 0
+        self.queue_size = 0
+        self.queue_timeout = None
+
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+
+        os.register_at_fork(after_in_child=self._reset)
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+
+        scheme = app.config.get("PASSWORD_HASHER", "bcrypt")
+        options = dict(app.config.get("PASSWORD_HASHER_OPTIONS", {}).get(scheme, {}))
+        if scheme == "bcrypt":
+            options.setdefault("rounds", app.config.get("BCRYPT_LOG_ROUNDS", 12))
+
+        self.configure(
+            scheme=scheme,
+            options=options,
+            pool_size=app.config.get("PASSWORD_HASH_POOL_SIZE", 0),
+            queue_size=app.config.get("PASSWORD_HASH_QUEUE_SIZE", 0),
+            queue_timeout=app.config.get("PASSWORD_HASH_QUEUE_TIMEOUT"),
+        )
+        app.extensions["password_hasher"] = self
+
+    def configure(self, scheme="bcrypt", options=None, pool_size=0, queue_size=0, queue_timeout=None):
+
+        if scheme not in HASHERS:
+            raise ValueError(f"Unknown password hasher: {scheme}")
+
+        self.shutdown()
+        self.hasher = HASHERS[scheme](**(options or {}))
+        self.pool_size = pool_size
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(pool_size + queue_size) if pool_size else None
+
+    def generate_password_hash(self, password):
+
+        if not password:
+            raise ValueError("Password must be non-empty.")
+
+        return self._run(_hash_password, self.hasher, _to_bytes(password))
+
+    def check_password_hash(self, pw_hash, password):
+
+        if not pw_hash:
+            return False
+
+        pw_hash = _to_bytes(pw_hash)
+        hasher = self._hasher_for(pw_hash)
+        if hasher is None:
+            return False
+
+        return self._run(_check_password, hasher, _to_bytes(password), pw_hash)
+
+    async def generate_password_hash_async(self, password):
+        """ generate_password_hash for coroutines, the hash never runs on the event loop """
+
+        if not password:
+            raise ValueError("Password must be non-empty.")
+
+        return await self._run_async(_hash_password, self.hasher, _to_bytes(password))
+
+    async def check_password_hash_async(self, pw_hash, password):
+
+        if not pw_hash:
+            return False
+
+        pw_hash = _to_bytes(pw_hash)
+        hasher = self._hasher_for(pw_hash)
+        if hasher is None:
+            return False
+
+        return await self._run_async(_check_password, hasher, _to_bytes(password), pw_hash)
+
+    def needs_rehash(self, pw_hash):
+        """ True when pw_hash was made by another hasher or at another cost than the configured one """
+
+        if not pw_hash:
+            return False
+
+        pw_hash = _to_bytes(pw_hash)
+        if identify_hasher(pw_hash) is not type(self.hasher):
+            return True
+
+        return self.hasher.needs_rehash(pw_hash)
+
+    def shutdown(self, wait=True):
+
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def _hasher_for(self, pw_hash):
+
+        cls = identify_hasher(pw_hash)
+        if cls is None:
+            return None
+        if cls is type(self.hasher):
+            return self.hasher
+
+        """ Cost parameters are read back from the hash itself, so a default instance verifies fine """
+        return cls()
+
+    @timed("hash")
+    def _run(self, func, *args):
+
+        if not self.pool_size:
+            return func(*args)
+
+        slots = self._slots
+        if not slots.acquire(timeout=self.queue_timeout):
+            raise ServiceUnavailableException(
+                "Server is busy, please retry shortly",
+                lambda: f"Password hashing queue full ({self.pool_size} workers, {self.queue_size} queued)"
+            )
+
+        try:
+            future = self._get_executor().submit(func, *args)
+        except BaseException:
+            slots.release()
+            raise
+
+        future.add_done_callback(lambda _: slots.release())
+        return future.result()
+
+    @timed("hash")
+    async def _run_async(self, func, *args):
+        """
+        Pool size 0 hashes on the loop's default thread pool (bcrypt, hashlib.scrypt and
+        argon2 release the GIL). Otherwise the process pool with the same slots as _run,
+        a full queue is waited for on a thread so the loop keeps serving.
+        """
+        loop = asyncio.get_running_loop()
+        if not self.pool_size:
+            return await loop.run_in_executor(None, func, *args)
+
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            if not await loop.run_in_executor(None, slots.acquire, True, self.queue_timeout):
+                raise ServiceUnavailableException(
+                    "Server is busy, please retry shortly",
+                    lambda: f"Password hashing queue full ({self.pool_size} workers, {self.queue_size} queued)"
+                )
+
+        try:
+            future = self._get_executor().submit(func, *args)
+        except BaseException:
+            slots.release()
+            raise
+
+        future.add_done_callback(lambda _: slots.release())
+        return await asyncio.wrap_future(future)
+
+    def _get_executor(self):
+
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    """ spawn, not fork: the parent has DB connections and request threads """
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.pool_size,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+        return self._executor
+
+    def _reset(self):
+
+        self._executor = None
+        self._lock = threading.Lock()
+        if self.pool_size:
+            self._slots = threading.BoundedSemaphore(self.pool_size + self.queue_size)
@@ -0,0 +1,226 @@
+""" Per request profile: wall time, SQL statements and time, password hashing and serialization time """
+
+import functools
+import inspect
+import logging
+import time
+from collections import Counter
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+logger = logging.getLogger("silver_app.instrumentation")
+
+
+class RequestProfile:
+    """ Kept on g.profile for the length of one request, None outside requests or with instrumentation off """
+
+    __slots__ = ("started", "statements", "db_seconds", "hash_seconds", "serialize_seconds", "queries")
+
+    def __init__(self):
+
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.hash_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.queries = Counter()
+
+    def add_query(self, statement, seconds):
+
+        self.statements += 1
+        self.db_seconds += seconds
+        self.queries[statement] += 1
+
+    @property
+    def wall_seconds(self):
+
+        return time.perf_counter() - self.started
+
+    def repeated_queries(self, threshold):
+        """ Statements run at least threshold times, the usual shape of an N+1 """
+
+        if not threshold:
+            return []
+        return [(statement, count) for statement, count in self.queries.most_common() if count >= threshold]
+
+    def summary(self):
+
+        return {
+            "wall_ms": round(self.wall_seconds * 1000, 3),
+            "db_statements": self.statements,
+            "db_ms": round(self.db_seconds * 1000, 3),
+            "hash_ms": round(self.hash_seconds * 1000, 3),
+            "serialize_ms": round(self.serialize_seconds * 1000, 3),
+        }
+
+    def server_timing(self):
+
+        return ", ".join((
+            f'db;dur={self.db_seconds * 1000:.3f};desc="{self.statements} statements"',
+            f"hash;dur={self.hash_seconds * 1000:.3f}",
+            f"serialize;dur={self.serialize_seconds * 1000:.3f}",
+            f"total;dur={self.wall_seconds * 1000:.3f}",
+        ))
+
+
+def current_profile():
+
+    if not has_request_context():
+        return None
+    return g.get("profile")
+
+
+def timed(kind):
+    """
+    Decorator adding the call's duration to the request profile's <kind>_seconds.
+
+    Costs one g lookup when no profile is active. Coroutine functions are timed
+    until they return, awaits included.
+    """
+    attribute = f"{kind}_seconds"
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                profile = current_profile()
+                if profile is None:
+                    return await func(*args, **kwargs)
+
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    setattr(profile, attribute, getattr(profile, attribute) + time.perf_counter() - started)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profile = current_profile()
+            if profile is None:
+                return func(*args, **kwargs)
+
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                setattr(profile, attribute, getattr(profile, attribute) + time.perf_counter() - started)
+
+        return wrapper
+    return decorator
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+
+    if current_profile() is not None:
+        context._profile_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+
+    started = getattr(context, "_profile_started", None)
+    if started is not None:
+        profile = current_profile()
+        if profile is not None:
+            profile.add_query(statement, time.perf_counter() - started)
+
+
+class Instrumentation:
+    """
+    Profiles every request and logs one structured line per request under silver_app.instrumentation.
+
+    INSTRUMENTATION_SERVER_TIMING adds a Server-Timing header and INSTRUMENTATION_METADATA
+    a "timing" entry to success envelopes, both with the numbers known when the response
+    is built. The log line is written at teardown, so it also covers streamed bodies.
+    A statement repeated INSTRUMENTATION_N_PLUS_ONE_THRESHOLD times in one request is
+    logged as a warning.
+    """
+
+    def __init__(self, app=None):
+
+        self.enabled = False
+        self.server_timing = False
+        self.metadata = False
+        self.n_plus_one_threshold = 0
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+
+        self.enabled = app.config.get("INSTRUMENTATION_ENABLED", True)
+        self.server_timing = app.config.get("INSTRUMENTATION_SERVER_TIMING", False)
+        self.metadata = app.config.get("INSTRUMENTATION_METADATA", False)
+        self.n_plus_one_threshold = app.config.get("INSTRUMENTATION_N_PLUS_ONE_THRESHOLD", 5)
+        app.extensions["instrumentation"] = self
+
+        if not self.enabled:
+            return
+
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+        app.teardown_request(self.teardown_request)
+
+        if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+            event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+    def before_request(self):
+
+        g.profile = RequestProfile()
+
+    def after_request(self, response):
+
+        profile = g.get("profile")
+        if profile is None:
+            return response
+
+        if self.server_timing:
+            response.headers["Server-Timing"] = profile.server_timing()
+
+        if response.is_streamed:
+            """ Teardown runs before a streamed body is generated, log once the server has closed it """
+            g.profile_streamed = True
+            response.call_on_close(functools.partial(self.log, profile, self._record(), g.get("compression")))
+        return response
+
+    def teardown_request(self, exception=None):
+
+        profile = g.get("profile")
+        if profile is None or g.get("profile_streamed"):
+            return
+
+        self.log(profile, self._record(), g.get("compression"))
+        g.pop("profile")
+
+    @staticmethod
+    def _record():
+
+        return {"request_id": g.get("request_id"), "method": request.method, "endpoint": request.endpoint}
+
+    def log(self, profile, record, compression=None):
+        """ Needs no request context, streamed responses call it after theirs is gone """
+
+        if not logger.isEnabledFor(logging.WARNING):
+            return
+
+        record.update(profile.summary())
+        if compression is not None:
+            record["compression"] = compression.to_dict()
+
+        request_id = record["request_id"]
+        repeated = profile.repeated_queries(self.n_plus_one_threshold)
+        if repeated:
+            record["repeated_queries"] = len(repeated)
+            for statement, count in repeated:
+                logger.warning(
+                    "Possible N+1 in %s: statement ran %d times: %s", record["endpoint"], count, statement,
+                    extra={"request_id": request_id},
+                )
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("request", extra={"request_id": request_id, "profile": record})
@@ -0,0 +1,373 @@
+""" Persistent job queue on the jobs table, plus a per process queue for work that can run after the response """
+
+import atexit
+import datetime as dt
+import importlib
+import logging
+import os
+import queue
+import random
+import signal
+import socket
+import threading
+import time
+import uuid
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    """
+    Handlers are registered by name with @job_queue.handler(name) and get the job's
+    payload dict. Modules in JOBS_HANDLER_MODULES are imported the first time an
+    unknown name is looked up.
+
+    enqueue() adds a jobs row through CRUDMixin.save, so inside unit_of_work it
+    commits, or rolls back, with the request. Workers (`flask jobs worker`) claim due
+    rows with SELECT ... FOR UPDATE SKIP LOCKED, then mark them with a conditional
+    UPDATE, which keeps claims exclusive on databases without row locks (SQLite). A
+    handler that raises is retried JOBS_BACKOFF_BASE * 2 ** (attempts - 1) seconds
+    later, capped at JOBS_BACKOFF_MAX and jittered, until max_attempts, then the job
+    is left failed.
+
+    defer() skips the database: the handler runs on this process' job thread. If it
+    raises, or JOBS_LOCAL_QUEUE_SIZE jobs are already waiting, the job is enqueued
+    instead, and jobs still waiting at exit are enqueued too. A process that is
+    killed loses them, so use enqueue() for work that must happen. A job enqueued
+    because the queue is full never commits the caller's unsaved changes: it is
+    added to them and written when the caller commits, or lost if it rolls back.
+
+    Usage: ::
+
+        @job_queue.handler("send_welcome")
+        def send_welcome(payload):
+            ...
+
+        job_queue.enqueue("send_welcome", {"user_id": user.id}, delay=60)
+    """
+
+    def __init__(self, app=None):
+
+        self.app = None
+        self.handlers = {}
+        self.handler_modules = ()
+        self.max_attempts = 5
+        self.backoff_base = 10.0
+        self.backoff_max = 3600.0
+        self.lock_timeout = 600
+        self.retention = 7 * 24 * 3600
+        self.local_queue_size = 1000
+        self._local = None
+        self._lock = threading.Lock()
+
+        os.register_at_fork(after_in_child=self._reset)
+        atexit.register(self._persist_local)
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+
+        self.app = app
+        self.handler_modules = tuple(app.config.get("JOBS_HANDLER_MODULES", ()))
+        self.max_attempts = app.config.get("JOBS_MAX_ATTEMPTS", 5)
+        self.backoff_base = app.config.get("JOBS_BACKOFF_BASE", 10.0)
+        self.backoff_max = app.config.get("JOBS_BACKOFF_MAX", 3600.0)
+        self.lock_timeout = app.config.get("JOBS_LOCK_TIMEOUT", 600)
+        self.retention = app.config.get("JOBS_RETENTION", 7 * 24 * 3600)
+        self.local_queue_size = app.config.get("JOBS_LOCAL_QUEUE_SIZE", 1000)
+        app.extensions["job_queue"] = self
+
+    def handler(self, name):
+
+        def decorator(func):
+            self.handlers[name] = func
+            return func
+        return decorator
+
+    def get_handler(self, name):
+
+        if name not in self.handlers:
+            for module in self.handler_modules:
+                importlib.import_module(module)
+        if name not in self.handlers:
+            raise LookupError(f"No job handler named {name!r}")
+        return self.handlers[name]
+
+    def backoff(self, attempts):
+        """ Seconds before retry number attempts, between half and all of the capped exponential delay """
+
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def enqueue(self, name, payload=None, delay=0, max_attempts=None, dedupe_key=None, commit=True, **fields):
+        """ Adds a job due in delay seconds and returns it, or None if a job with dedupe_key exists. commit=False leaves the job in the session """
+
+        from silver_app.extensions import db
+        from silver_app.jobs.models import Job, utcnow
+
+        job = Job(
+            name=name,
+            payload=payload or {},
+            run_at=utcnow() + dt.timedelta(seconds=delay),
+            max_attempts=max_attempts or self.max_attempts,
+            dedupe_key=dedupe_key,
+            **fields,
+        )
+        if dedupe_key is None:
+            return job.save(commit=commit)
+
+        if db.session.scalar(select(Job.id).where(Job.dedupe_key == dedupe_key)):
+            return None
+
+        """ Another process can insert the key between the check and the insert, the savepoint keeps the rest of the transaction """
+        try:
+            with db.session.begin_nested():
+                job.save(commit=False)
+        except IntegrityError:
+            logger.info("Job %s with dedupe key %r already queued", name, dedupe_key)
+            return None
+        if commit:
+            Job._commit()
+        return job
+
+    def claim(self, worker_id, limit):
+        """ Marks up to limit due jobs as running for worker_id and returns them, in run_at order """
+
+        from silver_app.extensions import db
+        from silver_app.jobs.models import Job, utcnow
+
+        now = utcnow()
+        ids = db.session.scalars(
+            select(Job.id)
+            .where(Job.status == Job.QUEUED, Job.run_at <= now)
+            .order_by(Job.run_at, Job.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not ids:
+            db.session.rollback()
+            return []
+
+        """ Only rows still queued are taken, another worker may have claimed the rest (SQLite reads without locks) """
+        token = f"{worker_id}:{uuid.uuid4().hex[:12]}"
+        db.session.execute(
+            update(Job)
+            .where(Job.id.in_(ids), Job.status == Job.QUEUED)
+            .values(status=Job.RUNNING, locked_by=token, locked_at=now, attempts=Job.attempts + 1)
+        )
+        db.session.commit()
+        return db.session.scalars(select(Job).where(Job.locked_by == token).order_by(Job.run_at, Job.id)).all()
+
+    def run(self, job):
+        """ Runs a claimed job, returns True if it succeeded """
+
+        from silver_app.extensions import db
+        from silver_app.jobs.models import Job, utcnow
+
+        try:
+            self.get_handler(job.name)(job.payload)
+        except Exception as error:
+            db.session.rollback()
+            self._failed(job, error)
+            return False
+
+        job.status = Job.DONE
+        job.finished_at = utcnow()
+        job.locked_by = None
+        db.session.commit()
+        return True
+
+    def _failed(self, job, error):
+
+        from silver_app.extensions import db
+        from silver_app.jobs.models import Job, utcnow
+
+        job.last_error = f"{type(error).__name__}: {error}"[:2000]
+        job.locked_by = None
+        if job.attempts >= job.max_attempts:
+            job.status = Job.FAILED
+            job.finished_at = utcnow()
+            logger.error("Job %s (%s) failed after %d attempts", job.id, job.name, job.attempts, exc_info=error)
+        else:
+            job.status = Job.QUEUED
+            job.run_at = utcnow() + dt.timedelta(seconds=self.backoff(job.attempts))
+            logger.warning("Job %s (%s) failed, attempt %d of %d: %s", job.id, job.name, job.attempts, job.max_attempts, error)
+        db.session.commit()
+
+    def requeue_stale(self):
+        """
+        Queues again the running jobs whose worker has held them past JOBS_LOCK_TIMEOUT, returns how many.
+
+        A job that already used its last attempt is left failed instead, one that takes
+        its worker down with it would otherwise be claimed again forever.
+        """
+
+        from silver_app.extensions import db
+        from silver_app.jobs.models import Job, utcnow
+
+        now = utcnow()
+        cutoff = now - dt.timedelta(seconds=self.lock_timeout)
+        stale = (Job.status == Job.RUNNING, Job.locked_at < cutoff)
+        failed = db.session.execute(
+            update(Job)
+            .where(*stale, Job.attempts >= Job.max_attempts)
+            .values(status=Job.FAILED, locked_by=None, finished_at=now, last_error="Worker lock expired on the last attempt")
+        ).rowcount
+        count = db.session.execute(
+            update(Job)
+            .where(*stale, Job.attempts < Job.max_attempts)
+            .values(status=Job.QUEUED, locked_by=None, last_error="Worker lock expired")
+        ).rowcount
+        db.session.commit()
+        if failed:
+            logger.error("%d jobs failed, their worker lock expired on the last attempt", failed)
+        return count
+
+    def prune(self):
+        """ Deletes jobs that finished more than JOBS_RETENTION seconds ago, failed ones included, returns how many """
+
+        from silver_app.extensions import db
+        from silver_app.jobs.models import Job, utcnow
+
+        cutoff = utcnow() - dt.timedelta(seconds=self.retention)
+        count = db.session.execute(
+            delete(Job).where(Job.status.in_((Job.DONE, Job.FAILED)), Job.finished_at < cutoff)
+        ).rowcount
+        db.session.commit()
+        return count
+
+    def defer(self, name, payload=None):
+
+        if self._local is None:
+            with self._lock:
+                if self._local is None:
+                    self._local = queue.Queue(self.local_queue_size)
+                    threading.Thread(target=self._run_local, args=(self._local,), name="job-queue", daemon=True).start()
+
+        try:
+            self._local.put_nowait((name, payload or {}))
+        except queue.Full:
+            self._enqueue_overflow(name, payload)
+
+    def _enqueue_overflow(self, name, payload):
+        """ A caller with unsaved changes gets the job added to them, committing here would commit its half done writes """
+
+        from silver_app.extensions import db
+
+        session = db.session
+        self.enqueue(name, payload, commit=not (session.new or session.dirty or session.deleted))
+
+    def _run_local(self, local):
+
+        from silver_app.extensions import db
+
+        while True:
+            name, payload = local.get()
+            with self.app.app_context():
+                try:
+                    self.get_handler(name)(payload)
+                except Exception as error:
+                    db.session.rollback()
+                    logger.warning("Deferred job %s failed, queued for retry: %s", name, error)
+                    self.enqueue(
+                        name, payload, delay=self.backoff(1), attempts=1, last_error=f"{type(error).__name__}: {error}"[:2000],
+                    )
+
+    def _persist_local(self):
+        """ At exit, jobs still waiting in memory go to the table """
+
+        local = self._local
+        if local is None or self.app is None:
+            return
+        with self.app.app_context():
+            while True:
+                try:
+                    name, payload = local.get_nowait()
+                except queue.Empty:
+                    return
+                self.enqueue(name, payload)
+
+    def _reset(self):
+        """ The job thread does not survive a fork, a child starts its own """
+
+        self._local = None
+        self._lock = threading.Lock()
+
+
+class Worker:
+    """
+    Claims batch_size due jobs at a time and runs them one by one, sleeping
+    poll_interval (jittered, so idle workers spread their polls) when none are due.
+    Run on the main thread, SIGTERM and SIGINT stop it once the current job is
+    finished.
+    """
+
+    def __init__(self, job_queue, batch_size=10, poll_interval=1.0, worker_id=None):
+
+        self.job_queue = job_queue
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.worker_id = worker_id or f"{socket.gethostname()[:30]}:{os.getpid()}"
+        self.stopping = False
+        self.succeeded = 0
+        self.failed = 0
+
+    def stop(self, *args):
+
+        self.stopping = True
+
+    def run(self, once=False, max_jobs=None):
+        """ Until stopped, or with once until nothing is due, or until max_jobs jobs have run """
+
+        if threading.current_thread() is threading.main_thread():
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(sig, self.stop)
+
+        while not self.stopping:
+            ran = self.run_batch(max_jobs)
+            if max_jobs is not None and self.succeeded + self.failed >= max_jobs:
+                break
+            if not ran:
+                if once:
+                    break
+                time.sleep(self.poll_interval * random.uniform(0.5, 1.5))
+
+    def run_batch(self, max_jobs=None):
+
+        from silver_app.extensions import db
+
+        limit = self.batch_size
+        if max_jobs is not None:
+            limit = min(limit, max_jobs - self.succeeded - self.failed)
+
+        jobs = self.job_queue.claim(self.worker_id, limit)
+        for index, job in enumerate(jobs):
+            if self.stopping:
+                """ Hand the rest of the batch back rather than waiting for JOBS_LOCK_TIMEOUT """
+                self._release(jobs[index:])
+                break
+            if self.job_queue.run(job):
+                self.succeeded += 1
+            else:
+                self.failed += 1
+
+        """ A fresh session per batch, so the identity map does not grow with every job run """
+        db.session.remove()
+        return len(jobs)
+
+    @staticmethod
+    def _release(jobs):
+
+        from silver_app.extensions import db
+        from silver_app.jobs.models import Job
+
+        for job in jobs:
+            job.status = Job.QUEUED
+            job.locked_by = None
+            job.attempts -= 1
+        db.session.commit()
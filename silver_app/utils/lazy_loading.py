@@ -0,0 +1,54 @@
+""" LAZY_LOADING: blueprints routed from a static table, their views module imported by the first request that needs it """
+
+import importlib
+
+import click
+from flask import Blueprint
+from flask.cli import ScriptInfo
+
+
+class LazyView:
+    """
+    Stands in for the view function name of module import_name until it is first called.
+
+    The import runs under Python's import lock, so concurrent first requests import
+    the module once and then all call the same view.
+    """
+
+    def __init__(self, import_name, name):
+
+        self.import_name = import_name
+        self.__name__ = name
+        self.view = None
+
+    def resolve(self):
+
+        if self.view is None:
+            module = importlib.import_module(self.import_name)
+            view = getattr(module, self.__name__, None)
+            if view is None:
+                raise RuntimeError(f"{self.import_name} has no view {self.__name__}, the package's ROUTES are out of date")
+            self.view = view
+        return self.view
+
+    def __call__(self, *args, **kwargs):
+
+        return (self.view or self.resolve())(*args, **kwargs)
+
+
+def register_lazy_blueprint(app, name, package):
+    """
+    Registers blueprint name with a LazyView per entry of package.ROUTES, (rule, endpoint, methods)
+    tuples that must match what package.views registers on its blueprint.
+    """
+    blueprint = Blueprint(name, package.__name__)
+    for rule, endpoint, methods in package.ROUTES:
+        blueprint.add_url_rule(rule, endpoint, LazyView(f"{package.__name__}.views", endpoint), methods=list(methods))
+    app.register_blueprint(blueprint)
+
+
+def running_flask_cli():
+    """ True while the flask command builds the app, db migrate and shell need every model and extension loaded """
+
+    context = click.get_current_context(silent=True)
+    return context is not None and context.find_object(ScriptInfo) is not None
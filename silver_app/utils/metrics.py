@@ -0,0 +1,460 @@
+""" In-process Prometheus metrics: sharded counters and histograms, mmap files for multi-process servers """
+
+import bisect
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import weakref
+
+from flask import current_app, g, request
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Sharded:
+    """
+    Per thread dicts of label values -> numbers, so recording never takes a lock.
+
+    The registry of shards is only locked when a thread records its first sample and
+    when it exits: its shard is then folded into the retired totals and dropped, so
+    memory is bounded by the live threads and label sets, not by every thread that
+    ever recorded. Readers sum the shards; a sample landing mid read shows up in the
+    next scrape. A forked child starts with empty shards instead of re-reporting its
+    parent's counts.
+    """
+
+    def __init__(self, name, documentation, labelnames):
+
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.reset()
+        os.register_at_fork(after_in_child=self.reset)
+
+    def reset(self):
+
+        self._local = threading.local()
+        self._shards = {}
+        self._retired = {}
+        self._lock = threading.Lock()
+
+    def _shard(self):
+
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            """ Thread locals are cleared when their thread ends, which collects owner and fires the finalizer """
+            owner = self._local.owner = _ShardOwner()
+            with self._lock:
+                self._shards[id(owner)] = shard
+            weakref.finalize(owner, self._retire, self._shards, id(owner))
+            return shard
+
+    def _retire(self, shards, key):
+
+        with self._lock:
+            shard = shards.pop(key, None)
+            """ A shard from before a fork belongs to the parent's counts """
+            if shard is None or shards is not self._shards:
+                return
+            for labels, value in shard.items():
+                self._merge(self._retired, labels, value)
+
+    def _totals(self):
+        """ {labels: value} over the live shards and the retired totals """
+
+        with self._lock:
+            shards = list(self._shards.values())
+            totals = {}
+            for labels, value in self._retired.items():
+                self._merge(totals, labels, value)
+        for shard in shards:
+            for labels, value in list(shard.items()):
+                self._merge(totals, labels, value)
+        return totals
+
+
+class _ShardOwner:
+    """ Weak referenceable stand-in for a thread, see _Sharded._shard """
+
+    __slots__ = ("__weakref__",)
+
+
+class Counter(_Sharded):
+
+    type = "counter"
+
+    def inc(self, labels, amount=1):
+        """ labels is a tuple of values in labelnames order """
+
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    @staticmethod
+    def _merge(totals, labels, value):
+
+        totals[labels] = totals.get(labels, 0) + value
+
+    def samples(self):
+
+        for labels, value in self._totals().items():
+            yield self.name, self.labelnames, labels, value
+
+
+class Histogram(_Sharded):
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames, buckets=DEFAULT_BUCKETS):
+
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, labels, value):
+
+        shard = self._shard()
+        counts = shard.get(labels)
+        if counts is None:
+            """ One slot per bucket plus +Inf, then the running sum """
+            counts = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    @staticmethod
+    def _merge(totals, labels, counts):
+
+        total = totals.get(labels)
+        if total is None:
+            totals[labels] = list(counts)
+        else:
+            for index, count in enumerate(counts):
+                total[index] += count
+
+    def samples(self):
+
+        bucket_labelnames = self.labelnames + ("le",)
+        bounds = [_format_float(bound) for bound in self.buckets] + ["+Inf"]
+        for labels, counts in self._totals().items():
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                yield f"{self.name}_bucket", bucket_labelnames, labels + (bound,), cumulative
+            yield f"{self.name}_count", self.labelnames, labels, cumulative
+            yield f"{self.name}_sum", self.labelnames, labels, counts[-1]
+
+
+class CallbackGauge:
+    """ Read at collection time from a callable returning {label values tuple: value} """
+
+    type = "gauge"
+
+    def __init__(self, name, documentation, labelnames, callback):
+
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+
+    def samples(self):
+
+        for labels, value in self.callback().items():
+            yield self.name, self.labelnames, labels, value
+
+
+class MmapValues:
+    """
+    Append-only file of (key, float64) entries, one per process, values overwritten in place.
+
+    Layout follows prometheus_client's multiprocess files: 4 bytes of used size, 4 of
+    padding, then per entry a 4 byte key length, the key padded to 8 bytes and the value.
+    Aligned 8 byte writes mean readers see a whole old or new value, never a torn one.
+    """
+
+    INITIAL_SIZE = 1 << 16
+
+    def __init__(self, path):
+
+        self.path = path
+        self._positions = {}
+        self._file = open(path, "a+b")
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._file.truncate(self.INITIAL_SIZE)
+        self._capacity = os.fstat(self._file.fileno()).st_size
+        self._mmap = mmap.mmap(self._file.fileno(), self._capacity)
+        self._used = struct.unpack_from("i", self._mmap, 0)[0] or 8
+        for key, _, position in self._entries(self._mmap, self._used):
+            self._positions[key] = position
+
+    @staticmethod
+    def _entries(data, used):
+
+        position = 8
+        while position < used:
+            key_length = struct.unpack_from("i", data, position)[0]
+            key_end = position + 4 + key_length
+            key = data[position + 4:key_end].decode()
+            value_position = key_end + (-(4 + key_length) % 8)
+            yield key, struct.unpack_from("d", data, value_position)[0], value_position
+            position = value_position + 8
+
+    def write(self, key, value):
+
+        position = self._positions.get(key)
+        if position is None:
+            position = self._append(key)
+        struct.pack_into("d", self._mmap, position, value)
+
+    def _append(self, key):
+
+        encoded = key.encode()
+        padded = encoded + b" " * (-(4 + len(encoded)) % 8)
+        entry_size = 4 + len(padded) + 8
+        while self._used + entry_size > self._capacity:
+            self._capacity *= 2
+            self._mmap.close()
+            self._file.truncate(self._capacity)
+            self._mmap = mmap.mmap(self._file.fileno(), self._capacity)
+
+        struct.pack_into(f"i{len(padded)}sd", self._mmap, self._used, len(encoded), padded, 0.0)
+        position = self._used + 4 + len(padded)
+        self._used += entry_size
+        struct.pack_into("i", self._mmap, 0, self._used)
+        self._positions[key] = position
+        return position
+
+    @classmethod
+    def read(cls, path):
+
+        with open(path, "rb") as file:
+            data = file.read()
+        if len(data) < 8:
+            return []
+        return [(key, value) for key, value, _ in cls._entries(data, struct.unpack_from("i", data, 0)[0])]
+
+
+class MetricsRegistry:
+    """
+    Request counters and latency histograms labeled by blueprint, endpoint, status_code
+    (and error_code for the counter), plus login / row cache gauges, served on /metrics.
+
+    With METRICS_MULTIPROC_DIR set, each worker process writes its totals to
+    metrics_<pid>.db in that directory at most every METRICS_FLUSH_INTERVAL seconds
+    (and before it answers a scrape), and /metrics adds up every worker's file.
+    Counters and histograms of workers that have exited stay in the totals, their
+    gauges are left out. Empty the directory when the server starts.
+    """
+
+    def __init__(self, app=None):
+
+        self.enabled = False
+        self.metrics = []
+        self.multiproc_dir = None
+        self.flush_interval = 1.0
+        self._values = None
+        self._values_pid = None
+        self._next_flush = 0.0
+
+        self.requests = self.register(Counter(
+            "http_requests_total", "HTTP requests handled",
+            ("blueprint", "endpoint", "status_code", "error_code"),
+        ))
+        self.latency = self.register(Histogram(
+            "http_request_duration_seconds", "Time from before_request to after_request",
+            ("blueprint", "endpoint", "status_code"),
+        ))
+
+        if app is not None:
+            self.init_app(app)
+
+    def register(self, metric):
+
+        self.metrics.append(metric)
+        return metric
+
+    def init_app(self, app):
+
+        self.enabled = app.config.get("METRICS_ENABLED", True)
+        self.multiproc_dir = app.config.get("METRICS_MULTIPROC_DIR")
+        self.flush_interval = app.config.get("METRICS_FLUSH_INTERVAL", 1.0)
+        buckets = app.config.get("METRICS_BUCKETS")
+        if buckets:
+            self.latency.buckets = tuple(sorted(buckets))
+        app.extensions["metrics"] = self
+        self._register_cache_gauges(app)
+
+        if not self.enabled:
+            return
+
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+        app.add_url_rule(app.config.get("METRICS_PATH", "/metrics"), "metrics", self.metrics_view)
+
+    def _register_cache_gauges(self, app):
+
+        names = {metric.name for metric in self.metrics}
+
+        login_cache = app.extensions.get("login_cache")
+        if login_cache is not None and "login_cache_hits" not in names:
+            for stat in ("hits", "misses", "evictions", "size"):
+                self.register(CallbackGauge(
+                    f"login_cache_{stat}", f"Login cache {stat}, per username cache", ("cache",),
+                    lambda stat=stat: {(cache,): stats[stat] for cache, stats in login_cache.stats().items()},
+                ))
+
+        row_cache = app.extensions.get("row_cache")
+        if row_cache is not None and "row_cache_hits" not in names:
+            for stat in ("hits", "misses"):
+                self.register(CallbackGauge(
+                    f"row_cache_{stat}", f"Row cache {stat}", (),
+                    lambda stat=stat: {(): row_cache.stats()[stat]} if stat in row_cache.stats() else {},
+                ))
+
+        rate_limiter = app.extensions.get("rate_limiter")
+        if rate_limiter is not None and "rate_limit_rejections" not in names:
+            self.register(CallbackGauge(
+                "rate_limit_rejections", "Requests refused with a 429, by limit", ("scope", "key"),
+                lambda: dict(rate_limiter.stats()["rejected"]),
+            ))
+
+        structured_logging = app.extensions.get("logging")
+        if structured_logging is not None and "log_records_dropped" not in names:
+            self.register(CallbackGauge(
+                "log_records_dropped", "Log records not written, by reason", ("reason",),
+                lambda: {
+                    (stat[len("dropped_"):],): value
+                    for stat, value in structured_logging.stats().items() if stat.startswith("dropped_")
+                },
+            ))
+
+    """
+    Each LocalProxy hop costs about as much as the recording itself, so the hooks
+    resolve request once and only look at g for error responses.
+    """
+    def before_request(self):
+
+        request._get_current_object().metrics_started = time.perf_counter()
+
+    def after_request(self, response):
+
+        current = request._get_current_object()
+        started = current.__dict__.get("metrics_started")
+        if started is not None:
+            blueprint = current.blueprint or "app"
+            endpoint = current.endpoint or "unmatched"
+            status_code = response.status_code
+            status = str(status_code)
+            error_code = g.get("error_code", "") if status_code >= 400 else ""
+            self.requests.inc((blueprint, endpoint, status, error_code))
+            self.latency.observe((blueprint, endpoint, status), time.perf_counter() - started)
+
+            if self.multiproc_dir and time.monotonic() >= self._next_flush:
+                self.flush()
+        return response
+
+    def samples(self):
+        """ (name, labelnames, labels, value) for this process """
+
+        for metric in self.metrics:
+            yield from metric.samples()
+
+    def flush(self):
+        """ Write this process' totals to its file in METRICS_MULTIPROC_DIR """
+
+        pid = os.getpid()
+        if self._values_pid != pid:
+            self._values = MmapValues(os.path.join(self.multiproc_dir, f"metrics_{pid}.db"))
+            self._values_pid = pid
+
+        for name, labelnames, labels, value in self.samples():
+            self._values.write(json.dumps([name, labelnames, labels]), value)
+        self._next_flush = time.monotonic() + self.flush_interval
+
+    def collect(self):
+        """ {(name, labelnames, labels): value}, summed over every worker in multi-process mode """
+
+        if not self.multiproc_dir:
+            return {(name, labelnames, labels): value for name, labelnames, labels, value in self.samples()}
+
+        self.flush()
+        gauges = {metric.name for metric in self.metrics if metric.type == "gauge"}
+        totals = {}
+        for path in glob.glob(os.path.join(self.multiproc_dir, "metrics_*.db")):
+            """ Counts of an exited worker still add to the totals, its gauges describe a process that is gone """
+            live = _pid_alive(int(os.path.basename(path)[len("metrics_"):-len(".db")]))
+            for key, value in MmapValues.read(path):
+                name, labelnames, labels = json.loads(key)
+                if not live and name in gauges:
+                    continue
+                key = (name, tuple(labelnames), tuple(labels))
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def render(self):
+        """ Prometheus text exposition format 0.0.4 """
+
+        families = {}
+        for (name, labelnames, labels), value in self.collect().items():
+            families.setdefault(self._family(name), []).append((name, labelnames, labels, value))
+
+        lines = []
+        for metric in self.metrics:
+            samples = families.get(metric.name)
+            if not samples:
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labelnames, labels, value in sorted(samples, key=_sample_order):
+                label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(labelnames, labels))
+                lines.append(f"{name}{{{label_text}}} {_format_float(value)}" if label_text else f"{name} {_format_float(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _family(self, name):
+
+        for suffix in ("_bucket", "_count", "_sum"):
+            if name.endswith(suffix) and any(m.name == name[:-len(suffix)] for m in self.metrics):
+                return name[:-len(suffix)]
+        return name
+
+    def metrics_view(self):
+
+        return current_app.response_class(self.render(), mimetype=None, content_type=CONTENT_TYPE)
+
+
+def _pid_alive(pid):
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:  # Exists, owned by another user
+        return True
+    return True
+
+
+def _sample_order(sample):
+
+    name, _, labels, _ = sample
+    """ Histogram buckets of one label set stay together and in le order """
+    return (labels[:-1] if name.endswith("_bucket") else labels, name, float(labels[-1]) if name.endswith("_bucket") else 0)
+
+
+def _escape(value):
+
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_float(value):
+
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
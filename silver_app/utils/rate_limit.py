@@ -0,0 +1,264 @@
+""" Sliding window rate limits per client IP and per view argument, in a sharded in-process store or Redis """
+
+import asyncio
+import functools
+import inspect
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+
+from flask import request
+
+from silver_app.utils.errors import TooManyRequestsException
+
+
+logger = logging.getLogger(__name__)
+
+
+def retry_after(previous, current, offset, window, limit):
+    """
+    0 if one more hit fits, else whole seconds until it does.
+
+    Sliding window counter: the previous fixed window's count weighted by how much
+    of it the sliding window still covers, plus the current window's count.
+    """
+    if previous * (1 - offset / window) + current + 1 <= limit:
+        return 0
+    if current + 1 > limit:
+        """ Blocked until the next window, and longer while the previous one (this one, then) still weighs enough """
+        wait = window - offset + (window * (1 - (limit - 1) / current) if current else 0)
+    else:
+        wait = window * (1 - (limit - 1 - current) / previous) - offset
+    return max(1, math.ceil(wait))
+
+
+class LocalRateLimitBackend:
+    """
+    Per process counters, RATELIMIT_STORAGE = "memory".
+
+    Keys are spread over shards, each a dict with its own lock, so concurrent checks
+    of different keys rarely wait for each other. Each shard keeps at most
+    max_keys / shards keys: when full, keys whose windows have passed are dropped,
+    then the oldest.
+    """
+
+    blocking = False
+
+    def __init__(self, shards=16, max_keys=100000, clock=time.monotonic):
+
+        self.clock = clock
+        self.max_per_shard = max(1, max_keys // shards)
+        self.shards = [({}, threading.Lock()) for _ in range(shards)]
+
+    def hit(self, key, limit, window):
+        """ Counts the hit and returns 0, or returns retry_after seconds and counts nothing """
+
+        index, offset = divmod(self.clock(), window)
+        counts, lock = self.shards[hash(key) % len(self.shards)]
+        with lock:
+            entry = counts.get(key)
+            if entry is None:
+                previous = current = 0
+            elif entry[0] == index:
+                previous, current = entry[2], entry[1]
+            else:
+                previous, current = (entry[1] if entry[0] == index - 1 else 0), 0
+
+            if previous * (1 - offset / window) + current + 1 > limit:
+                return retry_after(previous, current, offset, window, limit)
+
+            if entry is None:
+                if len(counts) >= self.max_per_shard:
+                    self._evict(counts, index)
+                counts[key] = [index, 1, 0]
+            else:
+                entry[:] = (index, current + 1, previous)
+            return 0
+
+    def release(self, key, window):
+        """ Takes back a hit counted in the current window """
+
+        index = self.clock() // window
+        counts, lock = self.shards[hash(key) % len(self.shards)]
+        with lock:
+            entry = counts.get(key)
+            if entry is not None and entry[0] == index and entry[1] > 0:
+                entry[1] -= 1
+
+    def _evict(self, counts, index):
+
+        for key in [key for key, entry in counts.items() if entry[0] < index - 1]:
+            del counts[key]
+        if len(counts) >= self.max_per_shard:
+            del counts[next(iter(counts))]
+
+    def clear(self):
+
+        for counts, lock in self.shards:
+            with lock:
+                counts.clear()
+
+    def stats(self):
+
+        return {"keys": sum(len(counts) for counts, _ in self.shards)}
+
+
+class RedisRateLimitBackend:
+    """
+    Shared between processes and hosts, RATELIMIT_STORAGE = "redis". Requires the redis package.
+
+    One counter per key and fixed window, expiring after two windows. Reading and
+    counting are two round trips, so concurrent hits can overshoot a limit by a few.
+    While Redis is unreachable every hit is allowed, logins keep working.
+    """
+
+    """ Network round trips, coroutine views check in a worker thread """
+    blocking = True
+
+    def __init__(self, url, key_prefix="silver_app:ratelimit:"):
+
+        import redis
+
+        self.client = redis.Redis.from_url(url, socket_timeout=0.1)
+        self.errors = redis.RedisError
+        self.key_prefix = key_prefix
+
+    def hit(self, key, limit, window):
+
+        index, offset = divmod(time.time(), window)
+        current_key = f"{self.key_prefix}{key}:{int(index)}"
+        previous_key = f"{self.key_prefix}{key}:{int(index) - 1}"
+        try:
+            previous, current = (int(value or 0) for value in self.client.mget(previous_key, current_key))
+            wait = retry_after(previous, current, offset, window, limit)
+            if not wait:
+                pipeline = self.client.pipeline(transaction=False)
+                pipeline.incr(current_key)
+                pipeline.expire(current_key, math.ceil(2 * window))
+                pipeline.execute()
+            return wait
+        except self.errors:
+            logger.warning("Rate limit store unavailable, allowing %s", key, exc_info=True)
+            return 0
+
+    def release(self, key, window):
+
+        try:
+            self.client.decr(f"{self.key_prefix}{key}:{int(time.time() // window)}")
+        except self.errors:
+            logger.warning("Rate limit store unavailable, %s keeps its hit", key, exc_info=True)
+
+    def clear(self):
+
+        for key in self.client.scan_iter(self.key_prefix + "*"):
+            self.client.delete(key)
+
+    def stats(self):
+
+        return {}
+
+
+def create_rate_limit_backend(config):
+
+    storage = config.get("RATELIMIT_STORAGE", "memory")
+    if storage == "memory":
+        return LocalRateLimitBackend(shards=config.get("RATELIMIT_SHARDS", 16), max_keys=config.get("RATELIMIT_MAX_KEYS", 100000))
+    if storage == "redis":
+        return RedisRateLimitBackend(config["RATELIMIT_REDIS_URL"])
+
+    raise ValueError(f"Unsupported RATELIMIT_STORAGE: {storage}")
+
+
+class RateLimiter:
+    """
+    RATELIMIT_RULES maps a scope to {key name: (hits, seconds)}. "ip" is the client
+    address (behind a proxy, set PROXY_FIX_X_FOR so it is the client's), any other name
+    is the view keyword argument of that name, lowercased. A hit over any of its
+    scope's limits raises TooManyRequestsException (429 with Retry-After) before the
+    view runs; a rejected hit is not counted, the limits it passed take it back.
+    Coroutine views check a blocking backend (Redis) in a
+    worker thread, the in-process store on the event loop.
+
+    Usage: ::
+
+        @blueprint.route("/api/user/login", methods=["POST"])
+        @use_kwargs(user_schema)
+        @rate_limiter.limit("login")
+        @success_response_decorator("Login successful")
+        def login_user(username, password, **kwargs):
+            ...
+    """
+
+    def __init__(self, app=None):
+
+        self.enabled = True
+        self.rules = {}
+        self.backend = LocalRateLimitBackend()
+        self.rejected = defaultdict(int)
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+
+        self.enabled = app.config.get("RATELIMIT_ENABLED", True)
+        self.rules = {
+            scope: tuple((name, f"{scope}:{name}:", limit, window) for name, (limit, window) in rules.items())
+            for scope, rules in app.config.get("RATELIMIT_RULES", {}).items()
+        }
+        self.backend = create_rate_limit_backend(app.config)
+        self.rejected.clear()
+        app.extensions["rate_limiter"] = self
+
+    def limit(self, scope):
+
+        def decorator(func):
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    if self.enabled:
+                        if self.backend.blocking:
+                            await asyncio.to_thread(self.check, scope, kwargs)
+                        else:
+                            self.check(scope, kwargs)
+                    return await func(*args, **kwargs)
+
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if self.enabled:
+                    self.check(scope, kwargs)
+                return func(*args, **kwargs)
+
+            return wrapper
+        return decorator
+
+    def check(self, scope, arguments):
+
+        counted = []
+        for name, prefix, limit, window in self.rules.get(scope, ()):
+            if name == "ip":
+                value = request.remote_addr
+            else:
+                value = arguments.get(name)
+                value = value if value is None else str(value).lower()
+            if value is None:
+                continue
+
+            wait = self.backend.hit(prefix + value, limit, window)
+            if wait:
+                for key, counted_window in counted:
+                    self.backend.release(key, counted_window)
+                self.rejected[(scope, name)] += 1
+                raise TooManyRequestsException(
+                    "Too many attempts, try again later", wait,
+                    lambda: f"{scope} limit of {limit} per {window}s by {name} reached",
+                )
+            counted.append((prefix + value, window))
+
+    def stats(self):
+
+        return {"rejected": dict(self.rejected), **self.backend.stats()}
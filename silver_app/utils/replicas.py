@@ -0,0 +1,74 @@
+""" Read replica routing: plain SELECTs go to a replica until the session writes, then everything stays on the primary """
+
+import random
+
+from flask import current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql import Select
+
+
+class ReplicaRouter:
+    """
+    Registers SQLALCHEMY_REPLICA_URIS as the binds replica_0, replica_1, ... so
+    Flask-SQLAlchemy builds them with SQLALCHEMY_ENGINE_OPTIONS and disposes them with
+    the app. Has to run before db.init_app. No replicas, or SQLALCHEMY_REPLICA_READS
+    off, leaves every query on the primary.
+    """
+
+    def __init__(self, app=None):
+
+        self.enabled = False
+        self.bind_keys = ()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+
+        uris = app.config.get("SQLALCHEMY_REPLICA_URIS") or []
+        self.bind_keys = tuple(f"replica_{index}" for index in range(len(uris)))
+        binds = dict(app.config.get("SQLALCHEMY_BINDS") or {})
+        binds.update(zip(self.bind_keys, uris))
+        app.config["SQLALCHEMY_BINDS"] = binds
+
+        self.enabled = bool(uris) and app.config.get("SQLALCHEMY_REPLICA_READS", True)
+        app.extensions["replica_router"] = self
+
+    def choose(self, engines):
+
+        return engines[random.choice(self.bind_keys)]
+
+
+class RoutingSession(Session):
+    """
+    db.session class sending reads to one replica per session, so one per request.
+
+    A SELECT on the default bind goes to the replica, unless it runs inside
+    database.use_primary(). Anything else, a flush, SELECT ... FOR UPDATE, INSERT /
+    UPDATE / DELETE or a text() statement, goes to the primary and keeps the session
+    there for the rest of its life: a request reads its own writes (CRUDMixin.save
+    included), and a request that only reads never touches the primary.
+    """
+
+    def __init__(self, db, **kwargs):
+
+        super().__init__(db, **kwargs)
+        router = current_app.extensions.get("replica_router")
+        self._router = router if router is not None and router.enabled else None
+        self._replica = None
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if self._router is None or bind is not None or engine is not self._db.engines.get(None):
+            return engine
+
+        if self._flushing or not isinstance(clause, Select) or clause._for_update_arg is not None:
+            self.info["primary"] = True
+            return engine
+        if self.info.get("primary") or self.info.get("use_primary"):
+            return engine
+
+        if self._replica is None:
+            self._replica = self._router.choose(self._db.engines)
+        return self._replica
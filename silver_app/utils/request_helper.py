@@ -1,9 +1,90 @@
+import os
+import re
+import threading
+import time
 import uuid
 import datetime as dt
 
 
 
-def generate_request_id():
+""" Crockford base32, what ULIDs are written in, as a table of every 10 bit character pair """
+_CROCKFORD = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_CROCKFORD_PAIRS = [a + b for a in _CROCKFORD for b in _CROCKFORD]
+_PAIR_SHIFTS = range(120, -1, -10)  # 13 pairs = 130 bits, the top 2 are always zero
+
+""" Incoming X-Request-ID values are only reused when they are this tame, anything else gets a fresh ID """
+_VALID_REQUEST_ID = re.compile(r"[A-Za-z0-9._:-]{1,128}")
+
+
+class MonotonicIdGenerator:
+    """
+    128 bit IDs: a 48 bit Unix millisecond timestamp followed by random_bits of randomness.
+
+    The random part is drawn fresh every millisecond and incremented for each further
+    ID within it, so IDs from one process sort strictly in creation order, even if the
+    wall clock steps back. Another process draws its own random part, so its IDs in the
+    same millisecond land elsewhere in an 80 (or 74) bit space. A forked child starts
+    over instead of continuing the parent's sequence.
+    """
+
+    def __init__(self, random_bits=80):
+
+        self.random_bits = random_bits
+        self._random_bytes = (random_bits + 7) // 8
+        self._random_mask = (1 << random_bits) - 1
+        self.reset()
+        os.register_at_fork(after_in_child=self.reset)
+
+    def reset(self):
+
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._random = 0
+
+    def _fresh_random(self):
+
+        return int.from_bytes(os.urandom(self._random_bytes), "big") & self._random_mask
+
+    def next(self):
+        """ (milliseconds, random) for the next ID """
+
+        now_ms = time.time_ns() // 1_000_000
+        with self._lock:
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._random = self._fresh_random()
+            else:
+                self._random += 1
+                if self._random > self._random_mask:
+                    # Exhausted this millisecond, borrow the next one
+                    self._last_ms += 1
+                    self._random = self._fresh_random()
+            return self._last_ms, self._random
+
+
+_ulid_generator = MonotonicIdGenerator(random_bits=80)
+_uuid7_generator = MonotonicIdGenerator(random_bits=74)
+
+
+def generate_ulid():
+    """ 26 character Crockford base32 ULID, sorts lexicographically by time """
+
+    ms, random = _ulid_generator.next()
+    value = (ms << 80) | random
+    return "".join([_CROCKFORD_PAIRS[(value >> shift) & 0x3FF] for shift in _PAIR_SHIFTS])
+
+
+def generate_uuid7():
+    """ RFC 9562 UUIDv7 string, the 74 random bits are incremented within a millisecond """
+
+    ms, random = _uuid7_generator.next()
+    value = (ms << 80) | (0x7 << 76) | ((random >> 62) << 64) | (0b10 << 62) | (random & 0x3FFFFFFFFFFFFFFF)
+    h = f"{value:032x}"
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+def generate_legacy_request_id():
+    """ req_<date>_<time>_<24 random bits>, only unique for light traffic """
 
     now = dt.datetime.now(dt.timezone.utc)
 
@@ -12,7 +93,26 @@ def generate_request_id():
     random_part = uuid.uuid4().hex[:6]
 
     request_id = f"req_{timestamp}_{random_part}"
-    
+
     return request_id
 
 
+REQUEST_ID_MODES = {
+    "ulid": lambda: "req_" + generate_ulid(),
+    "uuid7": generate_uuid7,
+    "legacy": generate_legacy_request_id,
+}
+
+
+def generate_request_id(mode="ulid"):
+    """ New request ID in REQUEST_ID_MODE format: "ulid" (req_<ULID>), "uuid7" or "legacy" """
+
+    return REQUEST_ID_MODES[mode]()
+
+
+def incoming_request_id(value):
+    """ Caller supplied request ID worth keeping for tracing, or None """
+
+    if value and _VALID_REQUEST_ID.fullmatch(value):
+        return value
+    return None
@@ -1,9 +1,14 @@
 """ Contains standardizd responese """
 
-from flask import g, request, jsonify
+from flask import g, request, jsonify, current_app, stream_with_context
 import datetime as dt
 import functools
+import hashlib
+import inspect
 from flask_jwt_extended import set_access_cookies
+from silver_app import database
+from silver_app.utils.errors import HTTP_ERROR_DETAILS, INTERNAL_SERVER_ERROR, METHOD_NOT_ALLOWED, ServerException, ValidationException
+from silver_app.utils.instrumentation import current_profile
 
 def success_response(data, message="", status_code= 200, metadata = None, cookies = None):
     """
@@ -33,10 +38,14 @@ def success_response(data, message="", status_code= 200, metadata = None, cookie
     """
     metadata = metadata or {}
 
+    profile = current_profile()
+    if profile is not None and current_app.extensions["instrumentation"].metadata:
+        metadata = dict(metadata, timing=profile.summary())
+
     request_id =  getattr(g, "request_id", "unknown")
 
     blueprint_name = request.blueprint if request.blueprint else "app"
-    timestamp = dt.datetime.now(dt.timezone.utc).isoformat().replace('+00:00', 'Z')
+    timestamp = dt.datetime.now(dt.timezone.utc)
     response_dict = {
         "success": True,
         "api_version": "v1",
@@ -60,7 +69,91 @@ def success_response(data, message="", status_code= 200, metadata = None, cookie
 
 
 
-def success_response_decorator(message="", status_code=200):
+def streaming_response(rows, message="", status_code=200, metadata=None, data_key="items", fmt="json"):
+    """
+    Generate a standardized success response that streams rows instead of building them in memory.
+
+    Rows are serialized one at a time as the client reads, so memory stays flat no matter
+    how many there are. Pair with a yield_per query to keep the database side flat too.
+
+    Args:
+        rows: Iterable of JSON-serializable dicts, consumed lazily
+        message: Success message (default: empty string)
+        status_code: HTTP status code (default: 200)
+        metadata: Additional metadata dict, sent in the trailer with the row "count" (default: empty dict)
+        data_key: Key of the row list inside "data" (default: "items")
+        fmt: "json" for one chunked envelope, "ndjson" for one JSON document per line
+
+    Response format (json), same envelope as success_response:
+        {"success": true, ..., "data": {"<data_key>": [ row, row, ... ]}, "metadata": {..., "count": 2}, "status_code": 200}
+
+    Response format (ndjson):
+        {"success": true, "api_version": "v1", ..., "message": "..."}
+        { row }
+        { row }
+        {"metadata": {..., "count": 2}, "status_code": 200}
+    """
+    metadata = dict(metadata or {})
+    dumps = functools.partial(current_app.json.dumps, separators=(",", ":"))
+
+    header = {
+        "success": True,
+        "api_version": "v1",
+        "blueprint": request.blueprint if request.blueprint else "app",
+        "timestamp": dt.datetime.now(dt.timezone.utc),
+        "request_id": getattr(g, "request_id", "unknown"),
+        "message": message,
+    }
+
+    def generate_json():
+        yield dumps(header)[:-1] + ',"data":{' + dumps(data_key) + ':['
+        count = 0
+        for row in rows:
+            yield ("," if count else "") + dumps(row)
+            count += 1
+        metadata["count"] = count
+        yield ']},"metadata":' + dumps(metadata) + ',"status_code":' + str(status_code) + '}'
+
+    def generate_ndjson():
+        yield dumps(header) + "\n"
+        count = 0
+        for row in rows:
+            yield dumps(row) + "\n"
+            count += 1
+        metadata["count"] = count
+        yield dumps({"metadata": metadata, "status_code": status_code}) + "\n"
+
+    if fmt == "ndjson":
+        body, mimetype = generate_ndjson(), "application/x-ndjson"
+    else:
+        body, mimetype = generate_json(), "application/json"
+
+    return current_app.response_class(stream_with_context(body), status=status_code, mimetype=mimetype)
+
+
+
+def compute_etag(value):
+    """
+    Strong ETag for a serialized payload (bytes) or a version key (anything str() identifies).
+
+    The endpoint is hashed in, so two routes sharing a version key never share a validator.
+    """
+    if not isinstance(value, bytes):
+        value = str(value).encode()
+    return hashlib.blake2b(request.endpoint.encode() + b"\0" + value, digest_size=16).hexdigest()
+
+
+
+def not_modified_response(etag):
+    """ Empty 304 carrying the validator, no envelope is built or serialized """
+
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    return response
+
+
+
+def success_response_decorator(message="", status_code=200, unit_of_work=False, etag=None):
 
 
     """
@@ -73,6 +166,14 @@ def success_response_decorator(message="", status_code=200):
     Args:
         message: Success message for the response
         status_code: HTTP status code (default: 200)
+        unit_of_work: Run the view inside database.unit_of_work(), so all of its
+            CRUDMixin writes share one commit (default: False)
+        etag: Conditional GET / HEAD support (default: None, off)
+            - True: the ETag is a hash of the serialized data payload. A matching
+              If-None-Match still runs the view, but answers 304 without the envelope
+            - callable: called with the view's arguments before the view, returns a
+              cheap version key (e.g. a row's version or updated_at) or None to skip.
+              A matching If-None-Match answers 304 without running the view at all
     
     Usage:
         @success_response_decorator("Users retrieved successfully")
@@ -85,12 +186,17 @@ def success_response_decorator(message="", status_code=200):
             users = fetch_users(page)
             metadata = {"page": page, "total": 100}
             return (users, metadata)  # Data + metadata
+
+        @success_response_decorator("User retrieved", etag=lambda user_id: User.get_by_id(user_id).version)
+        def get_user(user_id):
+            ...
+
+    async def views get the same treatment, their etag callable may be async too.
     """
     def decorator(func):
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            result = func(*args, **kwargs)
-            
+
+        def envelope(result, tag):
+
             # Ensure result is a tuple
             if not isinstance(result, tuple):
                 raise ValueError(f"View function '{func.__name__}' must return a tuple of length 1 or 2")
@@ -101,16 +207,62 @@ def success_response_decorator(message="", status_code=200):
                 metadata = {}
                 cookies=None
             elif len(result) == 2:
-                data = result[0],
-    
-                metadata = result[1],
+                data, metadata = result
                 cookies=None
             elif len(result) == 3:
                 data, metadata, cookies = result
             else:
                 raise ValueError(f"View function '{func.__name__}' must return a tuple of length 1, 2, or 3, got length {len(result)}")
-            
-            return success_response(data, message, status_code, metadata, cookies)
+
+            if etag is True and request.method in ("GET", "HEAD"):
+                tag = compute_etag(current_app.json.dumps(data).encode())
+                if request.if_none_match.contains_weak(tag):
+                    return not_modified_response(tag)
+
+            response = success_response(data, message, status_code, metadata, cookies)
+            if tag is not None:
+                response.set_etag(tag)
+            return response
+
+        def version_tag(key):
+            """ (tag, matches If-None-Match) for an etag callable's key """
+            if key is None:
+                return None, False
+            tag = compute_etag(key)
+            return tag, request.if_none_match.contains_weak(tag)
+
+        if inspect.iscoroutinefunction(func):
+            """ Async views, and an async etag callable, are awaited. They manage their own async_db sessions """
+            if unit_of_work:
+                raise TypeError("unit_of_work wraps db.session, async views commit their async_db session themselves")
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                tag = None
+                if callable(etag) and request.method in ("GET", "HEAD"):
+                    key = etag(*args, **kwargs)
+                    tag, matched = version_tag(await key if inspect.isawaitable(key) else key)
+                    if matched:
+                        return not_modified_response(tag)
+
+                return envelope(await func(*args, **kwargs), tag)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tag = None
+            if callable(etag) and request.method in ("GET", "HEAD"):
+                tag, matched = version_tag(etag(*args, **kwargs))
+                if matched:
+                    return not_modified_response(tag)
+
+            if unit_of_work:
+                with database.unit_of_work():
+                    result = func(*args, **kwargs)
+            else:
+                result = func(*args, **kwargs)
+            return envelope(result, tag)
         
         return wrapper
     return decorator
@@ -126,7 +278,7 @@ def error_response(exception):
         exception: SilverAppException object containing error details
     
     Returns:
-        tuple: (jsonified_response, status_code)
+        tuple: (jsonified_response, status_code), plus the exception's headers if it has any
     
     Response format:
         {
@@ -139,35 +291,39 @@ def error_response(exception):
                 "error_code": "VALIDATION_ERROR",
                 "error_type": "validation",
                 "error_message": "Username is required",
-                "debug_message": "Field 'username' cannot be empty"
+                "debug_message": "Field 'username' cannot be empty"  # Only with ERROR_DEBUG_MESSAGES
             },
             "status_code": 400
         }
     """
-    # Get request ID from Flask g (same as success responses)
-    request_id = getattr(g, 'request_id', 'unknown')
-    
-    # Get blueprint name, fallback to "app"
-    blueprint_name = request.blueprint if request.blueprint else "app"
-    
-    # Generate response timestamp in ISO format
-    timestamp = dt.datetime.now(dt.timezone.utc).isoformat().replace('+00:00', 'Z')
-    
-    # Get error details from exception object
-    error_detail = exception.to_dict()
-    
+    error_detail = exception.to_dict(debug=current_app.config.get("ERROR_DEBUG_MESSAGES", True))
+    if exception.headers:
+        return (*error_envelope(error_detail, exception.status_code), exception.headers)
+    return error_envelope(error_detail, exception.status_code)
+
+
+
+def error_envelope(error_detail, status_code):
+    """ error_response from a ready error_detail dict, the HTTP error handler passes preallocated ones """
+
+    # Request ID and error code live on g, resolved once rather than per attribute
+    flask_g = g._get_current_object()
+    flask_g.error_code = error_detail["error_code"]
+
+    blueprint_name = request.blueprint
+
     # Build standardized error response structure
     response_dict = {
         "success": False,
-        "error_id": request_id,  # Same as request_id for tracing
+        "error_id": getattr(flask_g, "request_id", "unknown"),  # Same as request_id for tracing
         "api_version": "v1",
-        "blueprint": blueprint_name,
-        "timestamp": timestamp,
+        "blueprint": blueprint_name if blueprint_name else "app",
+        "timestamp": dt.datetime.now(dt.timezone.utc),  # The JSON provider writes it as ISO 8601 with Z
         "error_detail": error_detail,
-        "status_code": exception.status_code
+        "status_code": status_code
     }
     
-    return jsonify(response_dict), exception.status_code
+    return jsonify(response_dict), status_code
 
 
 
@@ -193,9 +349,13 @@ def handle_http_exception(error):
     """
     Handle HTTP exceptions and convert to standardized format.
     
-    Maps common HTTP status codes to appropriate SilverAppException types
-    using the centralized HTTP_ERROR_MAP from errors.py.
-    Falls back to ServerException for unmapped status codes.
+    Maps common HTTP status codes to their preallocated error_detail from
+    HTTP_ERROR_DETAILS in errors.py. Unmapped status codes get a SERVER_ERROR
+    detail but keep their own status. No exception object is built, and the debug
+    message is only formatted when ERROR_DEBUG_MESSAGES is on.
+
+    webargs' parse errors become a ValidationException with the field messages
+    in error_detail["errors"], sent with webargs' status (422).
     
     Args:
         error: Flask's HTTPException object
@@ -203,28 +363,31 @@ def handle_http_exception(error):
     Returns:
         Standardized error response
     """
+    messages = (getattr(error, "data", None) or {}).get("messages")
+    if messages:
+        """ Keyed by location, one location unwrapped: {"user": {"username": [...]}} rather than {"json": {...}} """
+        if len(messages) == 1:
+            messages = next(iter(messages.values()))
+        exception = ValidationException(
+            HTTP_ERROR_DETAILS[error.code]["error_message"] if error.code in HTTP_ERROR_DETAILS else "Invalid request data",
+            lambda: f"HTTP {error.code}: {error.description}",
+            errors=messages,
+        )
+        exception.status_code = error.code
+        return error_response(exception)
 
-    print("http error")
-    from silver_app.utils.errors import (
-        SilverAppException, HTTP_ERROR_MAP, SERVER_ERROR
-    )
-    
-    # Get mapping for this HTTP status code
-    if error.code in HTTP_ERROR_MAP:
-        error_mapping = HTTP_ERROR_MAP[error.code]
-        error_code = error_mapping["error_code"]
-        error_message = error_mapping["error_message"]
-        debug_message = f"HTTP {error.code}: {error.description}"
-    else:
+    error_detail = HTTP_ERROR_DETAILS.get(error.code)
+    if error_detail is None:
         # Fallback for any unmapped HTTP status codes
-        error_code = SERVER_ERROR
-        error_message = f"HTTP {error.code} error occurred"
-        debug_message = f"HTTP {error.code}: {error.description}"
-    
-    # Create the appropriate exception
-    exception = SilverAppException(error_code, error_message, debug_message)
-    
-    return error_response(exception)
+        error_detail = dict(HTTP_ERROR_DETAILS[INTERNAL_SERVER_ERROR], error_message=f"HTTP {error.code} error occurred")
+
+    if current_app.config.get("ERROR_DEBUG_MESSAGES", True):
+        error_detail = dict(error_detail, debug_message=f"HTTP {error.code}: {error.description}")
+
+    response, status_code = error_envelope(error_detail, error.code)
+    if error.code == METHOD_NOT_ALLOWED and error.valid_methods:
+        response.headers["Allow"] = ", ".join(error.valid_methods)
+    return response, status_code
 
 
 def handle_generic_exception(error):
@@ -232,6 +395,7 @@ def handle_generic_exception(error):
     Handle any unhandled exceptions and convert to standardized format.
     
     This is a catch-all for any exceptions that don't have specific handlers.
+    The traceback goes to the app logger, the client only sees it with debug output on.
     
     Args:
         error: Any Python exception
@@ -239,10 +403,10 @@ def handle_generic_exception(error):
     Returns:
         Standardized error response
     """
-    from silver_app.utils.errors import ServerException
-    
+    current_app.logger.exception("Unhandled exception")
+
     exception = ServerException(
         "An unexpected error occurred",
-        f"Unhandled exception: {type(error).__name__}: {str(error)}"
+        lambda: f"Unhandled exception: {type(error).__name__}: {str(error)}"
     )
-    return error_response(exception)
\ No newline at end of file
+    return error_response(exception)
@@ -0,0 +1,81 @@
+""" Cold start profile: imports, create_app and the first request, measured in a fresh interpreter """
+
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+import silver_app
+
+
+""" Runs in the child, argv: config import path, request path, method. The result is its last stdout line """
+PROBE = """
+import importlib, json, sys, time
+started = time.perf_counter()
+from silver_app.app import create_app
+imported = time.perf_counter()
+module, _, name = sys.argv[1].rpartition(".")
+app = create_app(getattr(importlib.import_module(module), name))
+created = time.perf_counter()
+status = app.test_client().open(sys.argv[2], method=sys.argv[3]).status_code
+finished = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "first_request_ms": (finished - created) * 1000,
+    "status": status,
+}))
+"""
+
+
+def parse_importtime(output):
+    """ (module, self_us, cumulative_us) for each "import time:" line of python -X importtime's stderr """
+
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():  # The header line
+            continue
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def package_totals(modules):
+    """ Self time summed per top level package, in us """
+
+    totals = defaultdict(int)
+    for name, self_us, _ in modules:
+        totals[name.split(".", 1)[0]] += self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def profile_startup(config, path="/", method="GET", lazy=None):
+    """
+    One cold start of create_app(config) and a first request to path, in a new
+    python -X importtime process (which adds a little to every import). lazy
+    overrides LAZY_LOADING. The total is the child's wall time, interpreter start
+    up included.
+    """
+    env = dict(os.environ)
+    if lazy is not None:
+        env["LAZY_LOADING"] = "1" if lazy else "0"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(silver_app.__file__)))
+
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE, config, path, method],
+        cwd=root, env=env, capture_output=True, text=True,
+    )
+    total_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        errors = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError("Startup probe failed:\n" + "\n".join(errors[-20:]))
+
+    profile = json.loads(result.stdout.strip().splitlines()[-1])
+    profile["total_ms"] = total_ms
+    profile["modules"] = parse_importtime(result.stderr)
+    return profile
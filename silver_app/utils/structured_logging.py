@@ -0,0 +1,258 @@
+""" Non-blocking JSON logging: request threads only enqueue, a background listener formats and writes """
+
+import atexit
+import datetime as dt
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+import zlib
+
+from flask import g, has_request_context
+from flask.logging import default_handler
+
+
+""" Attributes every LogRecord has, anything else on a record came in through extra= """
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def _extras(record):
+
+    return {key: value for key, value in record.__dict__.items() if key not in _RECORD_ATTRIBUTES}
+
+
+class JSONFormatter(logging.Formatter):
+    """ One JSON object per line: ts, level, logger, message, request_id, extra= fields, exc_info """
+
+    def format(self, record):
+
+        entry = {
+            "ts": dt.datetime.fromtimestamp(record.created, dt.timezone.utc).isoformat().replace("+00:00", "Z"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(_extras(record))
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """ Human readable line, extra= fields appended as JSON """
+
+    def __init__(self):
+
+        super().__init__("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+
+    def format(self, record):
+
+        line = super().format(record)
+        extras = {key: value for key, value in _extras(record).items() if key != "request_id"}
+        return f"{line} {json.dumps(extras, default=str)}" if extras else line
+
+
+class RequestIdFilter(logging.Filter):
+    """ Stamps g.request_id on records, handler filters run on the calling thread so g is still the request's """
+
+    def filter(self, record):
+
+        if getattr(record, "request_id", None) is None:
+            record.request_id = g.get("request_id") if has_request_context() else None
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps LOG_SAMPLE_RATES[level] of the records at each level.
+
+    The decision hashes the request_id, so a sampled request keeps all of its lines
+    and a dropped one loses all of them. Records outside requests are sampled at random.
+    """
+
+    def __init__(self, rates):
+
+        super().__init__()
+        self.thresholds = {
+            logging.getLevelName(level): int(rate * 10000) for level, rate in rates.items() if rate < 1
+        }
+        self.dropped = 0
+
+    def filter(self, record):
+
+        threshold = self.thresholds.get(record.levelno)
+        if threshold is None:
+            return True
+
+        request_id = getattr(record, "request_id", None)
+        bucket = zlib.crc32(request_id.encode()) % 10000 if request_id else random.randrange(10000)
+        if bucket < threshold:
+            return True
+        self.dropped += 1
+        return False
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    At most LOG_RATE_LIMITS[level] records per second and process at each level.
+
+    Counts per one second window without a lock, so a race can let a record or two
+    past the limit but never blocks. The first record of the next window reports how
+    many were suppressed.
+    """
+
+    def __init__(self, limits, clock=time.monotonic):
+
+        super().__init__()
+        self.limits = {logging.getLevelName(level): limit for level, limit in limits.items() if limit is not None}
+        self.clock = clock
+        self.windows = {}
+        self.dropped = 0
+
+    def filter(self, record):
+
+        limit = self.limits.get(record.levelno)
+        if limit is None:
+            return True
+
+        second = int(self.clock())
+        window, count, suppressed = self.windows.get(record.levelno, (second, 0, 0))
+        if window != second:
+            if suppressed:
+                record.suppressed = suppressed
+            window, count, suppressed = second, 0, 0
+
+        if count < limit:
+            self.windows[record.levelno] = (window, count + 1, suppressed)
+            return True
+
+        self.windows[record.levelno] = (window, count, suppressed + 1)
+        self.dropped += 1
+        return False
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """ Drops the record, and counts it, when the queue is full instead of waiting for the writer """
+
+    def __init__(self, log_queue):
+
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record):
+        """
+        Merges args into the message on the calling thread, arguments may change once
+        the request moves on. Tracebacks stay objects and are formatted by the writer.
+        """
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class DrainingQueueListener(logging.handlers.QueueListener):
+    """ Waits for room for the stop sentinel, a full queue would otherwise fail stop() at exit """
+
+    def enqueue_sentinel(self):
+
+        self.queue.put(self._sentinel)
+
+
+class StructuredLogging:
+    """
+    Routes the silver_app logger tree (app.logger included) through a bounded queue.
+
+    Request threads run the filters and a put_nowait, nothing else: formatting and
+    the write to LOG_STREAM / LOG_FILE happen on the listener thread, so a slow disk
+    or stdout only fills the queue, and a full queue drops records rather than
+    blocking. The listener is restarted in forked workers and drained at exit.
+    """
+
+    LOGGER_NAME = "silver_app"
+
+    def __init__(self, app=None):
+
+        self.handler = None
+        self.listener = None
+        self.sampling = None
+        self.rate_limit = None
+        self.output_handlers = []
+
+        os.register_at_fork(after_in_child=self._restart_after_fork)
+        atexit.register(self.stop)
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+
+        app.extensions["logging"] = self
+        if not app.config.get("LOG_ENABLED", True):
+            return
+
+        self.stop()
+        logger = logging.getLogger(self.LOGGER_NAME)
+        if self.handler is not None:
+            logger.removeHandler(self.handler)
+
+        if app.config.get("LOG_FILE"):
+            output = logging.handlers.WatchedFileHandler(app.config["LOG_FILE"])
+        else:
+            output = logging.StreamHandler(sys.stderr if app.config.get("LOG_STREAM") == "stderr" else sys.stdout)
+        output.setFormatter(JSONFormatter() if app.config.get("LOG_FORMAT", "json") == "json" else TextFormatter())
+        self.output_handlers = [output]
+
+        self.sampling = SamplingFilter(app.config.get("LOG_SAMPLE_RATES", {}))
+        self.rate_limit = RateLimitFilter(app.config.get("LOG_RATE_LIMITS", {}))
+        self.handler = NonBlockingQueueHandler(queue.Queue(app.config.get("LOG_QUEUE_SIZE", 10000)))
+        self.handler.addFilter(RequestIdFilter())
+        self.handler.addFilter(self.sampling)
+        self.handler.addFilter(self.rate_limit)
+
+        logger.addHandler(self.handler)
+        logger.setLevel(app.config.get("LOG_LEVEL", "INFO"))
+        logger.propagate = False
+        app.logger.removeHandler(default_handler)
+
+        self.start()
+
+    def start(self):
+
+        self.listener = DrainingQueueListener(self.handler.queue, *self.output_handlers)
+        self.listener.start()
+
+    def stop(self):
+        """ Writes out everything still queued """
+
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def _restart_after_fork(self):
+
+        """ The listener thread does not survive fork, and the queue's locks may be held by it """
+        if self.handler is not None:
+            self.listener = None
+            self.handler.queue = queue.Queue(self.handler.queue.maxsize)
+            self.start()
+
+    def stats(self):
+
+        if self.handler is None:
+            return {}
+        return {
+            "queued": self.handler.queue.qsize(),
+            "dropped_queue_full": self.handler.dropped,
+            "dropped_rate_limited": self.rate_limit.dropped,
+            "dropped_sampled_out": self.sampling.dropped,
+        }
@@ -0,0 +1,60 @@
+""" Shared fixtures: a fresh app per test on its own SQLite file, so worker threads and async views see the same data """
+
+import pytest
+from sqlalchemy import event
+
+from silver_app.app import create_app
+from silver_app.extensions import db
+from silver_app.settings import TestConfig
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """ create_app with TestConfig plus overrides, tables created """
+
+    def make(**settings):
+        settings.setdefault("SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'test.db'}")
+        app = create_app(type("Config", (TestConfig,), settings))
+        with app.app_context():
+            """ The default bind only, replicas get their tables from replication. db keeps every bind it has seen """
+            db.create_all(bind_key=None)
+        return app
+
+    return make
+
+
+@pytest.fixture
+def app(make_app):
+
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+
+    return app.test_client()
+
+
+def register(client, username="alice", password="secret-pass", email=None):
+
+    return client.post("/api/user/register", json={
+        "user": {"username": username, "email": email or f"{username}@example.com", "password": password},
+    })
+
+
+def login(client, username="alice", password="secret-pass", **environ_base):
+
+    return client.post("/api/user/login", json={"user": {"username": username, "password": password}}, environ_base=environ_base)
+
+
+@pytest.fixture
+def queries(app):
+    """ SQL statements run on the app's engine while the test runs """
+
+    statements = []
+    with app.app_context():
+        engine = db.engine
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    yield statements
+    event.remove(engine, "before_cursor_execute", listener)
@@ -0,0 +1,176 @@
+import asyncio
+import json
+import threading
+from http.cookies import SimpleCookie
+
+import pytest
+
+pytest.importorskip("asgiref")
+pytest.importorskip("aiosqlite")
+
+from silver_app.asgi import create_asgi_app
+from silver_app.extensions import async_db, db, login_cache, password_hasher, row_cache, user_versions
+from silver_app.settings import TestConfig
+from silver_app.user.models import User
+from silver_app.utils.hashing import ScryptHasher, identify_hasher
+
+
+class ASGIClient:
+    """ Sends requests straight to the ASGI app, keeping cookies, all on the running event loop """
+
+    def __init__(self, asgi):
+
+        self.asgi = asgi
+        self.cookies = {}
+
+    async def request(self, method, path, body=None, headers=None):
+
+        payload = json.dumps(body).encode() if body is not None else b""
+        sent_headers = [(b"content-length", str(len(payload)).encode())]
+        if body is not None:
+            sent_headers.append((b"content-type", b"application/json"))
+        if self.cookies:
+            sent_headers.append((b"cookie", "; ".join(f"{k}={v}" for k, v in self.cookies.items()).encode()))
+        sent_headers += [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+        scope = {
+            "type": "http", "method": method, "path": path, "query_string": b"", "root_path": "", "scheme": "http",
+            "http_version": "1.1", "headers": sent_headers, "server": ("localhost", 80), "client": ("127.0.0.1", 5000),
+        }
+
+        async def receive():
+            return {"type": "http.request", "body": payload, "more_body": False}
+
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        await self.asgi(scope, receive, send)
+        start = messages[0]
+        response_headers = [(name.decode(), value.decode()) for name, value in start["headers"]]
+        for name, value in response_headers:
+            if name == "set-cookie":
+                for morsel in SimpleCookie(value).values():
+                    self.cookies[morsel.key] = morsel.value
+        data = b"".join(message.get("body", b"") for message in messages[1:])
+        return start["status"], dict(response_headers), json.loads(data) if data else None
+
+
+@pytest.fixture
+def asgi(tmp_path):
+
+    class Config(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        CACHE_TYPE = "simple"
+
+    dispatcher = create_asgi_app(Config)
+    with dispatcher.app.app_context():
+        db.create_all(bind_key=None)
+    yield dispatcher
+    password_hasher.configure(scheme="bcrypt", options={"rounds": 4})
+
+
+def run(asgi, scenario):
+
+    async def main():
+        try:
+            return await scenario(ASGIClient(asgi))
+        finally:
+            await async_db.dispose()
+
+    return asyncio.run(main())
+
+
+async def register_and_login(client, password="secret-pass"):
+
+    status, _, _ = await client.request("POST", "/api/user/register", {
+        "user": {"username": "alice", "email": "alice@example.com", "password": password},
+    })
+    assert status == 201
+    client.cookies.clear()
+    return await client.request("POST", "/api/user/login", {"user": {"username": "alice", "password": password}})
+
+
+def test_async_login_and_profile(asgi):
+
+    async def scenario(client):
+        status, _, body = await register_and_login(client)
+        assert status == 200
+        assert body["data"]["user"]["username"] == "alice"
+
+        status, headers, body = await client.request("GET", "/api/user")
+        assert status == 200
+        assert body["data"]["user"]["email"] == "alice@example.com"
+
+        status, _, body = await client.request("GET", "/api/user", headers={"If-None-Match": headers["etag"]})
+        assert (status, body) == (304, None)
+
+        status, _, body = await client.request("POST", "/api/user/login", {"user": {"username": "alice", "password": "nope"}})
+        assert status == 401
+        assert body["error_detail"]["error_code"] == "UNAUTHORIZED_ERROR"
+
+    assert asyncio.iscoroutinefunction(asgi.app.view_functions["user.login_user"])
+    run(asgi, scenario)
+
+
+def test_async_rehash_invalidates_off_the_event_loop(asgi, monkeypatch):
+
+    async def scenario(client):
+        status, _, _ = await client.request("POST", "/api/user/register", {
+            "user": {"username": "alice", "email": "alice@example.com", "password": "secret-pass"},
+        })
+        assert status == 201
+        with asgi.app.app_context():
+            User.get_by_id(1)
+        assert row_cache.get(User, 1) is not None
+
+        password_hasher.configure(scheme="scrypt", options={"ln": 4, "r": 8, "p": 1})
+        loop_thread = threading.current_thread()
+        deleted_on = []
+        delete = row_cache.backend.delete
+        monkeypatch.setattr(row_cache.backend, "delete", lambda key: deleted_on.append(threading.current_thread()) or delete(key))
+
+        status, _, _ = await client.request("POST", "/api/user/login", {"user": {"username": "alice", "password": "secret-pass"}})
+        assert status == 200
+        assert deleted_on and loop_thread not in deleted_on
+        return True
+
+    assert run(asgi, scenario)
+
+    assert row_cache.get(User, 1) is None
+    assert login_cache.get("alice") is None
+    assert user_versions.get("1") == 2
+    with asgi.app.app_context():
+        user = db.session.get(User, 1)
+        assert user.version == 2
+        assert identify_hasher(user.password) is ScryptHasher
+
+
+def test_async_login_accepts_a_password_set_on_another_worker(asgi):
+
+    async def scenario(client):
+        status, _, _ = await register_and_login(client)
+        assert status == 200
+        with asgi.app.app_context():
+            db.session.execute(db.update(User).values(
+                password=password_hasher.generate_password_hash("changed-pass"), version=User.version + 1,
+            ))
+            db.session.commit()
+        assert login_cache.get("alice") is not None
+
+        status, _, _ = await client.request("POST", "/api/user/login", {"user": {"username": "alice", "password": "changed-pass"}})
+        assert status == 200
+
+    run(asgi, scenario)
+
+
+def test_async_views_see_the_proxy_fixed_address(tmp_path):
+
+    class Config(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        PROXY_FIX_X_FOR = 1
+
+    dispatcher = create_asgi_app(Config)
+    environ = dispatcher.proxy_fix({"REMOTE_ADDR": "10.0.0.9", "HTTP_X_FORWARDED_FOR": "203.0.113.1"})
+
+    assert environ["REMOTE_ADDR"] == "203.0.113.1"
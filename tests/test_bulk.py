@@ -0,0 +1,66 @@
+import pytest
+
+from silver_app.extensions import db, row_cache
+from silver_app.task.models import Task
+from silver_app.user.models import User
+
+
+@pytest.fixture
+def app(make_app):
+
+    return make_app(CACHE_TYPE="simple")
+
+
+def make_user():
+
+    return User("alice", "alice@example.com").save()
+
+
+def test_bulk_create_is_one_statement_per_chunk(app, queries):
+
+    with app.app_context():
+        user = make_user()
+        queries.clear()
+
+        Task.bulk_create(({"title": f"task {n}", "user_id": user.id} for n in range(25)), chunk_size=10)
+
+        assert len([statement for statement in queries if statement.startswith("INSERT")]) == 3
+        assert db.session.scalar(db.select(db.func.count(Task.id)).where(Task.status == "pending")) == 25
+
+
+def test_bulk_create_returns_ids_in_order(app):
+
+    with app.app_context():
+        user = make_user()
+        ids = Task.bulk_create(
+            ({"title": f"task {n}", "user_id": user.id} for n in range(25)), chunk_size=10, return_ids=True,
+        )
+
+        assert [Task.get_by_id(record_id).title for record_id in ids] == [f"task {n}" for n in range(25)]
+
+
+def test_bulk_update_and_delete_invalidate(app):
+
+    with app.app_context():
+        user = make_user()
+        ids = Task.bulk_create(({"title": f"task {n}", "user_id": user.id} for n in range(5)), return_ids=True)
+        Task.get_many_by_ids(ids)
+        assert row_cache.get(Task, ids[0]) is not None
+
+        assert Task.bulk_update(ids[:3], status="done") == 3
+        assert row_cache.get(Task, ids[0]) is None
+        db.session.remove()
+        assert [task.status for task in Task.get_many_by_ids(ids)] == ["done"] * 3 + ["pending"] * 2
+
+        assert Task.bulk_delete(ids[3:]) == 2
+        db.session.remove()
+        assert [task.id for task in Task.get_many_by_ids(ids)] == ids[:3]
+
+
+def test_bulk_update_moves_versions(app):
+
+    with app.app_context():
+        user_id = make_user().id
+        User.bulk_update([user_id], email="new@example.com")
+        db.session.remove()
+        assert db.session.get(User, user_id).version == 2
@@ -0,0 +1,81 @@
+import gzip
+import json
+import zlib
+
+import pytest
+from flask import Response, request
+
+from silver_app.utils.responses import success_response_decorator
+
+
+@pytest.fixture
+def app(make_app):
+
+    app = make_app(COMPRESS_ALGORITHMS=["gzip"], COMPRESS_MIN_SIZE=500, COMPRESS_STREAM_FLUSH_SIZE=1000)
+
+    @app.route("/items/<int:count>")
+    @success_response_decorator("ok", etag=lambda count: count)
+    def items(count):
+        return ([{"id": n, "title": f"item {n}"} for n in range(count)],)
+
+    @app.route("/stream")
+    def stream():
+        return Response((json.dumps({"id": n}) + "\n" for n in range(2000)), mimetype="application/x-ndjson")
+
+    return app
+
+
+def test_large_json_is_gzipped(client):
+
+    response = client.get("/items/200", headers={"Accept-Encoding": "gzip, deflate"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.vary
+    assert len(json.loads(gzip.decompress(response.get_data()))["data"]) == 200
+    assert response.get_etag()[1] is True
+
+
+def test_small_or_unaccepted_bodies_are_sent_as_they_are(client):
+
+    for path, accept in (("/items/1", "gzip"), ("/items/200", "identity"), ("/items/200", "gzip;q=0")):
+        response = client.get(path, headers={"Accept-Encoding": accept})
+        assert "Content-Encoding" not in response.headers
+        assert response.json["success"] is True
+        assert response.get_etag()[1] is False
+
+
+def test_304_carries_the_weak_validator(client):
+
+    tag = client.get("/items/200", headers={"Accept-Encoding": "gzip"}).get_etag()[0]
+
+    response = client.get("/items/200", headers={"Accept-Encoding": "gzip", "If-None-Match": f'W/"{tag}"'})
+
+    assert response.status_code == 304
+    assert response.get_etag() == (tag, True)
+
+
+def test_stream_is_compressed_and_flushed_as_it_goes(client):
+
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    chunks = [chunk for chunk in response.response if chunk]
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert len(chunks) > 10
+
+    decompressor = zlib.decompressobj(31)
+    """ Everything but the trailer decodes to whole lines, a client is not kept waiting for the end """
+    flushed = b"".join(decompressor.decompress(chunk) for chunk in chunks[:-1])
+    assert flushed.endswith(b"\n") and flushed.count(b"\n") > 1900
+    body = flushed + decompressor.decompress(chunks[-1])
+    assert body.decode().splitlines() == [json.dumps({"id": n}) for n in range(2000)]
+
+def test_server_preference_breaks_ties(make_app):
+
+    app = make_app(COMPRESS_ALGORITHMS=["zstd", "br", "gzip"])
+    compressor = app.extensions["response_compressor"]
+    names = [codec.name for codec in compressor.codecs]
+
+    with app.test_request_context(headers={"Accept-Encoding": "gzip, br, zstd"}):
+        assert compressor.negotiate(request.accept_encodings).name == names[0]
+    with app.test_request_context(headers={"Accept-Encoding": "gzip, br;q=0.5, zstd;q=0.5"}):
+        assert compressor.negotiate(request.accept_encodings).name == "gzip"
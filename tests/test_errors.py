@@ -0,0 +1,139 @@
+import pytest
+from flask import abort
+
+from silver_app.utils.errors import (
+    CONFLICT_ERROR, NOT_FOUND_ERROR, ConflictException, NotFoundException, SilverAppException,
+    TooManyRequestsException, ValidationException,
+)
+
+
+@pytest.fixture
+def app(make_app):
+
+    app = make_app()
+
+    @app.route("/raise/<kind>")
+    def raise_(kind):
+        if kind == "conflict":
+            raise ConflictException("Taken", lambda: "username 'alice' exists")
+        if kind == "validation":
+            raise ValidationException("Invalid", errors={"title": ["Missing data for required field."]})
+        if kind == "throttled":
+            raise TooManyRequestsException("Slow down", retry_after=7)
+        if kind == "teapot":
+            abort(418)
+        raise RuntimeError("boom")
+
+    return app
+
+
+def test_subclasses_resolve_status_and_type_once():
+
+    error = NotFoundException("Gone")
+
+    assert (error.error_code, error.status_code, error.error_type) == (NOT_FOUND_ERROR, 404, "server")
+    assert "status_code" not in vars(error)
+    assert SilverAppException(CONFLICT_ERROR, "Taken").status_code == 409
+
+    with pytest.raises(ValueError):
+        type("Bad", (SilverAppException,), {"error_code": "NOPE"})
+
+
+def test_debug_message_is_only_built_when_sent():
+
+    calls = []
+    error = ConflictException("Taken", lambda: calls.append(1) or "details")
+
+    assert "debug_message" not in error.to_dict(debug=False)
+    assert calls == []
+    assert error.to_dict()["debug_message"] == "details"
+    assert error.to_dict()["debug_message"] == "details"
+    assert calls == [1]
+
+
+def test_raised_exception_envelope(client):
+
+    response = client.get("/raise/conflict")
+
+    assert response.status_code == 409
+    assert response.json["success"] is False
+    assert response.json["error_id"] == response.headers["X-Request-ID"]
+    assert response.json["status_code"] == 409
+    assert response.json["error_detail"] == {
+        "error_code": "CONFLICT_ERROR", "error_type": "validation", "error_message": "Taken",
+        "debug_message": "username 'alice' exists",
+    }
+
+
+def test_validation_errors_and_retry_after(client):
+
+    assert client.get("/raise/validation").json["error_detail"]["errors"] == {"title": ["Missing data for required field."]}
+
+    response = client.get("/raise/throttled")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "7"
+    assert response.json["error_detail"]["retry_after"] == 7
+
+
+def test_http_errors_use_the_envelope(client):
+
+    response = client.get("/nowhere")
+
+    assert response.status_code == 404
+    assert response.json["error_detail"]["error_code"] == "NOT_FOUND_ERROR"
+    assert response.json["error_detail"]["debug_message"].startswith("HTTP 404: ")
+
+
+def test_method_not_allowed_is_a_405(client):
+
+    response = client.get("/api/user/login")
+
+    assert response.status_code == 405
+    assert response.json["status_code"] == 405
+    assert response.json["error_detail"]["error_code"] == "METHOD_NOT_ALLOWED_ERROR"
+    assert "POST" in response.headers["Allow"]
+
+
+def test_invalid_body_is_a_422_with_field_messages(client):
+
+    response = client.post("/api/user/login", json={"user": {"username": 123, "password": "x"}})
+
+    assert response.status_code == 422
+    assert response.json["status_code"] == 422
+    assert response.json["error_detail"]["error_code"] == "VALIDATION_ERROR"
+    assert response.json["error_detail"]["errors"] == {"username": ["Not a valid string."]}
+
+
+def test_unmapped_http_error_keeps_its_status(client):
+
+    response = client.get("/raise/teapot")
+
+    assert response.status_code == 418
+    assert response.json["status_code"] == 418
+    assert response.json["error_detail"]["error_message"] == "HTTP 418 error occurred"
+
+
+def test_unhandled_exception_is_a_500(client):
+
+    response = client.get("/raise/other")
+
+    assert response.status_code == 500
+    assert response.json["error_detail"]["error_code"] == "SERVER_ERROR"
+    assert response.json["error_detail"]["debug_message"] == "Unhandled exception: RuntimeError: boom"
+
+
+def test_debug_messages_off(make_app):
+
+    client = make_app(ERROR_DEBUG_MESSAGES=False).test_client()
+
+    assert "debug_message" not in client.get("/nowhere").json["error_detail"]
+
+
+def test_missing_and_invalid_jwt_are_401_envelopes(client):
+
+    assert client.get("/api/user").json["error_detail"]["error_code"] == "UNAUTHORIZED_ERROR"
+
+    response = client.get("/api/user", headers={"Authorization": "Bearer not-a-token"})
+    assert response.status_code == 401
+    assert "msg" not in response.json
+    assert response.json["error_detail"]["error_code"] == "UNAUTHORIZED_ERROR"
@@ -0,0 +1,75 @@
+import pytest
+
+from silver_app.user.models import User
+from silver_app.utils.responses import success_response_decorator
+
+from conftest import login, register
+
+
+@pytest.fixture
+def user_client(client):
+
+    register(client)
+    login(client)
+    return client
+
+
+def test_matching_if_none_match_is_304_without_a_body(user_client):
+
+    response = user_client.get("/api/user")
+    tag = response.get_etag()[0]
+
+    assert response.status_code == 200 and tag
+
+    for validator in (f'"{tag}"', f'W/"{tag}"', f'"other", "{tag}"', "*"):
+        cached = user_client.get("/api/user", headers={"If-None-Match": validator})
+        assert cached.status_code == 304
+        assert cached.get_data() == b""
+        assert cached.get_etag() == (tag, False)
+
+
+def test_stale_validator_gets_the_full_response(user_client):
+
+    response = user_client.get("/api/user", headers={"If-None-Match": '"stale"'})
+
+    assert response.status_code == 200
+    assert response.json["data"]["user"]["username"] == "alice"
+
+
+def test_update_moves_the_etag(app, user_client):
+
+    tag = user_client.get("/api/user").get_etag()[0]
+    with app.app_context():
+        User.get_by_id(1).update(email="new@example.com")
+
+    response = user_client.get("/api/user", headers={"If-None-Match": f'"{tag}"'})
+
+    assert response.status_code == 200
+    assert response.get_etag()[0] != tag
+    assert response.json["data"]["user"]["email"] == "new@example.com"
+
+
+def test_payload_etag_runs_the_view_and_answers_304(app, client):
+
+    calls = []
+
+    @app.route("/payload", methods=["GET", "POST"])
+    @success_response_decorator("ok", etag=True)
+    def payload():
+        calls.append(1)
+        return ({"n": 1},)
+
+    tag = client.get("/payload").get_etag()[0]
+    response = client.get("/payload", headers={"If-None-Match": f'"{tag}"'})
+
+    assert response.status_code == 304
+    assert len(calls) == 2
+    assert client.post("/payload", headers={"If-None-Match": f'"{tag}"'}).status_code == 200
+
+
+def test_etag_is_scoped_to_the_endpoint(app, client):
+
+    for name in ("first", "second"):
+        app.add_url_rule(f"/{name}", name, success_response_decorator("ok", etag=lambda: 1)(lambda: ({},)))
+
+    assert client.get("/first").get_etag() != client.get("/second").get_etag()
@@ -0,0 +1,53 @@
+import pytest
+
+from benchmarks.harness import ROUTES, compare, create_seeded_app, percentile, run_wsgi, summarize
+
+
+def test_percentile_and_summary():
+
+    latencies = [n / 1000 for n in range(1, 101)]
+
+    assert percentile(latencies, 50) == pytest.approx(0.051)
+    assert percentile(latencies, 99) == pytest.approx(0.099)
+    assert percentile([0.2], 95) == 0.2
+
+    summary = summarize(latencies, errors=2, elapsed=2.0)
+    assert summary == {
+        "requests": 100, "errors": 2, "rps": 50.0, "mean_ms": 50.5, "p50_ms": 51.0, "p95_ms": 95.0, "p99_ms": 99.0,
+    }
+    assert summarize([], errors=3, elapsed=1.0) == {"requests": 0, "errors": 3}
+
+
+def test_compare_flags_only_changes_past_the_threshold():
+
+    baseline = {"wsgi": {
+        "tasks": {"rps": 100.0, "p95_ms": 10.0},
+        "user": {"rps": 100.0, "p95_ms": 10.0},
+        "login": {"rps": 100.0, "p95_ms": 10.0},
+        "dropped": {"rps": 100.0, "p95_ms": 10.0},
+    }}
+    current = {
+        "wsgi": {
+            "tasks": {"rps": 85.0, "p95_ms": 10.5},   # throughput down 15%
+            "user": {"rps": 95.0, "p95_ms": 12.0},    # p95 up 20%
+            "login": {"rps": 150.0, "p95_ms": 5.0},   # faster
+            "added": {"rps": 1.0, "p95_ms": 1.0},     # no baseline
+        },
+        "http": {"tasks": {"rps": 1.0, "p95_ms": 99.0}},
+    }
+
+    rows, regressions = compare(baseline, current, threshold=10)
+
+    assert len(rows) == 6
+    assert regressions == [("wsgi", "tasks", "rps", 100.0, 85.0, -15.0), ("wsgi", "user", "p95_ms", 10.0, 12.0, 20.0)]
+    assert compare(baseline, current, threshold=25)[1] == []
+
+
+def test_every_route_runs_cleanly_against_a_seeded_app(tmp_path):
+
+    app = create_seeded_app(users=2, tasks_per_user=5, uri=f"sqlite:///{tmp_path / 'bench.db'}")
+
+    results = run_wsgi(app, list(ROUTES.values()), requests=3, warmup=1)
+
+    assert set(results) == set(ROUTES)
+    assert all(stats["requests"] == 3 and stats["errors"] == 0 for stats in results.values()), results
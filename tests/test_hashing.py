@@ -0,0 +1,60 @@
+import pytest
+
+from silver_app.extensions import db, password_hasher
+from silver_app.user.models import User
+from silver_app.utils.errors import ServiceUnavailableException
+from silver_app.utils.hashing import BcryptHasher, ScryptHasher, identify_hasher
+
+from conftest import login, register
+
+
+@pytest.fixture
+def hasher():
+
+    yield password_hasher
+    password_hasher.configure(scheme="bcrypt", options={"rounds": 4})
+
+
+def test_pool_hashes_and_verifies(hasher):
+
+    hasher.configure(scheme="bcrypt", options={"rounds": 4}, pool_size=1, queue_size=2, queue_timeout=1.0)
+
+    pw_hash = hasher.generate_password_hash("secret-pass")
+
+    assert pw_hash.startswith(b"$2b$04$")
+    assert hasher.check_password_hash(pw_hash, "secret-pass")
+    assert not hasher.check_password_hash(pw_hash, "wrong-pass")
+
+
+def test_full_queue_is_503(hasher):
+
+    hasher.configure(scheme="bcrypt", options={"rounds": 4}, pool_size=1, queue_size=0, queue_timeout=0.01)
+    hasher._slots.acquire()
+
+    with pytest.raises(ServiceUnavailableException) as error:
+        hasher.generate_password_hash("secret-pass")
+    assert error.value.status_code == 503
+
+
+def test_hash_names_its_hasher_and_cost(hasher):
+
+    hasher.configure(scheme="scrypt", options={"ln": 4, "r": 8, "p": 1})
+    pw_hash = hasher.generate_password_hash("secret-pass")
+
+    assert identify_hasher(pw_hash) is ScryptHasher
+    assert hasher.check_password_hash(pw_hash, "secret-pass")
+    assert not hasher.needs_rehash(pw_hash)
+    assert ScryptHasher(ln=5).needs_rehash(pw_hash)
+    assert BcryptHasher(rounds=5).needs_rehash(BcryptHasher(rounds=4).hash(b"secret-pass"))
+
+
+def test_login_upgrades_old_hash(app, client, hasher):
+
+    register(client)
+    hasher.configure(scheme="scrypt", options={"ln": 4, "r": 8, "p": 1})
+
+    assert login(client).status_code == 200
+    with app.app_context():
+        assert identify_hasher(db.session.scalar(db.select(User.password))) is ScryptHasher
+
+    assert login(client).status_code == 200
@@ -0,0 +1,114 @@
+import logging
+
+import pytest
+from flask import Response, stream_with_context
+from sqlalchemy import text
+
+from silver_app.extensions import db
+from silver_app.utils.responses import success_response_decorator
+
+from conftest import register
+
+
+@pytest.fixture
+def app(make_app):
+
+    app = make_app(INSTRUMENTATION_SERVER_TIMING=True, INSTRUMENTATION_METADATA=True, INSTRUMENTATION_N_PLUS_ONE_THRESHOLD=3, LOG_LEVEL="INFO")
+
+    @app.route("/queries/<int:count>")
+    @success_response_decorator("ok")
+    def queries(count):
+        for n in range(count):
+            db.session.execute(text("SELECT :n"), {"n": n})
+        return ({},)
+
+    @app.route("/stream")
+    def stream():
+        def rows():
+            for n in range(3):
+                db.session.execute(text("SELECT 1"))
+                yield f"{n}\n"
+        return Response(stream_with_context(rows()), mimetype="application/x-ndjson")
+
+    return app
+
+
+@pytest.fixture
+def records():
+
+    class ListHandler(logging.Handler):
+        def emit(self, record):
+            captured.append(record)
+
+    captured = []
+    logger = logging.getLogger("silver_app.instrumentation")
+    handler = ListHandler()
+    logger.addHandler(handler)
+    yield captured
+    logger.removeHandler(handler)
+
+
+def profiles(records):
+
+    return [record.profile for record in records if record.getMessage() == "request"]
+
+
+def test_statements_are_counted_in_metadata_and_header(client):
+
+    response = client.get("/queries/2")
+    timing = response.json["metadata"]["timing"]
+
+    assert timing["db_statements"] == 2
+    assert set(timing) == {"wall_ms", "db_statements", "db_ms", "hash_ms", "serialize_ms"}
+    assert 'db;dur=' in response.headers["Server-Timing"]
+    assert 'desc="2 statements"' in response.headers["Server-Timing"]
+
+
+def test_one_log_line_per_request(client, records):
+
+    response = client.get("/queries/1")
+
+    [profile] = profiles(records)
+    assert profile["endpoint"] == "queries"
+    assert profile["request_id"] == response.headers["X-Request-ID"]
+    assert profile["db_statements"] == 1
+
+
+def test_repeated_statement_is_reported(client, records):
+
+    client.get("/queries/3")
+
+    warnings = [record.getMessage() for record in records if record.levelno == logging.WARNING]
+    assert len(warnings) == 1
+    assert "ran 3 times" in warnings[0] and "SELECT ?" in warnings[0]
+    assert profiles(records)[0]["repeated_queries"] == 1
+
+
+def test_streamed_body_is_logged_when_closed(client, records):
+
+    response = client.get("/stream", buffered=False)
+    body = b"".join(response.response)
+    assert profiles(records) == []
+
+    response.close()
+
+    assert body == b"0\n1\n2\n"
+    [profile] = profiles(records)
+    assert profile["db_statements"] == 3
+
+
+def test_password_hashing_is_timed(client, records):
+
+    register(client)
+
+    assert profiles(records)[0]["hash_ms"] > 0
+
+
+def test_disabled_adds_nothing(make_app, records):
+
+    client = make_app(INSTRUMENTATION_ENABLED=False, INSTRUMENTATION_METADATA=True, LOG_LEVEL="INFO").test_client()
+    response = register(client)
+
+    assert "Server-Timing" not in response.headers
+    assert "timing" not in response.json["metadata"]
+    assert profiles(records) == []
@@ -0,0 +1,177 @@
+import datetime as dt
+import queue
+
+import pytest
+
+from silver_app.database import unit_of_work
+from silver_app.extensions import db, job_queue
+from silver_app.jobs.models import Job, utcnow
+from silver_app.jobs.scheduler import schedule_task_reminders
+from silver_app.task.models import Task
+from silver_app.user.models import User
+from silver_app.utils.job_queue import Worker
+
+
+@pytest.fixture
+def handled(monkeypatch):
+    """ Payloads run by the "record" handler, "explode" always raises """
+
+    payloads = []
+    monkeypatch.setitem(job_queue.handlers, "record", payloads.append)
+
+    def explode(payload):
+        raise ValueError("boom")
+
+    monkeypatch.setitem(job_queue.handlers, "explode", explode)
+    return payloads
+
+
+def test_worker_runs_due_jobs(app, handled):
+
+    with app.app_context():
+        job_queue.enqueue("record", {"n": 1})
+        job_queue.enqueue("record", {"n": 2})
+        job_queue.enqueue("record", {"n": 3}, delay=3600)
+
+        worker = Worker(job_queue, batch_size=10)
+        worker.run(once=True)
+
+        assert handled == [{"n": 1}, {"n": 2}]
+        assert worker.succeeded == 2
+        statuses = db.session.scalars(db.select(Job.status).order_by(Job.id)).all()
+        assert statuses == [Job.DONE, Job.DONE, Job.QUEUED]
+
+
+def test_claims_are_exclusive(app, handled):
+
+    with app.app_context():
+        for n in range(3):
+            job_queue.enqueue("record", {"n": n})
+
+        first = [job.id for job in job_queue.claim("a", 2)]
+        second = [job.id for job in job_queue.claim("b", 2)]
+
+        assert len(first) == 2 and len(second) == 1
+        assert not set(first) & set(second)
+        assert job_queue.claim("c", 2) == []
+
+
+def test_failed_job_backs_off_then_fails(app, handled):
+
+    with app.app_context():
+        job = job_queue.enqueue("explode", max_attempts=2)
+
+        [claimed] = job_queue.claim("a", 1)
+        assert job_queue.run(claimed) is False
+        assert claimed.status == Job.QUEUED
+        assert claimed.run_at > utcnow()
+        assert claimed.last_error == "ValueError: boom"
+
+        claimed.run_at = utcnow()
+        db.session.commit()
+        [claimed] = job_queue.claim("a", 1)
+        job_queue.run(claimed)
+
+        job = db.session.get(Job, job.id)
+        assert (job.status, job.attempts) == (Job.FAILED, 2)
+        assert job.finished_at is not None
+
+
+def test_enqueue_dedupe_key(app):
+
+    with app.app_context():
+        assert job_queue.enqueue("record", dedupe_key="once") is not None
+        assert job_queue.enqueue("record", dedupe_key="once") is None
+        assert db.session.scalar(db.select(db.func.count()).select_from(Job)) == 1
+
+
+def test_enqueue_dedupe_race_keeps_transaction(app, monkeypatch):
+
+    with app.app_context():
+        job_queue.enqueue("record", dedupe_key="once")
+        """ Another process inserted the key after this one checked """
+        monkeypatch.setattr(db.session, "scalar", lambda *args, **kwargs: None)
+
+        with unit_of_work():
+            kept = job_queue.enqueue("record", {"kept": True}).id
+            assert job_queue.enqueue("record", dedupe_key="once") is None
+
+        monkeypatch.undo()
+        db.session.remove()
+        assert db.session.get(Job, kept).payload == {"kept": True}
+        assert db.session.scalar(db.select(db.func.count()).select_from(Job)) == 2
+
+
+def test_requeue_stale_fails_last_attempt(app):
+
+    with app.app_context():
+        retry = job_queue.enqueue("record", max_attempts=3)
+        poison = job_queue.enqueue("record", max_attempts=3)
+        job_queue.claim("gone", 2)
+
+        expired = utcnow() - dt.timedelta(seconds=job_queue.lock_timeout + 1)
+        retry.locked_at = poison.locked_at = expired
+        poison.attempts = 3
+        db.session.commit()
+
+        assert job_queue.requeue_stale() == 1
+
+        db.session.expire_all()
+        assert (retry.status, retry.locked_by) == (Job.QUEUED, None)
+        assert (poison.status, poison.locked_by) == (Job.FAILED, None)
+        assert poison.finished_at is not None
+
+
+def test_schedule_task_reminders_once(app):
+
+    with app.app_context():
+        user = User("alice", "alice@example.com").save()
+        today = dt.date(2026, 10, 17)
+        for day in range(4):
+            Task.create(title=f"due in {day}", user_id=user.id, due_date=today + dt.timedelta(days=day))
+        Task.create(title="done", user_id=user.id, due_date=today).update(status="done")
+
+        assert schedule_task_reminders(today, lead_days=2, batch_size=2) == 3
+        assert schedule_task_reminders(today, lead_days=2, batch_size=2) == 0
+
+        payloads = db.session.scalars(db.select(Job.payload).order_by(Job.id)).all()
+        assert [payload["due_date"] for payload in payloads] == ["2026-10-17", "2026-10-18", "2026-10-19"]
+
+
+@pytest.fixture
+def full_local_queue(monkeypatch):
+
+    local = queue.Queue(1)
+    local.put_nowait(("record", {}))
+    monkeypatch.setattr(job_queue, "_local", local)
+
+
+def count_jobs():
+
+    return db.session.scalar(db.select(db.func.count()).select_from(Job))
+
+
+def test_overflowing_defer_leaves_the_callers_writes_uncommitted(app, full_local_queue):
+
+    with app.app_context():
+        User("alice", "alice@example.com").save(commit=False)
+        job_queue.defer("record", {"n": 1})
+        db.session.rollback()
+
+        assert db.session.scalar(db.select(db.func.count()).select_from(User)) == 0
+        assert count_jobs() == 0
+
+
+def test_overflowing_defer_is_written_with_the_callers_commit(app, full_local_queue):
+
+    with app.app_context():
+        user = User("alice", "alice@example.com").save(commit=False)
+        job_queue.defer("record", {"n": 1})
+        db.session.commit()
+        assert count_jobs() == 1
+
+        """ Nothing pending, the job is committed on its own """
+        job_queue.defer("record", {"n": 2})
+        db.session.rollback()
+        assert count_jobs() == 2
+        assert user.id is not None
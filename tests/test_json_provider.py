@@ -0,0 +1,73 @@
+import datetime as dt
+import json
+import uuid
+
+import pytest
+
+from silver_app.utils import json_provider
+
+
+BACKENDS = [
+    pytest.param("orjson", marks=pytest.mark.skipif(json_provider.orjson is None, reason="orjson not installed")),
+    pytest.param("ujson", marks=pytest.mark.skipif(json_provider.ujson is None, reason="ujson not installed")),
+    "json",
+]
+
+ENVELOPE = {
+    "data": {
+        "createdAt": dt.datetime(2026, 3, 1, 12, 30, 5, 250000, tzinfo=dt.timezone.utc),
+        "localAt": dt.datetime(2026, 3, 1, 14, 30, tzinfo=dt.timezone(dt.timedelta(hours=2))),
+        "dueDate": dt.date(2026, 3, 2),
+        "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        "title": "café",
+    },
+    "status": "success",
+}
+
+EXPECTED = {
+    "data": {
+        "createdAt": "2026-03-01T12:30:05.250000Z",
+        "localAt": "2026-03-01T14:30:00+02:00",
+        "dueDate": "2026-03-02",
+        "id": "12345678-1234-5678-1234-567812345678",
+        "title": "café",
+    },
+    "status": "success",
+}
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_backends_write_the_same_document(make_app, backend):
+
+    app = make_app(JSON_BACKEND=backend)
+
+    assert app.json.backend == backend
+    assert json.loads(app.json.dumps(ENVELOPE)) == EXPECTED
+    assert app.json.loads(app.json.dumps(EXPECTED)) == EXPECTED
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_response_body_and_mimetype(make_app, backend):
+
+    app = make_app(JSON_BACKEND=backend)
+
+    with app.test_request_context():
+        response = app.json.response(ENVELOPE)
+
+    assert response.mimetype == "application/json"
+    assert json.loads(response.get_data()) == EXPECTED
+
+
+def test_auto_takes_the_first_installed(make_app):
+
+    expected = "orjson" if json_provider.orjson else "ujson" if json_provider.ujson else "json"
+
+    assert make_app(JSON_BACKEND="auto").json.backend == expected
+
+
+def test_missing_backend_is_an_error(make_app, monkeypatch):
+
+    monkeypatch.setattr(json_provider, "ujson", None)
+
+    with pytest.raises(RuntimeError, match="ujson"):
+        make_app(JSON_BACKEND="ujson")
@@ -0,0 +1,77 @@
+import ast
+import subprocess
+import sys
+
+import pytest
+
+from silver_app.utils.lazy_loading import LazyView
+
+from conftest import login, register
+
+
+def routes(app):
+
+    return {(rule.rule, rule.endpoint, frozenset(rule.methods)) for rule in app.url_map.iter_rules()}
+
+
+def test_lazy_routes_match_the_views(make_app):
+
+    eager = make_app(LAZY_LOADING=False)
+    lazy = make_app(LAZY_LOADING=True)
+
+    assert routes(lazy) == routes(eager)
+    assert isinstance(lazy.view_functions["user.get_user"], LazyView)
+
+
+def test_lazy_app_creates_every_table(tmp_path):
+    """ In a fresh interpreter, this one has long imported the views and with them the models """
+
+    script = f"""
+from silver_app.app import create_app
+from silver_app.extensions import db
+from silver_app.settings import TestConfig
+
+class Config(TestConfig):
+    LAZY_LOADING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///{tmp_path / 'lazy.db'}"
+
+app = create_app(Config)
+with app.app_context():
+    db.create_all(bind_key=None)
+    print(sorted(db.inspect(db.engine).get_table_names()))
+"""
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+
+    assert {"users", "tasks", "jobs"} <= set(ast.literal_eval(result.stdout.strip().splitlines()[-1]))
+
+
+def test_lazy_app_skips_unused_packages():
+
+    script = """
+import sys
+from silver_app.app import create_app
+from silver_app.settings import TestConfig
+create_app(type("Config", (TestConfig,), {"LAZY_LOADING": True}))
+print(sorted(name for name in ("flask_bcrypt", "flask_apispec", "marshmallow") if name in sys.modules))
+"""
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+
+    assert ast.literal_eval(result.stdout.strip().splitlines()[-1]) == []
+
+
+def test_lazy_app_serves_database_routes(make_app):
+
+    client = make_app(LAZY_LOADING=True).test_client()
+
+    assert register(client).status_code == 201
+    assert login(client).status_code == 200
+    assert client.get("/api/user").json["data"]["user"]["username"] == "alice"
+    assert client.get("/api/tasks").status_code == 200
+
+
+def test_stale_route_table_names_the_problem():
+
+    view = LazyView("silver_app.user.views", "no_such_view")
+
+    with pytest.raises(RuntimeError, match="ROUTES are out of date"):
+        view()
@@ -0,0 +1,71 @@
+from silver_app.extensions import db, login_cache, password_hasher
+from silver_app.user.models import User
+
+from conftest import login, register
+
+
+def username_lookups(statements):
+
+    return [statement for statement in statements if "users.username =" in statement]
+
+
+def test_known_username_is_looked_up_once(client, queries):
+
+    register(client)
+    assert login(client).status_code == 200
+    queries.clear()
+
+    assert login(client).status_code == 200
+    assert login(client, password="wrong-pass").status_code == 401
+    assert username_lookups(queries) == []
+
+
+def test_unknown_username_is_cached(client, queries):
+
+    assert login(client, username="nobody").status_code == 401
+    assert len(username_lookups(queries)) == 1
+    queries.clear()
+
+    assert login(client, username="nobody").status_code == 401
+    assert queries == []
+
+
+def test_registering_clears_the_negative_entry(client):
+
+    assert login(client).status_code == 401
+    register(client)
+
+    assert login(client).status_code == 200
+
+
+def test_password_change_invalidates_the_entry(app, client):
+
+    register(client)
+    assert login(client).status_code == 200
+    assert login_cache.get("alice") is not None
+
+    with app.app_context():
+        user = db.session.scalar(db.select(User).filter_by(username="alice"))
+        user.set_password("new-secret")
+        user.update()
+    assert login_cache.get("alice") is None
+
+    assert login(client).status_code == 401
+    assert login(client, password="new-secret").status_code == 200
+
+
+def test_new_password_set_on_another_worker_is_accepted(app, client):
+    """ The cached entry still holds the old hash, a mismatch against it must not reject before reading the row """
+
+    register(client)
+    assert login(client).status_code == 200
+
+    with app.app_context():
+        db.session.execute(db.update(User).values(
+            password=password_hasher.generate_password_hash("changed-pass"), version=User.version + 1,
+        ))
+        db.session.commit()
+    assert login_cache.get("alice") is not None
+
+    assert login(client, password="changed-pass").status_code == 200
+    assert login(client).status_code == 401
@@ -0,0 +1,123 @@
+import gc
+import json
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from silver_app.utils.metrics import Counter, Histogram, MmapValues
+
+from conftest import register
+
+
+def scrape(client):
+    """ {sample line without its value: value}, the registry is shared by every app in this process """
+
+    response = client.get("/metrics")
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    text = response.get_data(as_text=True)
+    return text, dict(line.rsplit(" ", 1) for line in text.splitlines() if not line.startswith("#"))
+
+
+def test_metrics_endpoint(client):
+
+    registered = 'http_requests_total{blueprint="user",endpoint="user.user_register",status_code="201",error_code=""}'
+    bucket = 'http_request_duration_seconds_bucket{blueprint="user",endpoint="user.user_register",status_code="201",le="+Inf"}'
+    _, before = scrape(client)
+
+    register(client)
+    client.get("/api/user")
+    text, after = scrape(client)
+
+    assert "# TYPE http_requests_total counter" in text
+    assert "# TYPE http_request_duration_seconds histogram" in text
+    assert "# TYPE login_cache_hits gauge" in text
+    assert int(after[registered]) - int(before.get(registered, 0)) == 1
+    assert int(after[bucket]) - int(before.get(bucket, 0)) == 1
+    fetched = 'http_requests_total{blueprint="user",endpoint="user.get_user",status_code="200",error_code=""}'
+    assert int(after[fetched]) - int(before.get(fetched, 0)) == 1
+
+
+def test_errors_are_counted_by_error_code(client):
+
+    _, before = scrape(client)
+    client.get("/api/user")
+    _, after = scrape(client)
+
+    [refused] = [
+        key for key in after
+        if key.startswith("http_requests_total{") and "user.get_user" in key and after[key] != before.get(key)
+    ]
+    assert 'status_code="401"' in refused
+    assert 'error_code=""' not in refused
+
+
+def test_histogram_buckets_are_cumulative():
+
+    histogram = Histogram("latency", "", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(("a",), value)
+
+    samples = {(name, labels): value for name, _, labels, value in histogram.samples()}
+    assert samples[("latency_bucket", ("a", "0.1"))] == 1
+    assert samples[("latency_bucket", ("a", "1"))] == 3
+    assert samples[("latency_bucket", ("a", "+Inf"))] == 4
+    assert samples[("latency_count", ("a",))] == 4
+    assert samples[("latency_sum", ("a",))] == pytest.approx(6.05)
+
+
+@pytest.mark.parametrize("metric, record", [
+    (Counter("requests", "", ("route",)), lambda metric: metric.inc(("a",))),
+    (Histogram("latency", "", ("route",)), lambda metric: metric.observe(("a",), 0.01)),
+])
+def test_exited_threads_are_folded_and_dropped(metric, record):
+
+    def work():
+        for _ in range(100):
+            record(metric)
+
+    for _ in range(5):
+        threads = [threading.Thread(target=work) for _ in range(50)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    gc.collect()
+
+    assert metric._shards == {}
+    samples = {name: value for name, _, _, value in metric.samples()}
+    assert samples.get("requests", samples.get("latency_count")) == 25000
+
+
+def test_live_thread_and_retired_totals_add_up():
+
+    counter = Counter("requests", "", ())
+    counter.inc((), 2)
+    thread = threading.Thread(target=counter.inc, args=((), 3))
+    thread.start()
+    thread.join()
+
+    assert len(counter._shards) == 1
+    assert list(counter.samples()) == [("requests", (), (), 5)]
+
+
+def test_gauges_of_exited_workers_are_left_out(make_app, tmp_path):
+
+    app = make_app(METRICS_MULTIPROC_DIR=str(tmp_path))
+    metrics = app.extensions["metrics"]
+
+    exited = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+    dead = MmapValues(str(tmp_path / f"metrics_{int(exited.stdout)}.db"))
+    dead.write(json.dumps(["http_requests_total", ["blueprint", "endpoint", "status_code", "error_code"], ["app", "x", "200", ""]]), 7)
+    dead.write(json.dumps(["login_cache_size", ["cache"], ["users"]]), 40)
+
+    live = MmapValues(str(tmp_path / f"metrics_{os.getppid()}.db"))
+    live.write(json.dumps(["login_cache_size", ["cache"], ["users"]]), 3)
+
+    totals = metrics.collect()
+
+    assert totals[("http_requests_total", ("blueprint", "endpoint", "status_code", "error_code"), ("app", "x", "200", ""))] == 7
+    """ This process' own file reports an empty cache """
+    assert totals[("login_cache_size", ("cache",), ("users",))] == 3
@@ -0,0 +1,93 @@
+import pytest
+from flask_jwt_extended import decode_token
+from sqlalchemy import update
+
+from silver_app.extensions import db, password_hasher, user_versions
+from silver_app.user.models import User
+from silver_app.utils.auth import AuthService
+
+from conftest import login, register
+
+
+@pytest.fixture
+def app(make_app):
+
+    return make_app(JWT_PROFILE_CLAIMS=True)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """ user_versions' clock, advanced by hand """
+
+    now = [0.0]
+    monkeypatch.setattr(user_versions, "clock", lambda: now[0])
+    return now
+
+
+def user_reads(statements):
+
+    return [statement for statement in statements if "FROM users" in statement]
+
+
+def test_current_snapshot_skips_the_users_table(client, queries):
+
+    register(client)
+    assert client.get("/api/user").status_code == 200
+    queries.clear()
+
+    response = client.get("/api/user")
+
+    assert response.json["data"]["user"]["email"] == "alice@example.com"
+    assert user_reads(queries) == []
+
+
+def test_update_in_this_process_retires_the_snapshot(app, client):
+
+    register(client)
+    with app.app_context():
+        db.session.get(User, 1).update(email="new@example.com")
+
+    assert client.get("/api/user").json["data"]["user"]["email"] == "new@example.com"
+
+
+def test_update_on_another_worker_retires_the_snapshot(app, client, clock):
+    """ The other worker's write never reaches this process' user_versions, users.version is read again once the entry expires """
+
+    register(client)
+    assert client.get("/api/user").json["data"]["user"]["email"] == "alice@example.com"
+    with app.app_context():
+        db.session.execute(update(User).values(email="other@example.com", version=User.version + 1))
+        db.session.commit()
+
+    assert client.get("/api/user").json["data"]["user"]["email"] == "alice@example.com"
+
+    clock[0] += 5
+    assert client.get("/api/user").json["data"]["user"]["email"] == "other@example.com"
+    assert user_versions.get("1") == 2
+
+
+def test_deleted_user_snapshot_is_refused(app, client, clock):
+
+    register(client)
+    with app.app_context():
+        db.session.execute(db.delete(User))
+        db.session.commit()
+    clock[0] += 5
+
+    with app.test_request_context():
+        claims = decode_token(client.get_cookie("access_token_cookie").value)
+        assert AuthService.profile_from_claims(claims) is None
+
+
+def test_rehash_on_login_moves_the_version(app, client):
+
+    register(client)
+    password_hasher.configure(scheme="scrypt", options={"ln": 4, "r": 8, "p": 1})
+    try:
+        assert login(client).status_code == 200
+    finally:
+        password_hasher.configure(scheme="bcrypt", options={"rounds": 4})
+
+    with app.app_context():
+        assert db.session.get(User, 1).version == 2
+    assert user_versions.get("1") == 2
@@ -0,0 +1,155 @@
+import asyncio
+import threading
+
+import pytest
+
+from silver_app.extensions import rate_limiter
+from silver_app.utils.errors import TooManyRequestsException
+from silver_app.utils.rate_limit import LocalRateLimitBackend, retry_after
+
+from conftest import login, register
+
+
+@pytest.fixture
+def app(make_app):
+
+    return make_app(RATELIMIT_RULES={"login": {"ip": (6, 60), "username": (3, 60)}})
+
+
+def test_sliding_window_weighs_the_previous_window():
+
+    now = [0.0]
+    backend = LocalRateLimitBackend(shards=2, clock=lambda: now[0])
+
+    """ Full for the rest of this window, then until the 4 hits weigh 3 or less """
+    assert [backend.hit("k", 4, 10) for _ in range(5)] == [0, 0, 0, 0, 13]
+
+    """ Half way into the next window the previous 4 hits still count as 2 """
+    now[0] = 15.0
+    assert [backend.hit("k", 4, 10) for _ in range(3)] == [0, 0, 3]
+    now[0] = 18.0
+    assert backend.hit("k", 4, 10) == 0
+
+
+def test_retry_after_is_zero_when_a_hit_fits():
+
+    assert retry_after(previous=0, current=2, offset=5, window=10, limit=3) == 0
+    assert retry_after(previous=0, current=3, offset=5, window=10, limit=3) == 9
+    assert retry_after(previous=10, current=0, offset=0.5, window=10, limit=3) == 8
+
+
+def test_full_shard_evicts_the_oldest_key():
+
+    backend = LocalRateLimitBackend(shards=1, max_keys=2, clock=lambda: 0.0)
+    for key in ("a", "b", "c"):
+        backend.hit(key, 1, 60)
+
+    assert backend.stats() == {"keys": 2}
+    assert backend.hit("a", 1, 60) == 0
+    assert backend.hit("c", 1, 60) == 120
+
+
+def test_username_limit_is_429_with_retry_after(client):
+
+    register(client)
+    statuses = [login(client, password="wrong").status_code for _ in range(3)]
+    response = login(client)
+
+    assert statuses == [401, 401, 401]
+    assert response.status_code == 429
+    assert 1 <= int(response.headers["Retry-After"]) <= 120
+    assert response.json["error_detail"]["error_code"] == "TOO_MANY_REQUESTS_ERROR"
+    assert response.json["error_detail"]["retry_after"] == int(response.headers["Retry-After"])
+    assert rate_limiter.stats()["rejected"] == {("login", "username"): 1}
+
+    """ Usernames are counted apart, case folded. Rejected attempts left the address count at 3 """
+    assert login(client, username="ALICE").status_code == 429
+    assert [login(client, username=name).status_code for name in ("bob", "carol", "dave")] == [401, 401, 401]
+    assert login(client, username="erin").status_code == 429
+
+
+def test_rejected_hit_is_taken_back_from_the_limits_it_passed():
+
+    backend = LocalRateLimitBackend(shards=2, clock=lambda: 0.0)
+    assert backend.hit("k", 2, 60) == 0
+    backend.release("k", 60)
+
+    assert [backend.hit("k", 2, 60) for _ in range(3)] == [0, 0, 90]
+
+
+def test_limits_are_per_client_address(client):
+
+    for n in range(6):
+        login(client, username=f"nobody{n}", REMOTE_ADDR="10.0.0.1")
+
+    assert login(client, username="someone", REMOTE_ADDR="10.0.0.1").status_code == 429
+    assert login(client, username="someone", REMOTE_ADDR="10.0.0.2").status_code == 401
+
+
+@pytest.mark.parametrize("trusted, statuses", [(0, [401, 429]), (1, [401, 401])])
+def test_forwarded_client_address_with_proxy_fix(make_app, trusted, statuses):
+    """ Two clients behind one proxy share its address unless PROXY_FIX_X_FOR trusts the header """
+
+    client = make_app(PROXY_FIX_X_FOR=trusted, RATELIMIT_RULES={"login": {"ip": (1, 60)}}).test_client()
+
+    assert [
+        login(client, REMOTE_ADDR="10.0.0.9", HTTP_X_FORWARDED_FOR=address).status_code
+        for address in ("203.0.113.1", "203.0.113.2")
+    ] == statuses
+
+
+def test_disabled_limiter_lets_everything_through(make_app):
+
+    client = make_app(RATELIMIT_ENABLED=False, RATELIMIT_RULES={"login": {"ip": (1, 60)}}).test_client()
+
+    assert {login(client).status_code for _ in range(3)} == {401}
+
+
+class RecordingBackend:
+
+    def __init__(self, blocking, wait=0):
+
+        self.blocking = blocking
+        self.wait = wait
+        self.threads = []
+
+    def hit(self, key, limit, window):
+
+        self.threads.append(threading.current_thread())
+        return self.wait
+
+    def stats(self):
+
+        return {}
+
+
+@pytest.mark.parametrize("blocking", [True, False])
+def test_coroutine_views_check_blocking_backends_off_the_loop(app, monkeypatch, blocking):
+
+    backend = RecordingBackend(blocking)
+    monkeypatch.setattr(rate_limiter, "backend", backend)
+
+    @rate_limiter.limit("login")
+    async def view(username):
+        return threading.current_thread()
+
+    with app.test_request_context(environ_base={"REMOTE_ADDR": "10.0.0.1"}):
+        loop_thread = asyncio.run(view(username="alice"))
+
+    assert len(backend.threads) == 2
+    assert all((thread is loop_thread) is not blocking for thread in backend.threads)
+
+
+def test_coroutine_views_get_the_429(app, monkeypatch):
+
+    monkeypatch.setattr(rate_limiter, "backend", RecordingBackend(blocking=True, wait=7))
+
+    @rate_limiter.limit("login")
+    async def view(username):
+        return "ran"
+
+    with app.test_request_context():
+        with pytest.raises(TooManyRequestsException) as raised:
+            asyncio.run(view(username="alice"))
+
+    assert raised.value.retry_after == 7
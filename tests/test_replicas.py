@@ -0,0 +1,83 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+from silver_app.database import use_primary
+from silver_app.extensions import db, login_cache, row_cache
+from silver_app.user.models import User
+
+from conftest import login, register
+
+
+@pytest.fixture
+def replica_uri(tmp_path):
+    """ A second SQLite file standing in for a replica that has not caught up: same schema, no rows """
+
+    uri = f"sqlite:///{tmp_path / 'replica.db'}"
+    engine = create_engine(uri)
+    db.metadata.create_all(engine)
+    engine.dispose()
+    return uri
+
+
+@pytest.fixture
+def make_replicated_app(make_app, replica_uri):
+
+    def make(**settings):
+        return make_app(SQLALCHEMY_REPLICA_URIS=[replica_uri], **settings)
+
+    return make
+
+
+@pytest.fixture
+def app(make_replicated_app):
+
+    app = make_replicated_app(CACHE_TYPE="simple")
+    register(app.test_client())
+    return app
+
+
+def test_plain_reads_go_to_the_replica(app):
+
+    with app.app_context():
+        assert db.session.scalar(db.select(User.username)) is None
+        with use_primary():
+            assert db.session.scalar(db.select(User.username)) == "alice"
+
+
+def test_a_session_that_writes_stays_on_the_primary(app):
+
+    with app.app_context():
+        db.session.execute(text("UPDATE users SET email = 'new@example.com'"))
+        assert db.session.scalar(db.select(User.email)) == "new@example.com"
+
+
+def test_row_cache_is_filled_from_the_primary(app):
+
+    row_cache.clear()
+    with app.app_context():
+        assert User.get_by_id(1).username == "alice"
+        assert User.get_many_by_ids([1])[0].username == "alice"
+        assert row_cache.get(User, 1)["username"] == "alice"
+
+
+def test_without_a_row_cache_reads_stay_on_the_replica(make_replicated_app):
+
+    app = make_replicated_app(CACHE_TYPE="null")
+    register(app.test_client())
+
+    with app.app_context():
+        assert not row_cache.enabled
+        assert User.get_by_id(1) is None
+
+
+def test_login_right_after_registering(app):
+
+    login_cache.missing.clear()
+    login_cache.users.clear()
+    client = app.test_client()
+
+    assert login(client).status_code == 200
+    assert login_cache.get("alice").id == 1
+    assert login(client, password="wrong").status_code == 401
+    assert login(client, username="nobody").status_code == 401
+    assert login_cache.get("nobody") is login_cache.USER_NOT_FOUND
@@ -0,0 +1,88 @@
+import re
+import time
+import uuid
+
+import pytest
+
+from silver_app.utils import request_helper
+from silver_app.utils.request_helper import MonotonicIdGenerator, generate_request_id, generate_ulid, generate_uuid7
+
+
+ULID = re.compile(r"[0-9A-HJKMNP-TV-Z]{26}")
+
+
+def test_ulid_format_and_timestamp():
+
+    before = time.time_ns() // 1_000_000
+    value = generate_ulid()
+
+    assert ULID.fullmatch(value)
+    assert value[0] in "01234567"
+    ms = int(value[:10].translate(str.maketrans(request_helper._CROCKFORD, "0123456789abcdefghijklmnopqrstuv")), 32)
+    assert before <= ms <= time.time_ns() // 1_000_000
+
+
+def test_uuid7_is_a_valid_version_7_uuid():
+
+    value = uuid.UUID(generate_uuid7())
+
+    assert value.version == 7
+    assert value.variant == uuid.RFC_4122
+
+
+@pytest.mark.parametrize("generate", [generate_ulid, generate_uuid7])
+def test_ids_sort_in_creation_order(generate):
+
+    ids = [generate() for _ in range(10000)]
+
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+
+
+def test_clock_stepping_back_keeps_order(monkeypatch):
+
+    generator = MonotonicIdGenerator(random_bits=8)
+    now = [5_000_000_000_000]
+    monkeypatch.setattr(request_helper.time, "time_ns", lambda: now[0])
+
+    ids = [generator.next() for _ in range(300)]
+    now[0] -= 1_000_000_000
+    ids += [generator.next() for _ in range(10)]
+
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+    """ 256 IDs fit in a millisecond with 8 random bits, the rest borrow the next ones """
+    assert ids[-1][0] > ids[0][0]
+
+
+@pytest.mark.parametrize("mode, pattern", [
+    ("ulid", r"req_[0-9A-HJKMNP-TV-Z]{26}"),
+    ("uuid7", r"[0-9a-f]{8}-[0-9a-f]{4}-7[0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}"),
+    ("legacy", r"req_\d{8}_\d{6}_[0-9a-f]{6}"),
+])
+def test_modes(mode, pattern):
+
+    assert re.fullmatch(pattern, generate_request_id(mode))
+
+
+def test_response_echoes_a_fresh_id(client):
+
+    response = client.get("/api/tasks")
+
+    assert re.fullmatch(r"req_[0-9A-HJKMNP-TV-Z]{26}", response.headers["X-Request-ID"])
+    assert response.json["error_id"] == response.headers["X-Request-ID"]
+
+
+def test_incoming_id_is_reused_when_tame(client):
+
+    assert client.get("/api/tasks", headers={"X-Request-ID": "trace-123:abc"}).headers["X-Request-ID"] == "trace-123:abc"
+
+    for unsafe in ("has space", "x" * 129, "semi;colon", "quote\""):
+        assert client.get("/api/tasks", headers={"X-Request-ID": unsafe}).headers["X-Request-ID"].startswith("req_")
+
+
+def test_incoming_id_is_ignored_when_not_trusted(make_app):
+
+    client = make_app(REQUEST_ID_TRUST_HEADER=False).test_client()
+
+    assert client.get("/api/tasks", headers={"X-Request-ID": "trace-123"}).headers["X-Request-ID"].startswith("req_")
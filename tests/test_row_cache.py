@@ -0,0 +1,113 @@
+import pytest
+from sqlalchemy import update
+
+from silver_app.extensions import db, password_hasher, row_cache
+from silver_app.task.models import Task
+from silver_app.user.models import User
+
+from conftest import login, register
+
+
+@pytest.fixture
+def app(make_app):
+
+    return make_app(CACHE_TYPE="simple")
+
+
+def create_tasks(app, count):
+
+    with app.app_context():
+        user = User("alice", "alice@example.com").save()
+        Task.bulk_create({"title": f"task {n}", "user_id": user.id} for n in range(count))
+
+
+def test_get_by_id_reads_through(app, queries):
+
+    create_tasks(app, 1)
+    with app.app_context():
+        assert Task.get_by_id(1).title == "task 0"
+    queries.clear()
+
+    with app.app_context():
+        assert Task.get_by_id("1").title == "task 0"
+    assert queries == []
+
+
+def test_save_invalidates(app):
+
+    create_tasks(app, 1)
+    with app.app_context():
+        Task.get_by_id(1).update(title="renamed")
+    assert row_cache.get(Task, 1) is None
+
+    with app.app_context():
+        assert Task.get_by_id(1).title == "renamed"
+
+
+def test_get_many_by_ids_loads_misses_in_one_query(app, queries):
+
+    create_tasks(app, 5)
+    with app.app_context():
+        Task.get_by_id(2)
+        db.session.remove()
+        queries.clear()
+
+        tasks = Task.get_many_by_ids([4, 2, 99, 1])
+
+    assert [task.id for task in tasks] == [4, 2, 1]
+    assert len(queries) == 1 and " IN " in queries[0]
+
+
+def test_password_changed_on_another_worker_is_not_accepted(app, client):
+    """ That worker's write never reaches this process' login or row cache, the login check must read the database """
+
+    register(client)
+    assert login(client).status_code == 200
+    assert client.get("/api/user").status_code == 200
+    assert row_cache.get(User, 1) is not None
+
+    with app.app_context():
+        db.session.execute(update(User).values(
+            password=password_hasher.generate_password_hash("changed-pass"), version=User.version + 1,
+        ))
+        db.session.commit()
+
+    assert login(client).status_code == 401
+    assert login(client, password="changed-pass").status_code == 200
+
+
+def update_outside(app, title):
+    """ A write made by another worker, it never reaches this process' cache """
+
+    with app.app_context():
+        db.session.execute(update(Task).values(title=title))
+        db.session.commit()
+
+
+def test_default_config_caches_no_rows(make_app):
+
+    app = make_app()
+    create_tasks(app, 1)
+    with app.app_context():
+        assert Task.get_by_id(1).title == "task 0"
+    update_outside(app, "renamed")
+
+    with app.app_context():
+        assert not row_cache.enabled
+        assert Task.get_by_id(1).title == "renamed"
+
+
+def test_simple_cache_is_stale_for_at_most_its_timeout(app, monkeypatch):
+
+    now = [0.0]
+    monkeypatch.setattr(row_cache.backend.cache, "clock", lambda: now[0])
+    create_tasks(app, 1)
+    with app.app_context():
+        assert Task.get_by_id(1).title == "task 0"
+    update_outside(app, "renamed")
+
+    with app.app_context():
+        assert Task.get_by_id(1).title == "task 0"
+    now[0] += app.config["CACHE_DEFAULT_TIMEOUT"]
+    with app.app_context():
+        assert Task.get_by_id(1).title == "renamed"
@@ -0,0 +1,83 @@
+import datetime as dt
+from types import SimpleNamespace
+
+import pytest
+from marshmallow import Schema, fields, pre_dump
+
+from silver_app.task.serializers import task_schema, task_schema_dump, task_schemas, task_schemas_dump
+from silver_app.user.serializers import user_schema, user_schema_dump, user_schemas, user_schemas_dump
+from silver_app.utils.serializer_compiler import compile_dump
+
+
+CREATED = dt.datetime(2026, 3, 1, 12, 30, 5, 250000)
+
+
+def user(**attrs):
+
+    return SimpleNamespace(**{"username": "alice", "email": "alice@example.com", "password": b"hash",
+                              "created_at": CREATED, "updated_at": CREATED, **attrs})
+
+
+def task(**attrs):
+
+    return SimpleNamespace(**{"id": 1, "title": "write tests", "description": None, "due_date": dt.date(2026, 3, 2),
+                              "status": "open", "created_at": CREATED, "updated_at": None, **attrs})
+
+
+@pytest.mark.parametrize("obj", [
+    user(),
+    user(email=None, updated_at=None),
+    user(username=b"bytes"),
+    SimpleNamespace(username="no dates"),
+])
+def test_user_dump_matches_marshmallow(obj):
+
+    assert user_schema_dump(obj) == user_schema.dump(obj)
+    assert list(user_schema_dump(obj)["user"]) == list(user_schema.dump(obj)["user"])
+
+
+@pytest.mark.parametrize("obj", [task(), task(due_date=None, description="x", id="7"), SimpleNamespace(title="bare")])
+def test_task_dump_matches_marshmallow(obj):
+
+    assert task_schema_dump(obj) == task_schema.dump(obj)
+
+
+def test_many_matches_marshmallow():
+
+    users = [user(username=f"user{n}") for n in range(3)]
+    tasks = [task(id=n) for n in range(3)]
+
+    assert user_schemas_dump(users) == user_schemas.dump(users)
+    assert user_schema_dump(users, many=True) == user_schema.dump(users, many=True)
+    assert task_schemas_dump(tasks) == task_schemas.dump(tasks)
+    assert task_schemas_dump(tuple(tasks)) == task_schemas.dump(tuple(tasks))
+    assert task_schemas_dump([]) == task_schemas.dump([])
+
+
+def test_dicts_and_generators_fall_back_to_marshmallow():
+
+    row = {"id": 1, "title": "dict", "due_date": dt.date(2026, 3, 2)}
+
+    assert task_schema_dump(row) == task_schema.dump(row)
+    assert task_schemas_dump(task(id=n) for n in range(2)) == task_schemas.dump([task(id=n) for n in range(2)])
+
+
+def test_fields_without_inliner_and_hooks():
+
+    class Schema_(Schema):
+        name = fields.Str(data_key="displayName")
+        score = fields.Float()
+        tags = fields.List(fields.Str())
+        kind = fields.Str(dump_default="plain")
+        owner = fields.Str(attribute="owner.name")
+
+        @pre_dump
+        def upper(self, obj, **kwargs):
+            return SimpleNamespace(**{**vars(obj), "name": obj.name.upper()})
+
+    schema = Schema_()
+    obj = SimpleNamespace(name="a", score=1, tags=("x", "y"), owner=SimpleNamespace(name="bob"))
+
+    assert compile_dump(schema)(obj) == schema.dump(obj) == {
+        "displayName": "A", "score": 1.0, "tags": ["x", "y"], "kind": "plain", "owner": "bob",
+    }
@@ -0,0 +1,101 @@
+import json
+import logging
+import queue
+
+import pytest
+from flask import current_app
+
+from silver_app.utils.structured_logging import NonBlockingQueueHandler, RateLimitFilter, SamplingFilter
+
+
+def record(level=logging.INFO, request_id=None):
+
+    entry = logging.LogRecord("silver_app.test", level, __file__, 1, "hello %s", ("world",), None)
+    entry.request_id = request_id
+    return entry
+
+
+@pytest.fixture
+def log_file(tmp_path):
+
+    return tmp_path / "app.log"
+
+
+def written(app, log_file):
+    """ Lines written once the listener has drained the queue """
+
+    app.extensions["logging"].stop()
+    return log_file.read_text().splitlines()
+
+
+def test_request_lines_are_json_with_the_request_id(make_app, log_file):
+
+    app = make_app(LOG_FILE=str(log_file), LOG_FORMAT="json", LOG_LEVEL="INFO")
+
+    @app.route("/log")
+    def log():
+        current_app.logger.info("user %s did %s", "alice", "things", extra={"task_id": 3})
+        return "ok"
+
+    response = app.test_client().get("/log")
+    [line] = [json.loads(line) for line in written(app, log_file) if '"logger": "silver_app.app"' in line]
+
+    assert line["message"] == "user alice did things"
+    assert line["level"] == "INFO"
+    assert line["request_id"] == response.headers["X-Request-ID"]
+    assert line["task_id"] == 3
+    assert line["ts"].endswith("Z")
+
+
+def test_text_format_and_tracebacks(make_app, log_file):
+
+    app = make_app(LOG_FILE=str(log_file), LOG_FORMAT="text", LOG_LEVEL="INFO")
+
+    with app.app_context():
+        try:
+            raise ValueError("bad")
+        except ValueError:
+            current_app.logger.exception("failed", extra={"job": "x"})
+
+    text = "\n".join(written(app, log_file))
+    assert "ERROR silver_app.app [None] failed\nTraceback" in text
+    assert text.endswith('ValueError: bad {"job": "x"}')
+
+
+def test_full_queue_drops_instead_of_blocking():
+
+    handler = NonBlockingQueueHandler(queue.Queue(2))
+    for _ in range(5):
+        handler.handle(record())
+
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+    assert handler.queue.get().msg == "hello world"
+
+
+def test_rate_limit_per_second_reports_what_it_suppressed():
+
+    now = [100.0]
+    limit = RateLimitFilter({"WARNING": 2, "ERROR": None}, clock=lambda: now[0])
+
+    assert [limit.filter(record(logging.WARNING)) for _ in range(5)] == [True, True, False, False, False]
+    assert all(limit.filter(record(logging.ERROR)) for _ in range(5))
+    assert limit.filter(record(logging.INFO))
+
+    now[0] += 1
+    next_window = record(logging.WARNING)
+    assert limit.filter(next_window)
+    assert next_window.suppressed == 3
+    assert limit.dropped == 3
+
+
+def test_sampling_keeps_or_drops_whole_requests():
+
+    sampling = SamplingFilter({"INFO": 0.5, "WARNING": 1.0})
+    request_ids = [f"req_{n}" for n in range(400)]
+
+    kept = [rid for rid in request_ids if sampling.filter(record(request_id=rid))]
+
+    assert 100 < len(kept) < 300
+    assert all(sampling.filter(record(request_id=rid)) for rid in kept)
+    assert all(sampling.filter(record(logging.WARNING, request_id=rid)) for rid in request_ids)
@@ -0,0 +1,81 @@
+import json
+import tracemalloc
+
+import pytest
+
+from silver_app.extensions import db
+from silver_app.task.models import Task
+
+from conftest import register
+
+
+def add_tasks(app, count):
+
+    with app.app_context():
+        Task.bulk_create({"title": f"task {n}", "description": "x" * 100, "user_id": 1} for n in range(count))
+
+
+def stream_export(client, fmt):
+    """ (body line count, body bytes, peak traced memory) with the body consumed chunk by chunk, never held whole """
+
+    response = client.get("/api/tasks/export", query_string={"format": fmt}, buffered=False)
+    assert response.status_code == 200
+    assert response.is_streamed
+
+    lines = size = 0
+    tracemalloc.start()
+    try:
+        for chunk in response.response:
+            lines += chunk.count(b"\n")
+            size += len(chunk)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        response.close()
+    return lines, size, peak
+
+
+@pytest.fixture
+def exporter(app, client):
+
+    register(client)
+    return client
+
+
+def test_ndjson_has_header_rows_and_trailer(app, exporter):
+
+    add_tasks(app, 3)
+    lines = exporter.get("/api/tasks/export", query_string={"format": "ndjson"}).data.splitlines()
+
+    assert json.loads(lines[0])["success"] is True
+    assert [json.loads(line)["title"] for line in lines[1:-1]] == ["task 0", "task 1", "task 2"]
+    assert json.loads(lines[-1])["metadata"]["count"] == 3
+
+
+def test_json_is_one_envelope(app, exporter):
+
+    add_tasks(app, 3)
+    body = exporter.get("/api/tasks/export").json
+
+    assert [task["title"] for task in body["data"]["tasks"]] == ["task 0", "task 1", "task 2"]
+    assert body["metadata"]["count"] == 3
+
+
+def test_large_export_returns_its_connection_and_keeps_memory_flat(app, exporter):
+
+    with app.app_context():
+        pool = db.engine.pool
+
+    add_tasks(app, 4000)
+    lines, small_size, small_peak = stream_export(exporter, "ndjson")
+    assert lines == 4000 + 2
+    assert pool.checkedout() == 0
+
+    add_tasks(app, 16000)
+    lines, large_size, large_peak = stream_export(exporter, "ndjson")
+    assert lines == 20000 + 2
+    assert pool.checkedout() == 0
+
+    """ Five times the rows, about the same peak: one fetch batch is in memory at a time, not the body """
+    assert large_size > 4 * small_size
+    assert large_peak < 1.5 * small_peak
@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+from silver_app.extensions import db
+from silver_app.task.models import Task
+
+from conftest import register
+
+
+@pytest.fixture
+def app(make_app):
+
+    return make_app(TASK_IMPORT_MAX_ROWS=50, TASK_IMPORT_BATCH_SIZE=4, TASK_IMPORT_CHUNK_SIZE=3)
+
+
+@pytest.fixture
+def importer(client):
+
+    register(client)
+    return client
+
+
+def task_titles(app):
+
+    with app.app_context():
+        return db.session.scalars(db.select(Task.title).order_by(Task.id)).all()
+
+
+def test_json_array_is_imported_in_order(app, importer, queries):
+
+    rows = [{"title": f"task {n}", "dueDate": "2026-03-01"} for n in range(10)]
+    queries.clear()
+
+    response = importer.post("/api/tasks/bulk", json=rows)
+
+    assert response.status_code == 201
+    assert response.json["data"] == {"imported": 10}
+    assert task_titles(app) == [f"task {n}" for n in range(10)]
+    assert len([statement for statement in queries if statement.startswith("INSERT INTO tasks")]) == 4
+
+
+def test_ndjson_lines_are_imported(app, importer):
+
+    body = "\n".join(json.dumps({"title": f"task {n}"}) for n in range(3)) + "\n\n"
+
+    response = importer.post("/api/tasks/bulk", data=body, content_type="application/x-ndjson")
+
+    assert response.status_code == 201
+    assert task_titles(app) == ["task 0", "task 1", "task 2"]
+
+
+def test_any_invalid_row_rejects_the_import_with_its_index(app, importer):
+
+    rows = [{"title": "ok"}] * 5 + [{"title": ""}, {"title": "ok"}, {"description": "no title"}]
+
+    response = importer.post("/api/tasks/bulk", json=rows)
+
+    assert response.status_code == 400
+    assert sorted(response.json["error_detail"]["errors"]) == ["5", "7"]
+    assert task_titles(app) == []
+
+
+def test_unparseable_ndjson_line_is_reported(app, importer):
+
+    body = '{"title": "ok"}\nnot json\n'
+
+    response = importer.post("/api/tasks/bulk", data=body, content_type="application/x-ndjson")
+
+    assert response.status_code == 400
+    assert response.json["error_detail"]["errors"] == {"1": {"_schema": ["Invalid JSON"]}}
+
+
+def test_too_many_rows_is_413(app, importer):
+
+    response = importer.post("/api/tasks/bulk", json=[{"title": "ok"}] * 51)
+
+    assert response.status_code == 413
+    assert task_titles(app) == []
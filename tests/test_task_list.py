@@ -0,0 +1,88 @@
+import datetime as dt
+
+import pytest
+
+from silver_app.extensions import db
+from silver_app.task.models import Task
+from silver_app.task.views import encode_cursor
+
+from conftest import register
+
+
+CREATED = dt.datetime(2026, 1, 1)
+
+
+@pytest.fixture
+def tasks(app, client):
+    """ 12 tasks for alice sharing 3 created_at values and 4 due dates, plus one for bob """
+
+    register(client, "bob")
+    register(client)
+    with app.app_context():
+        Task.bulk_create([{
+            "title": f"task {n}", "user_id": 2, "created_at": CREATED + dt.timedelta(hours=n % 3),
+            "updated_at": CREATED, "due_date": None if n == 11 else dt.date(2026, 2, 1 + n % 4),
+        } for n in range(12)])
+        Task.bulk_create([{"title": "bob's", "user_id": 1, "created_at": CREATED, "updated_at": CREATED}])
+    return client
+
+
+def walk(client, **query):
+
+    ids, cursor = [], None
+    while True:
+        response = client.get("/api/tasks", query_string=dict(query, **({"cursor": cursor} if cursor else {})))
+        assert response.status_code == 200
+        ids.extend(task["id"] for task in response.json["data"]["tasks"])
+        metadata = response.json["metadata"]
+        if not metadata["has_more"]:
+            assert metadata["next_cursor"] is None
+            return ids
+        cursor = metadata["next_cursor"]
+
+
+def expected_ids(app, column):
+
+    with app.app_context():
+        query = db.select(Task.id).where(Task.user_id == 2, column.isnot(None)).order_by(column, Task.id)
+        return db.session.scalars(query).all()
+
+
+@pytest.mark.parametrize("limit", [1, 5, 12, 100])
+def test_pages_cover_every_task_once_in_order(app, tasks, limit):
+
+    assert walk(tasks, limit=limit) == expected_ids(app, Task.created_at)
+
+
+def test_due_date_sort_leaves_out_undated_tasks(app, tasks):
+
+    ids = walk(tasks, sort="due_date", limit=5)
+
+    assert ids == expected_ids(app, Task.due_date)
+    assert len(ids) == 11
+
+
+def test_filters_apply_to_every_page(tasks):
+
+    response = tasks.get("/api/tasks", query_string={"due_after": "2026-02-03", "limit": 100})
+
+    assert {task["dueDate"] for task in response.json["data"]["tasks"]} == {"2026-02-03", "2026-02-04"}
+
+
+def test_next_page_is_a_row_value_range(tasks, queries):
+
+    cursor = tasks.get("/api/tasks", query_string={"limit": 2}).json["metadata"]["next_cursor"]
+    queries.clear()
+    tasks.get("/api/tasks", query_string={"limit": 2, "cursor": cursor})
+
+    select = next(statement for statement in queries if "FROM tasks" in statement)
+    assert "(tasks.created_at, tasks.id) >" in select
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", encode_cursor("due_date", dt.date(2026, 2, 1), 1)])
+def test_bad_cursor_is_400(tasks, cursor):
+
+    response = tasks.get("/api/tasks", query_string={"cursor": cursor})
+
+    assert response.status_code == 400
+    assert response.json["error_detail"]["error_code"] == "VALIDATION_ERROR"
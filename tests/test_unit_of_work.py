@@ -0,0 +1,64 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from silver_app.database import unit_of_work
+from silver_app.extensions import db
+from silver_app.task.models import Task
+from silver_app.user.models import User
+
+from conftest import register
+
+
+def count(model):
+
+    return db.session.scalar(db.select(db.func.count()).select_from(model))
+
+
+@pytest.fixture
+def commits():
+
+    sessions = []
+    listener = sessions.append
+    event.listen(Session, "after_commit", listener)
+    yield sessions
+    event.remove(Session, "after_commit", listener)
+
+
+def test_commits_once_on_exit(app, commits):
+
+    with app.app_context():
+        with unit_of_work():
+            user = User("alice", "alice@example.com").save()
+            assert user.id is not None
+            Task.create(title="first", user_id=user.id)
+            with unit_of_work():
+                Task.create(title="nested", user_id=user.id)
+            assert commits == []
+
+        assert len(commits) == 1
+        db.session.remove()
+        assert count(Task) == 2
+
+
+def test_rolls_back_everything_on_error(app):
+
+    with app.app_context():
+        with pytest.raises(RuntimeError):
+            with unit_of_work():
+                user = User("alice", "alice@example.com").save()
+                Task.create(title="first", user_id=user.id)
+                raise RuntimeError
+
+        db.session.remove()
+        assert count(User) == 0
+        assert count(Task) == 0
+
+
+def test_view_unit_of_work_rolls_back_failed_register(app, client):
+
+    assert register(client).status_code == 201
+    assert register(client, email="other@example.com").status_code == 409
+
+    with app.app_context():
+        assert count(User) == 1